@@ -0,0 +1,181 @@
+from collections import deque
+from Arena import Arena
+from Coach import Coach
+from EvalCache import EvalCache
+import FlatCheckpoint
+from MCTS import makeMCTS
+import multiprocessing as mp
+import numpy as np
+import queue
+import time, os
+from random import shuffle
+
+
+def selfPlayWorker(game, nnetClass, args, bestVersion, examplesQueue, stop):
+    """
+    Plays self-play episodes with the latest accepted network until stop is
+    set, and puts (version, examples) on examplesQueue after each episode.
+    The accepted network is checked for before every episode, and reloaded
+    from its checkpoint when bestVersion changed, unless it is a flat
+    checkpoint with the content hash of the loaded one.
+    """
+    examplesQueue.cancel_join_thread()     # do not block exit on unread examples
+    nnet = nnetClass(game)
+    coach = AsyncCoach(game, nnet, args)
+    version = None
+    while not stop.is_set():
+        if bestVersion.value != version:
+            version = bestVersion.value
+            filename = coach.getCheckpointFile(version)
+            if not (filename.endswith(FlatCheckpoint.EXTENSION) and
+                    FlatCheckpoint.readHash(os.path.join(args.checkpoint, filename)) == getattr(nnet, 'checkpoint_hash', None)):
+                nnet.load_checkpoint(folder=args.checkpoint, filename=filename)
+                coach.evalCache.invalidate()
+        coach.mcts = makeMCTS(game, coach.evalCache, args)   # reset search tree
+        examplesQueue.put((version, coach.executeEpisode()))
+
+
+def evaluatorWorker(game, nnetClass, args, bestVersion, candidates, results, stop):
+    """
+    Pits the candidates published by the trainer against the latest accepted
+    network until stop is set. Only the newest waiting candidate is played,
+    older ones are reported as skipped. An accepted candidate is saved as
+    best.pth.tar and becomes the network of the self-play workers by
+    setting bestVersion to its iteration.
+
+    Puts (iteration, result) on results for every candidate, where result is
+    None if it was skipped, else (pwins, nwins, draws, accepted).
+    """
+    bnet = nnetClass(game)
+    cnet = nnetClass(game)
+    coach = AsyncCoach(game, bnet, args)    # for getCheckpointFile
+    bnet.load_checkpoint(folder=args.checkpoint, filename=coach.getCheckpointFile(bestVersion.value))
+    while not stop.is_set():
+        try:
+            iteration = candidates.get(timeout=1)
+        except queue.Empty:
+            continue
+        while True:
+            try:
+                newer = candidates.get_nowait()
+            except queue.Empty:
+                break
+            results.put((iteration, None))
+            iteration = newer
+
+        cnet.load_checkpoint(folder=args.checkpoint, filename=coach.getCheckpointFile(iteration))
+        bmcts = makeMCTS(game, EvalCache(game, bnet, args.get('evalCacheSize', 200000)), args)
+        cmcts = makeMCTS(game, EvalCache(game, cnet, args.get('evalCacheSize', 200000)), args)
+        arena = Arena(lambda x: np.argmax(bmcts.getActionProb(x, temp=0)),
+                      lambda x: np.argmax(cmcts.getActionProb(x, temp=0)), game)
+        pwins, nwins, draws = arena.playGames(args.arenaCompare)
+
+        accepted = pwins+nwins == 0 or float(nwins)/(pwins+nwins) >= args.updateThreshold
+        if accepted:
+            cnet.save_checkpoint(folder=args.checkpoint, filename='best' + args.get('checkpointExtension', '.pth.tar'))
+            bnet.load_checkpoint(folder=args.checkpoint, filename=coach.getCheckpointFile(iteration))
+            bestVersion.value = iteration
+        results.put((iteration, (pwins, nwins, draws, accepted)))
+
+
+class AsyncCoach(Coach):
+    """
+    Runs self-play, training and evaluation at the same time, in separate
+    processes on this machine, instead of one after the other as Coach does.
+
+    - args.numSelfPlayWorkers processes play episodes with the latest
+      accepted network and send the examples to this process.
+    - This process is the trainer: it keeps the examples in a replay buffer
+      of args.replayBufferSize examples and, whenever args.examplesPerCandidate
+      new examples have arrived, trains self.nnet on the buffer and publishes
+      the result as a candidate checkpoint.
+    - An evaluator process pits the newest candidate against the accepted
+      network, and hot-swaps it into the self-play workers when it wins
+      >= updateThreshold fraction of the games.
+
+    The processes share networks through args.checkpoint: every candidate
+    is saved as checkpoint_<i>.pth.tar (with the examples it was trained on
+    in checkpoint_<i>.pth.tar.examples) and never overwritten, and the
+    accepted one is also saved as best.pth.tar. The trainer keeps training
+    its own network whether or not its candidates are accepted.
+
+    The network class must be constructible from the game alone, like the
+    NNetWrappers.
+
+    With args.checkpointExtension = FlatCheckpoint.EXTENSION, the networks
+    are exchanged as flat checkpoints, which the workers memory-map and so
+    share (for the wrappers which support it).
+    """
+
+    def learn(self):
+        """
+        Trains and evaluates args.numIters candidates.
+        """
+        context = mp.get_context('spawn')
+        bestVersion = context.Value('i', 0)
+        stop = context.Event()
+        examplesQueue = context.Queue()
+        candidates = context.Queue()
+        results = context.Queue()
+
+        self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(0))
+        nnetClass = self.nnet.__class__
+        processes = [context.Process(target=selfPlayWorker, args=(self.game, nnetClass, self.args, bestVersion, examplesQueue, stop))
+                     for _ in range(self.args.get('numSelfPlayWorkers', max(1, (os.cpu_count() or 2) - 2)))]
+        processes.append(context.Process(target=evaluatorWorker, args=(self.game, nnetClass, self.args, bestVersion, candidates, results, stop)))
+        for p in processes:
+            p.daemon = True
+            p.start()
+
+        replayBuffer = deque([], maxlen=self.args.get('replayBufferSize', self.args.maxlenOfQueue))
+        for e in self.trainExamplesHistory:
+            replayBuffer.extend(e)
+        newExamples = 0
+        games = 0
+        published = 0
+        evaluated = 0
+        start = time.time()
+        try:
+            while evaluated < self.args.numIters:
+                if not all(p.is_alive() for p in processes):
+                    raise RuntimeError('A self-play or evaluator process died')
+                try:
+                    version, examples = examplesQueue.get(timeout=1)
+                except queue.Empty:
+                    pass
+                else:
+                    replayBuffer.extend(examples)
+                    newExamples += len(examples)
+                    games += 1
+
+                while True:
+                    try:
+                        iteration, result = results.get_nowait()
+                    except queue.Empty:
+                        break
+                    evaluated += 1
+                    if result is None:
+                        print('CANDIDATE %d SKIPPED' % iteration)
+                    else:
+                        pwins, nwins, draws, accepted = result
+                        print('CANDIDATE %d NEW/PREV WINS : %d / %d ; DRAWS : %d => %s' % (
+                            iteration, nwins, pwins, draws, 'ACCEPTED' if accepted else 'REJECTED'))
+
+                if published < self.args.numIters and newExamples >= self.args.get('examplesPerCandidate', self.args.maxlenOfQueue // 10):
+                    published += 1
+                    print('------CANDIDATE %d: %d games, %d examples in buffer, %.0fs------' % (
+                        published, games, len(replayBuffer), time.time() - start))
+                    newExamples = 0
+                    trainExamples = list(replayBuffer)
+                    shuffle(trainExamples)
+                    self.nnet.train(trainExamples)
+                    self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(published))
+                    self.trainExamplesHistory = [trainExamples]
+                    self.saveTrainExamples(published)
+                    candidates.put(published)
+        finally:
+            stop.set()
+            for p in processes:
+                p.join(timeout=60)
+                if p.is_alive():
+                    p.terminate()
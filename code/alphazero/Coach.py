@@ -1,6 +1,7 @@
 from collections import deque
 from Arena import Arena
-from MCTS import MCTS
+from EvalCache import EvalCache
+from MCTS import makeMCTS
 import numpy as np
 from pytorch_classification.utils import Bar, AverageMeter
 import time, os, sys
@@ -16,9 +17,11 @@ class Coach():
     def __init__(self, game, nnet, args):
         self.game = game
         self.nnet = nnet
-        self.pnet = self.nnet.__class__(self.game)  # the competitor network
+        self.pnet = None    # the competitor network, created by learn
         self.args = args
-        self.mcts = MCTS(self.game, self.nnet, self.args)
+        # evaluations of self.nnet, shared by the searches of all episodes
+        self.evalCache = EvalCache(self.game, self.nnet, self.args.get('evalCacheSize', 200000))
+        self.mcts = makeMCTS(self.game, self.evalCache, self.args)
         self.trainExamplesHistory = []    # history of examples from args.numItersForTrainExamplesHistory latest iterations
         self.skipFirstSelfPlay = False # can be overriden in loadTrainExamples()
 
@@ -33,6 +36,11 @@ class Coach():
         It uses a temp=1 if episodeStep < tempThreshold, and thereafter
         uses temp=0.
 
+        With playout cap randomization (args.fullSearchProb < 1), only a
+        fraction fullSearchProb of the moves get a full search with
+        numMCTSSims simulations. The other moves are played after a fast
+        search with numFastSims simulations and are not used as examples.
+
         Returns:
             trainExamples: a list of examples of the form (canonicalBoard,pi,v)
                            pi is the MCTS informed policy vector, v is +1 if
@@ -48,10 +56,13 @@ class Coach():
             canonicalBoard = self.game.getCanonicalForm(board,self.curPlayer)
             temp = int(episodeStep < self.args.tempThreshold)
 
-            pi = self.mcts.getActionProb(canonicalBoard, temp=temp)
-            sym = self.game.getSymmetries(canonicalBoard, pi)
-            for b,p in sym:
-                trainExamples.append([b, self.curPlayer, p, None])
+            fullSearch = np.random.rand() < self.args.get('fullSearchProb', 1)
+            numSims = None if fullSearch else self.args.numFastSims
+            pi = self.mcts.getActionProb(canonicalBoard, temp=temp, numSims=numSims)
+            if fullSearch:
+                sym = self.game.getSymmetries(canonicalBoard, pi)
+                for b,p in sym:
+                    trainExamples.append([b, self.curPlayer, p, None])
 
             action = np.random.choice(len(pi), p=pi)
             board, self.curPlayer = self.game.getNextState(board, self.curPlayer, action)
@@ -69,6 +80,8 @@ class Coach():
         It then pits the new neural network against the old one and accepts it
         only if it wins >= updateThreshold fraction of games.
         """
+        if self.pnet is None:
+            self.pnet = self.nnet.__class__(self.game)
 
         for i in range(1, self.args.numIters+1):
             # bookkeeping
@@ -81,9 +94,12 @@ class Coach():
                 bar = Bar('Self Play', max=self.args.numEps)
                 end = time.time()
     
+                self.evalCache.resetStats()
+                numSims = 0
                 for eps in range(self.args.numEps):
-                    self.mcts = MCTS(self.game, self.nnet, self.args)   # reset search tree
+                    self.mcts = makeMCTS(self.game, self.evalCache, self.args)   # reset search tree
                     iterationTrainExamples += self.executeEpisode()
+                    numSims += self.mcts.numSims
     
                     # bookkeeping + plot progress
                     eps_time.update(time.time() - end)
@@ -92,6 +108,8 @@ class Coach():
                                                                                                                total=bar.elapsed_td, eta=bar.eta_td)
                     bar.next()
                 bar.finish()
+                print(self.evalCache)
+                print('Self play simulations: %d' % numSims)
 
                 # save the iteration examples to the history 
                 self.trainExamplesHistory.append(iterationTrainExamples)
@@ -110,12 +128,14 @@ class Coach():
             shuffle(trainExamples)
 
             # training new network, keeping a copy of the old one
-            self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-            self.pnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-            pmcts = MCTS(self.game, self.pnet, self.args)
+            temp = 'temp' + self.args.get('checkpointExtension', '.pth.tar')
+            self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=temp)
+            self.pnet.load_checkpoint(folder=self.args.checkpoint, filename=temp)
+            pmcts = makeMCTS(self.game, self.pnet, self.args)
             
             self.nnet.train(trainExamples)
-            nmcts = MCTS(self.game, self.nnet, self.args)
+            self.evalCache.invalidate()
+            nmcts = makeMCTS(self.game, self.evalCache, self.args)
 
             print('PITTING AGAINST PREVIOUS VERSION')
             arena = Arena(lambda x: np.argmax(pmcts.getActionProb(x, temp=0)),
@@ -125,14 +145,15 @@ class Coach():
             print('NEW/PREV WINS : %d / %d ; DRAWS : %d' % (nwins, pwins, draws))
             if pwins+nwins > 0 and float(nwins)/(pwins+nwins) < self.args.updateThreshold:
                 print('REJECTING NEW MODEL')
-                self.nnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
+                self.nnet.load_checkpoint(folder=self.args.checkpoint, filename=temp)
+                self.evalCache.invalidate()
             else:
                 print('ACCEPTING NEW MODEL')
                 self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(i))
-                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='best.pth.tar')                
+                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='best' + self.args.get('checkpointExtension', '.pth.tar'))                
 
     def getCheckpointFile(self, iteration):
-        return 'checkpoint_' + str(iteration) + '.pth.tar'
+        return 'checkpoint_' + str(iteration) + self.args.get('checkpointExtension', '.pth.tar')
 
     def saveTrainExamples(self, iteration):
         folder = self.args.checkpoint
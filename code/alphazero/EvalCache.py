@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+
+
+class EvalCache():
+    """
+    A bounded cache of neural network evaluations, placed in front of
+    NNetWrapper.predict. It is meant to be shared by every MCTS that uses the
+    same network (e.g. all self-play episodes of an iteration), so positions
+    seen in earlier games are not evaluated again.
+
+    Positions which are equal up to one of the symmetries returned by
+    game.getSymmetries share a single entry: the key is the symmetric board
+    with the smallest stringRepresentation, and the cached policy is permuted
+    back to the orientation of the queried board.
+
+    The cache does not know when the weights of the network change. Call
+    invalidate() after training or loading a checkpoint.
+
+    A maxSize of 0 disables caching (but still keeps the statistics).
+    """
+
+    def __init__(self, game, nnet, maxSize=200000):
+        self.game = game
+        self.nnet = nnet
+        self.maxSize = maxSize
+        self.entries = OrderedDict()    # canonical key -> (pi, v), LRU order
+        self.lock = threading.Lock()
+        self.resetStats()
+
+    def resetStats(self):
+        self.hits = 0
+        self.misses = 0
+        self.inferenceTime = 0.0
+
+    def invalidate(self):
+        """
+        Drops all cached evaluations. Must be called whenever the weights of
+        the network change.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def canonicalize(self, board):
+        """
+        Returns:
+            key: the stringRepresentation of the canonical symmetric board
+            board: the canonical symmetric board
+            perm: an array such that the policy pi of the canonical board
+                  is the policy of the given board permuted by pi[perm]
+        """
+        identity = np.arange(self.game.getActionSize())
+        best = None
+        for symBoard, symPi in self.game.getSymmetries(board, identity):
+            key = self.game.stringRepresentation(symBoard)
+            if best is None or key < best[0]:
+                best = (key, symBoard, symPi)
+        key, symBoard, symPi = best
+        return key, symBoard, np.asarray(symPi, dtype=np.int64)
+
+    def predict(self, board):
+        """
+        Same as NNetWrapper.predict, but served from the cache when possible.
+        """
+        key, canonicalBoard, perm = self.canonicalize(board)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            start = time.time()
+            entry = self.nnet.predict(canonicalBoard)
+            elapsed = time.time() - start
+            with self.lock:
+                self.misses += 1
+                self.inferenceTime += elapsed
+                self.entries[key] = entry
+                while len(self.entries) > self.maxSize:
+                    self.entries.popitem(last=False)
+
+        canonicalPi, v = entry
+        # canonicalPi[j] is the probability of action perm[j] on board.
+        pi = np.empty_like(canonicalPi)
+        pi[perm] = canonicalPi
+        return pi, v
+
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def savedTime(self):
+        """
+        Estimates the inference time saved by the cache hits, in seconds.
+        """
+        if not self.misses:
+            return 0.0
+        return self.hits * self.inferenceTime / self.misses
+
+    def __str__(self):
+        return 'EvalCache: {size} entries | Hits: {hits}/{total} ({rate:.1%}) | Saved: {saved:.1f}s'.format(
+            size=len(self.entries), hits=self.hits,
+            total=self.hits + self.misses, rate=self.hitRate(),
+            saved=self.savedTime())
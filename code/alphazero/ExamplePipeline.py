@@ -0,0 +1,99 @@
+import time
+import numpy as np
+import tensorflow as tf
+from pytorch_classification.utils import Bar, AverageMeter
+
+
+class ExamplePipeline():
+    """
+    A tf.data input pipeline over training examples, for the tensorflow
+    networks. It must be created inside the graph of the network, which
+    then reads its inputs and targets from the pipeline by default:
+
+        self.input_boards = tf.placeholder_with_default(pipeline.boards, ...)
+
+    Feeding input_boards (as predict does) bypasses the pipeline.
+
+    The examples are copied into the pipeline once per call to train. It
+    shuffles them every epoch, optionally applies a random symmetry to each
+    example (on args.parallel_calls threads), batches them and prefetches
+    the next batches while the current one is trained on.
+
+    Input:
+        symmetry: 'square' for boards which can be rotated and mirrored,
+                  with one action per square plus a pass action last (e.g.
+                  Othello), 'mirror' for boards which can only be mirrored
+                  left/right, with one action per column (e.g. Connect4).
+    """
+
+    def __init__(self, board_x, board_y, action_size, args, symmetry=None):
+        self.example_boards = tf.placeholder(tf.float32, shape=[None, board_x, board_y])
+        self.example_pis = tf.placeholder(tf.float32, shape=[None, action_size])
+        self.example_vs = tf.placeholder(tf.float32, shape=[None])
+        self.epochs = tf.placeholder(tf.int64, shape=[])
+        self.symmetry = symmetry
+
+        dataset = tf.data.Dataset.from_tensor_slices((self.example_boards, self.example_pis, self.example_vs))
+        dataset = dataset.shuffle(tf.cast(tf.shape(self.example_boards)[0], tf.int64)).repeat(self.epochs)
+        if symmetry is not None and args.get('augment', False):
+            dataset = dataset.map(self.augment, num_parallel_calls=args.get('parallel_calls', 4))
+        dataset = dataset.batch(args.batch_size).prefetch(args.get('prefetch', 2))
+        self.iterator = dataset.make_initializable_iterator()
+        self.boards, self.pis, self.vs = self.iterator.get_next()
+
+    def augment(self, board, pi, v):
+        """
+        Applies a random symmetry to the example.
+        """
+        flip = tf.random_uniform([]) < 0.5
+        if self.symmetry == 'mirror':
+            board = tf.cond(flip, lambda: tf.reverse(board, [1]), lambda: board)
+            pi = tf.cond(flip, lambda: tf.reverse(pi, [0]), lambda: pi)
+            return board, pi, v
+
+        k = tf.random_uniform([], 0, 4, dtype=tf.int32)
+        def transform(x):
+            x = tf.image.rot90(x[:, :, tf.newaxis], k)[:, :, 0]
+            return tf.cond(flip, lambda: tf.reverse(x, [1]), lambda: x)
+        pi_board = transform(tf.reshape(pi[:-1], tf.shape(board)))
+        return transform(board), tf.concat([tf.reshape(pi_board, [-1]), pi[-1:]], 0), v
+
+    def train(self, sess, nnet, examples, args):
+        """
+        Trains nnet (whose graph holds this pipeline) on examples for
+        args.epochs epochs. nnet.batch_size must be the number of examples
+        in the current batch, built with the loss, so training adds no ops
+        to the graph.
+
+        Returns:
+            the number of examples trained on per second
+        """
+        boards, pis, vs = list(zip(*examples))
+        sess.run(self.iterator.initializer, feed_dict={
+            self.example_boards: np.asarray(boards, dtype=np.float32),
+            self.example_pis: np.asarray(pis, dtype=np.float32),
+            self.example_vs: np.asarray(vs, dtype=np.float32),
+            self.epochs: args.epochs})
+        del boards, pis, vs
+
+        batches = -(-len(examples) // args.batch_size)
+        pi_losses = AverageMeter()
+        v_losses = AverageMeter()
+        start = time.time()
+        bar = Bar('Training Net', max=batches*args.epochs)
+        fetches = [nnet.train_step, nnet.loss_pi, nnet.loss_v, nnet.batch_size]
+        trained = 0
+        while True:
+            try:
+                _, pi_loss, v_loss, size = sess.run(fetches, feed_dict={nnet.dropout: args.dropout, nnet.isTraining: True})
+            except tf.errors.OutOfRangeError:
+                break
+            pi_losses.update(pi_loss, size)
+            v_losses.update(v_loss, size)
+            trained += size
+            bar.suffix = '({batch}/{size}) Total: {total:} | ETA: {eta:} | Loss_pi: {lpi:.4f} | Loss_v: {lv:.3f}'.format(
+                        batch=bar.index+1, size=bar.max, total=bar.elapsed_td,
+                        eta=bar.eta_td, lpi=pi_losses.avg, lv=v_losses.avg)
+            bar.next()
+        bar.finish()
+        return trained / (time.time() - start)
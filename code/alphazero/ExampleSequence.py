@@ -0,0 +1,50 @@
+import threading
+import numpy as np
+from keras.utils import Sequence
+
+
+class ExampleSequence(Sequence):
+    """
+    Streams shuffled batches of training examples to keras, for use with
+    model.fit_generator. Only the batches being built are copied into numpy
+    arrays, so memory does not grow with the number of examples (unlike
+    calling np.asarray on all of them).
+
+    Batches are built independently, so fit_generator can prefetch them on
+    several worker threads.
+
+    Input:
+        examples: a list of examples, each of the form (board, pi, v). It is
+                  read, never copied.
+        batch_size: the number of examples per batch. The last batch may be
+                    smaller.
+        seed: seeds the order of the examples, which is reshuffled after
+              every epoch.
+    """
+
+    def __init__(self, examples, batch_size, seed=None):
+        self.examples = examples
+        self.batch_size = batch_size
+        self.rng = np.random.RandomState(seed)
+        self.order = self.rng.permutation(len(examples))
+        self.lock = threading.Lock()
+        board, pi, _ = examples[0]
+        self.board_shape = np.shape(board)
+        self.action_size = len(pi)
+
+    def __len__(self):
+        return (len(self.examples) + self.batch_size - 1) // self.batch_size
+
+    def __getitem__(self, idx):
+        with self.lock:
+            ids = self.order[idx*self.batch_size:(idx+1)*self.batch_size]
+        boards = np.empty((len(ids),) + self.board_shape, dtype=np.float32)
+        pis = np.empty((len(ids), self.action_size), dtype=np.float32)
+        vs = np.empty(len(ids), dtype=np.float32)
+        for i, example in enumerate(ids):
+            boards[i], pis[i], vs[i] = self.examples[example]
+        return boards, [pis, vs]
+
+    def on_epoch_end(self):
+        with self.lock:
+            self.order = self.rng.permutation(len(self.examples))
@@ -0,0 +1,116 @@
+"""
+A flat checkpoint format for network weights, which is memory-mapped
+read-only when loaded, so all the processes loading the same checkpoint
+share its pages through the OS page cache instead of each holding a copy.
+
+Layout of a file:
+
+    MAGIC
+    header length (8 bytes, little endian)
+    header: JSON with the content hash and, for every tensor, its name,
+            dtype, shape and offset in the data
+    data: the tensors, C-contiguous, each aligned to ALIGNMENT bytes
+
+The content hash is the sha256 of the names, dtypes, shapes and data of
+the tensors. readHash reads only the header, so workers can cheaply check
+whether a checkpoint changed.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+
+EXTENSION = '.flat'
+MAGIC = b'AZFLAT1\n'
+ALIGNMENT = 64
+
+
+def contentHash(arrays):
+    """
+    Returns the content hash of arrays, a mapping from names to numpy arrays.
+    """
+    digest = hashlib.sha256()
+    for name, a in arrays.items():
+        digest.update(json.dumps([name, a.dtype.str, list(a.shape)]).encode())
+        digest.update(a.tobytes())
+    return digest.hexdigest()
+
+
+def save(path, arrays):
+    """
+    Saves arrays, a mapping from names to numpy arrays, to path. The file is
+    written next to path and then renamed, so readers never see a partial
+    file, and processes which mapped the previous file keep its contents.
+
+    Returns:
+        the content hash of the file
+    """
+    arrays = OrderedDict((name, np.asarray(a, order='C')) for name, a in arrays.items())
+    tensors = []
+    offset = 0
+    for name, a in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        tensors.append({'name': name, 'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset})
+        offset += a.nbytes
+    digest = contentHash(arrays)
+    header = json.dumps({'hash': digest, 'tensors': tensors}).encode()
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+    header += b' ' * (start - len(MAGIC) - 8 - len(header))
+
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for tensor, a in zip(tensors, arrays.values()):
+            f.seek(start + tensor['offset'])
+            f.write(a.tobytes())
+        f.truncate(start + offset)
+    os.replace(temp, path)
+    return digest
+
+
+def readHeader(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a flat checkpoint: {}'.format(f.name))
+    length, = struct.unpack('<Q', f.read(8))
+    return json.loads(f.read(length).decode()), len(MAGIC) + 8 + length
+
+
+def readHash(path):
+    """
+    Returns the content hash of the checkpoint at path, reading only its
+    header.
+    """
+    with open(path, 'rb') as f:
+        return readHeader(f)[0]['hash']
+
+
+def load(path, verify=False):
+    """
+    Maps the checkpoint at path read-only. Nothing is read until the arrays
+    are used. If verify, the content hash is checked (which reads every
+    page) and a ValueError is raised on a mismatch.
+
+    Returns:
+        arrays: an OrderedDict from names to read-only numpy arrays, in the
+                order they were saved
+        contentHash: the content hash of the checkpoint
+    """
+    with open(path, 'rb') as f:
+        header, start = readHeader(f)
+    arrays = OrderedDict()
+    if header['tensors']:
+        data = np.memmap(path, dtype=np.uint8, mode='r', offset=start)
+        for tensor in header['tensors']:
+            dtype = np.dtype(tensor['dtype'])
+            count = int(np.prod(tensor['shape'], dtype=np.int64))
+            a = data[tensor['offset']:tensor['offset'] + count*dtype.itemsize].view(dtype)
+            arrays[tensor['name']] = a.reshape(tensor['shape'])
+
+    if verify and contentHash(arrays) != header['hash']:
+        raise ValueError('Corrupted flat checkpoint: {}'.format(path))
+    return arrays, header['hash']
@@ -1,5 +1,8 @@
 import math
+import threading
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 EPS = 1e-8
 
 class MCTS():
@@ -19,31 +22,34 @@ class MCTS():
         self.Es = {}        # stores game.getGameEnded ended for board s
         self.Vs = {}        # stores game.getValidMoves for board s
 
-    def getActionProb(self, canonicalBoard, temp=1):
+        self.numSims = 0    # simulations run by getActionProb so far
+
+    def getActionProb(self, canonicalBoard, temp=1, numSims=None):
         """
-        This function performs numMCTSSims simulations of MCTS starting from
-        canonicalBoard.
+        This function performs numSims (by default numMCTSSims) simulations
+        of MCTS starting from canonicalBoard. It may stop earlier, see
+        SearchController.
 
         Returns:
             probs: a policy vector where the probability of the ith action is
                    proportional to Nsa[(s,a)]**(1./temp)
         """
-        for i in range(self.args.numMCTSSims):
+        controller = SearchController(self.args, temp, numSims, lambda: self.rootCounts(canonicalBoard))
+        while controller.startSimulation():
             self.search(canonicalBoard)
+            controller.finishSimulation()
+        self.numSims += controller.started
 
-        s = self.game.stringRepresentation(canonicalBoard)
-        counts = [self.Nsa[(s,a)] if (s,a) in self.Nsa else 0 for a in range(self.game.getActionSize())]
-
-        if temp==0:
-            bestA = np.argmax(counts)
-            probs = [0]*len(counts)
-            probs[bestA]=1
-            return probs
-
-        counts = [x**(1./temp) for x in counts]
-        probs = [x/float(sum(counts)) for x in counts]
-        return probs
+        return countsToProbs(self.rootCounts(canonicalBoard), temp)
 
+    def rootCounts(self, canonicalBoard):
+        """
+        Returns:
+            counts: the visit count Nsa[(s,a)] of every action a at
+                    canonicalBoard
+        """
+        s = self.game.stringRepresentation(canonicalBoard)
+        return [self.Nsa[(s,a)] if (s,a) in self.Nsa else 0 for a in range(self.game.getActionSize())]
 
     def search(self, canonicalBoard):
         """
@@ -75,25 +81,48 @@ class MCTS():
 
         if s not in self.Ps:
             # leaf node
-            self.Ps[s], v = self.nnet.predict(canonicalBoard)
-            valids = self.game.getValidMoves(canonicalBoard, 1)
-            self.Ps[s] = self.Ps[s]*valids      # masking invalid moves
-            sum_Ps_s = np.sum(self.Ps[s])
-            if sum_Ps_s > 0:
-                self.Ps[s] /= sum_Ps_s    # renormalize
-            else:
-                # if all valid moves were masked make all valid moves equally probable
-                
-                # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
-                # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.   
-                print("All valid moves were masked, do workaround.")
-                self.Ps[s] = self.Ps[s] + valids
-                self.Ps[s] /= np.sum(self.Ps[s])
-
-            self.Vs[s] = valids
-            self.Ns[s] = 0
-            return -v
+            return -self.expand(canonicalBoard, s)
+
+        a = self.selectAction(s)
+        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)
+        next_s = self.game.getCanonicalForm(next_s, next_player)
 
+        v = self.search(next_s)
+
+        self.backup(s, a, v)
+        return -v
+
+    def expand(self, canonicalBoard, s):
+        """
+        Evaluates the leaf canonicalBoard with the neural network and adds it
+        to the tree.
+
+        Returns:
+            v: the value of canonicalBoard predicted by the neural network
+        """
+        self.Ps[s], v = self.nnet.predict(canonicalBoard)
+        valids = self.game.getValidMoves(canonicalBoard, 1)
+        self.Ps[s] = self.Ps[s]*valids      # masking invalid moves
+        sum_Ps_s = np.sum(self.Ps[s])
+        if sum_Ps_s > 0:
+            self.Ps[s] /= sum_Ps_s    # renormalize
+        else:
+            # if all valid moves were masked make all valid moves equally probable
+            
+            # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
+            # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.   
+            print("All valid moves were masked, do workaround.")
+            self.Ps[s] = self.Ps[s] + valids
+            self.Ps[s] /= np.sum(self.Ps[s])
+
+        self.Vs[s] = valids
+        self.Ns[s] = 0
+        return v
+
+    def selectAction(self, s):
+        """
+        Returns the action with the highest upper confidence bound at s.
+        """
         valids = self.Vs[s]
         cur_best = -float('inf')
         best_act = -1
@@ -110,12 +139,12 @@ class MCTS():
                     cur_best = u
                     best_act = a
 
-        a = best_act
-        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)
-        next_s = self.game.getCanonicalForm(next_s, next_player)
-
-        v = self.search(next_s)
+        return best_act
 
+    def backup(self, s, a, v):
+        """
+        Updates the statistics of edge (s,a) with the value v of its child.
+        """
         if (s,a) in self.Qsa:
             self.Qsa[(s,a)] = (self.Nsa[(s,a)]*self.Qsa[(s,a)] + v)/(self.Nsa[(s,a)]+1)
             self.Nsa[(s,a)] += 1
@@ -125,4 +154,271 @@ class MCTS():
             self.Nsa[(s,a)] = 1
 
         self.Ns[s] += 1
+
+
+class SearchController():
+    """
+    Decides when getActionProb stops running simulations. It stops after
+    numSims simulations, or earlier:
+    - once args.moveTime seconds (if set) have passed since the search
+      started, as long as one root action has been visited.
+    - if temp is 0 and args.earlyStop (default True), once the most visited
+      root action cannot be overtaken by the simulations which are left,
+      counting those which started on other threads but haven't been backed
+      up yet. Since only the best action matters with temp 0, the probs are
+      the same as with all the simulations.
+
+    Thread safe, so several threads can run the simulations of one search.
+    """
+
+    def __init__(self, args, temp, numSims, rootCounts):
+        self.numSims = numSims if numSims is not None else args.numMCTSSims
+        self.deadline = time.time() + args.moveTime if args.get('moveTime') else None
+        self.earlyStop = temp == 0 and args.get('earlyStop', True)
+        self.rootCounts = rootCounts
+        self.started = 0
+        self.finished = 0
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def startSimulation(self):
+        """
+        Returns True (and counts the simulation as started) if another
+        simulation should be run.
+        """
+        with self.lock:
+            if not self.stopped and self.shouldStop():
+                self.stopped = True
+            if self.stopped:
+                return False
+            self.started += 1
+            return True
+
+    def finishSimulation(self):
+        """
+        Counts a started simulation as backed up.
+        """
+        with self.lock:
+            self.finished += 1
+
+    def shouldStop(self):
+        if self.numSims - self.started <= 0:
+            return True
+        if self.deadline is not None and time.time() >= self.deadline and sum(self.rootCounts()) > 0:
+            return True
+        if self.earlyStop:
+            # Simulations in flight are not in the counts yet, and may all
+            # still go to the runner-up.
+            remaining = self.numSims - self.finished
+            counts = sorted(self.rootCounts())
+            if len(counts) > 1 and counts[-1] - counts[-2] > remaining:
+                return True
+        return False
+
+
+def countsToProbs(counts, temp):
+    """
+    Returns:
+        probs: a policy vector where the probability of the ith action is
+               proportional to counts[i]**(1./temp)
+    """
+    if temp==0:
+        bestA = np.argmax(counts)
+        probs = [0]*len(counts)
+        probs[bestA]=1
+        return probs
+
+    counts = [x**(1./temp) for x in counts]
+    probs = [x/float(sum(counts)) for x in counts]
+    return probs
+
+
+def makeMCTS(game, nnet, args):
+    """
+    Returns the MCTS selected by args: a single threaded MCTS unless
+    args.numThreads > 1, in which case args.parallelMode picks between
+    'tree' (TreeParallelMCTS, the default) and 'root' (RootParallelMCTS).
+    """
+    if args.get('numThreads', 1) <= 1:
+        return MCTS(game, nnet, args)
+    if args.get('parallelMode', 'tree') == 'root':
+        return RootParallelMCTS(game, nnet, args)
+    return TreeParallelMCTS(game, nnet, args)
+
+
+class TreeParallelMCTS(MCTS):
+    """
+    Runs the simulations of getActionProb on args.numThreads threads which
+    share a single tree. Each node has its own lock, which is only held while
+    reading or updating the node (never during the recursive search), and
+    the same leaf is never evaluated twice.
+
+    To keep the threads from all following the same path, every in-flight
+    simulation counts as args.virtualLoss (default 1) lost visits of the
+    edges it went through until its result is backed up.
+
+    This only reduces latency if nnet.predict releases the GIL, which is the
+    case for the pytorch and tensorflow networks.
+    """
+
+    def __init__(self, game, nnet, args):
+        super().__init__(game, nnet, args)
+        self.numThreads = args.numThreads
+        self.virtualLoss = args.get('virtualLoss', 1)
+        self.VLsa = {}      # stores #simulations in flight through edge s,a
+        self.VLs = {}       # stores #simulations in flight through board s
+        self.locks = {}     # stores the lock of board s
+        self.locksLock = threading.Lock()
+        self.executor = None
+
+    def lock(self, s):
+        lock = self.locks.get(s)
+        if lock is None:
+            with self.locksLock:
+                lock = self.locks.setdefault(s, threading.Lock())
+        return lock
+
+    def getActionProb(self, canonicalBoard, temp=1, numSims=None):
+        """
+        Same as MCTS.getActionProb, with the simulations spread over
+        numThreads threads.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.numThreads)
+        controller = SearchController(self.args, temp, numSims, lambda: self.rootCounts(canonicalBoard))
+
+        def simulate():
+            while controller.startSimulation():
+                self.search(canonicalBoard)
+                controller.finishSimulation()
+
+        workers = [self.executor.submit(simulate) for _ in range(self.numThreads)]
+        for worker in workers:
+            worker.result()
+        self.numSims += controller.started
+        return countsToProbs(self.rootCounts(canonicalBoard), temp)
+
+    def search(self, canonicalBoard):
+        s = self.game.stringRepresentation(canonicalBoard)
+
+        with self.lock(s):
+            if s not in self.Es:
+                self.Es[s] = self.game.getGameEnded(canonicalBoard, 1)
+            if self.Es[s]!=0:
+                # terminal node
+                return -self.Es[s]
+
+            if s not in self.Ps:
+                # leaf node
+                return -self.expand(canonicalBoard, s)
+
+            a = self.selectAction(s)
+            self.VLsa[(s,a)] = self.VLsa.get((s,a), 0) + 1
+            self.VLs[s] = self.VLs.get(s, 0) + 1
+
+        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)
+        next_s = self.game.getCanonicalForm(next_s, next_player)
+
+        try:
+            v = self.search(next_s)
+        finally:
+            with self.lock(s):
+                self.VLsa[(s,a)] -= 1
+                self.VLs[s] -= 1
+        with self.lock(s):
+            self.backup(s, a, v)
         return -v
+
+    def selectAction(self, s):
+        """
+        Same as MCTS.selectAction, counting the simulations in flight as
+        lost visits.
+        """
+        valids = self.Vs[s]
+        cur_best = -float('inf')
+        best_act = -1
+        Ns = self.Ns[s] + self.virtualLoss*self.VLs.get(s, 0)
+
+        for a in range(self.game.getActionSize()):
+            if valids[a]:
+                lost = self.virtualLoss*self.VLsa.get((s,a), 0)
+                if (s,a) in self.Qsa or lost:
+                    Nsa = self.Nsa.get((s,a), 0)
+                    n = Nsa + lost
+                    q = (Nsa*self.Qsa.get((s,a), 0) - lost)/n
+                    u = q + self.args.cpuct*self.Ps[s][a]*math.sqrt(Ns)/(1+n)
+                else:
+                    u = self.args.cpuct*self.Ps[s][a]*math.sqrt(Ns + EPS)
+
+                if u > cur_best:
+                    cur_best = u
+                    best_act = a
+
+        return best_act
+
+
+class RootParallelMCTS():
+    """
+    Runs args.numThreads independent MCTS trees on their own threads, which
+    share the simulations of each search, and merges them by summing the
+    visit counts of the root actions.
+
+    With a deterministic network all trees would be identical, so all trees
+    but the first mix Dirichlet noise (args.dirichletAlpha, default 0.3)
+    into the priors of the root, with weight args.rootNoise (default 0.25).
+    """
+
+    def __init__(self, game, nnet, args):
+        self.game = game
+        self.args = args
+        self.numThreads = args.numThreads
+        self.trees = [MCTS(game, nnet, args) for _ in range(self.numThreads)]
+        self.rngs = [np.random.RandomState(i) for i in range(self.numThreads)]
+        self.noised = [set() for _ in range(self.numThreads)]
+        self.executor = None
+        self.numSims = 0
+
+    def addRootNoise(self, i, canonicalBoard):
+        tree = self.trees[i]
+        s = self.game.stringRepresentation(canonicalBoard)
+        if i == 0 or s in self.noised[i] or s not in tree.Ps:
+            return
+        self.noised[i].add(s)
+        valids = tree.Vs[s]
+        noise = self.rngs[i].dirichlet([self.args.get('dirichletAlpha', 0.3)]*len(valids))*valids
+        if np.sum(noise) > 0:
+            noise /= np.sum(noise)
+            weight = self.args.get('rootNoise', 0.25)
+            tree.Ps[s] = (1-weight)*tree.Ps[s] + weight*noise
+
+    def getActionProb(self, canonicalBoard, temp=1, numSims=None):
+        """
+        Same as MCTS.getActionProb, with the probabilities computed from the
+        merged visit counts.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.numThreads)
+        controller = SearchController(self.args, temp, numSims, lambda: self.rootCounts(canonicalBoard))
+
+        def simulate(i):
+            first = True
+            while controller.startSimulation():
+                self.trees[i].search(canonicalBoard)
+                controller.finishSimulation()
+                if first:
+                    self.addRootNoise(i, canonicalBoard)
+                    first = False
+
+        workers = [self.executor.submit(simulate, i) for i in range(self.numThreads)]
+        for worker in workers:
+            worker.result()
+        self.numSims += controller.started
+        return countsToProbs(self.rootCounts(canonicalBoard), temp)
+
+    def rootCounts(self, canonicalBoard):
+        """
+        Returns:
+            counts: the visit counts of the root actions, summed over all
+                    trees
+        """
+        return list(np.sum([tree.rootCounts(canonicalBoard) for tree in self.trees], axis=0))
@@ -19,6 +19,10 @@ args = dotdict({
     'epochs': 10,
     'batch_size': 64,
     'num_channels': 512,
+    'tf_data': True,        # read batches through the tf.data pipeline (ExamplePipeline)
+    'augment': False,       # apply a random symmetry to every example
+    'parallel_calls': 4,    # threads augmenting examples
+    'prefetch': 2,          # batches prepared ahead of training
 })
 
 
@@ -32,6 +36,7 @@ class NNetWrapper(NeuralNet):
 
         self.sess = tf.Session(graph=self.nnet.graph)
         self.saver = None
+        self.predict_fn = None
         with tf.Session() as temp_sess:
             temp_sess.run(tf.global_variables_initializer())
         self.sess.run(tf.variables_initializer(self.nnet.graph.get_collection('variables')))
@@ -40,6 +45,10 @@ class NNetWrapper(NeuralNet):
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if args.tf_data:
+            examples_per_sec = self.nnet.examples.train(self.sess, self.nnet, examples, args)
+            print('Trained on {:.0f} examples/sec'.format(examples_per_sec))
+            return
 
         for epoch in range(args.epochs):
             print('EPOCH ::: ' + str(epoch + 1))
@@ -100,11 +109,31 @@ class NNetWrapper(NeuralNet):
         board = board[np.newaxis, :, :]
 
         # run
-        prob, v = self.sess.run([self.nnet.prob, self.nnet.v], feed_dict={self.nnet.input_boards: board, self.nnet.dropout: 0, self.nnet.isTraining: False})
+        prob, v = self.get_predict_fn()(board, 0, False)
 
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return prob[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: np array of boards, batch_size x board_x x board_y
+
+        Returns:
+            probs: batch_size x action_size policies
+            vs: batch_size x 1 values
+        """
+        return self.get_predict_fn()(boards, 0, False)
+
+    def get_predict_fn(self):
+        """
+        Returns a callable running the prediction graph in self.sess. Unlike
+        sess.run with a feed_dict, the fetches and feeds are only resolved
+        once.
+        """
+        if self.predict_fn is None:
+            self.predict_fn = self.sess.make_callable([self.nnet.prob, self.nnet.v], feed_list=[self.nnet.input_boards, self.nnet.dropout, self.nnet.isTraining])
+        return self.predict_fn
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         filepath = os.path.join(folder, filename)
         if not os.path.exists(folder):
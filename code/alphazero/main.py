@@ -1,3 +1,4 @@
+from AsyncCoach import AsyncCoach
 from Coach import Coach
 from othello.OthelloGame import OthelloGame as Game
 from othello.pytorch.NNet import NNetWrapper as nn
@@ -12,6 +13,18 @@ args = dotdict({
     'numMCTSSims': 25,
     'arenaCompare': 40,
     'cpuct': 1,
+    'evalCacheSize': 200000,
+    'numThreads': 1,            # > 1 searches on several threads, see MCTS.makeMCTS
+    'parallelMode': 'tree',
+    'moveTime': None,           # seconds per move, None for no limit
+    'earlyStop': True,          # stop greedy searches once the best move is decided
+    'fullSearchProb': 1,        # < 1 enables playout cap randomization ...
+    'numFastSims': 5,           # ... with this many simulations for fast searches
+    'asyncPipeline': False,     # self-play, training and evaluation in parallel, see AsyncCoach
+    'numSelfPlayWorkers': 4,
+    'replayBufferSize': 200000,
+    'examplesPerCandidate': 20000,
+    'checkpointExtension': '.pth.tar',  # or '.flat' for memory-mapped checkpoints, shared by the AsyncCoach workers
 
     'checkpoint': './temp/',
     'load_model': False,
@@ -27,7 +40,7 @@ if __name__=="__main__":
     if args.load_model:
         nnet.load_checkpoint(args.load_folder_file[0], args.load_folder_file[1])
 
-    c = Coach(g, nnet, args)
+    c = AsyncCoach(g, nnet, args) if args.asyncPipeline else Coach(g, nnet, args)
     if args.load_model:
         print("Load trainExamples from file")
         c.loadTrainExamples()
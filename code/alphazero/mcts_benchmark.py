@@ -0,0 +1,87 @@
+"""
+Measures the latency per move of the multi-threaded MCTS modes on Othello 8x8.
+
+    python mcts_benchmark.py --threads 1 2 4 8 16 --sims 200
+
+By default the network is simulated: it returns a uniform policy after
+sleeping for --latency milliseconds (releasing the GIL, like the pytorch
+network does). Pass --checkpoint folder file to use a trained pytorch model
+instead.
+"""
+
+import argparse
+import time
+import numpy as np
+
+from MCTS import makeMCTS
+from othello.OthelloGame import OthelloGame
+from utils import dotdict
+
+
+class SimulatedNNet():
+    def __init__(self, game, latency):
+        self.actionSize = game.getActionSize()
+        self.latency = latency
+
+    def predict(self, board):
+        time.sleep(self.latency)
+        return np.ones(self.actionSize) / self.actionSize, 0.0
+
+
+def positions(game, count, seed):
+    """
+    Returns count canonical boards from random games.
+    """
+    rng = np.random.RandomState(seed)
+    boards = []
+    while len(boards) < count:
+        board, player = game.getInitBoard(), 1
+        while game.getGameEnded(board, player) == 0 and len(boards) < count:
+            canonicalBoard = game.getCanonicalForm(board, player)
+            boards.append(canonicalBoard)
+            valids = np.flatnonzero(game.getValidMoves(canonicalBoard, 1))
+            board, player = game.getNextState(board, player, rng.choice(valids))
+    return boards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--modes', nargs='+', default=['tree', 'root'], choices=['tree', 'root'])
+    parser.add_argument('--sims', type=int, default=200, help='Simulations per move.')
+    parser.add_argument('--moves', type=int, default=10, help='Moves measured per configuration.')
+    parser.add_argument('--latency', type=float, default=1.0, help='Simulated inference time, in milliseconds.')
+    parser.add_argument('--checkpoint', nargs=2, default=None, metavar=('FOLDER', 'FILE'))
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    game = OthelloGame(8)
+    if options.checkpoint:
+        from othello.pytorch.NNet import NNetWrapper
+        nnet = NNetWrapper(game)
+        nnet.load_checkpoint(*options.checkpoint)
+    else:
+        nnet = SimulatedNNet(game, options.latency / 1000.)
+    boards = positions(game, options.moves, options.seed)
+
+    print('{:>6} {:>8} {:>10} {:>10} {:>10}'.format('mode', 'threads', 'mean ms', 'p50 ms', 'p90 ms'))
+    for mode in options.modes:
+        for threads in options.threads:
+            if threads == 1 and mode != options.modes[0]:
+                continue    # both modes are the plain MCTS
+            args = dotdict({'numMCTSSims': options.sims, 'cpuct': 1.0,
+                            'numThreads': threads, 'parallelMode': mode})
+            latencies = []
+            for board in boards:
+                # a fresh tree per move, as in a game against a new opponent
+                mcts = makeMCTS(game, nnet, args)
+                start = time.time()
+                mcts.getActionProb(board, temp=0)
+                latencies.append(1000 * (time.time() - start))
+            print('{:>6} {:>8} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+                mode if threads > 1 else '-', threads, np.mean(latencies),
+                np.percentile(latencies, 50), np.percentile(latencies, 90)))
+
+
+if __name__ == "__main__":
+    main()
@@ -82,7 +82,7 @@ class OthelloGame(Game):
 
     def stringRepresentation(self, board):
         # 8x8 numpy array (canonical board)
-        return board.tostring()
+        return board.tobytes()
 
     def getScore(self, board, player):
         b = Board(self.n)
@@ -0,0 +1,144 @@
+"""
+Data parallel training of OthelloNNet on CPUs with torch.distributed (gloo).
+
+On one machine, NNetWrapper.train uses this when args.world_size > 1. To
+train across several hosts, start one process per host (or several) with:
+
+    python -m othello.pytorch.DistributedNNet --rank R --world_size N \
+        --init_method tcp://HOST0:29500 --examples FILE.examples \
+        --load FOLDER FILE --save FOLDER FILE --board_size 6
+
+where FILE.examples is the file written by Coach.saveTrainExamples. Every
+process reads it and trains on its own shard; rank 0 saves the result.
+"""
+
+import argparse
+import os
+import pickle
+import socket
+import time
+import numpy as np
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.optim as optim
+from torch.nn.parallel import DistributedDataParallel
+
+from .OthelloNNet import OthelloNNet as onnet
+
+
+def shard(examples, rank, world_size):
+    """
+    Returns the examples trained on by the given rank.
+    """
+    return examples[rank::world_size]
+
+
+def train_shard(rank, world_size, init_method, game, args, state_dict, examples, num_examples, checkpoint):
+    """
+    Trains a copy of the network with weights state_dict on this rank's
+    examples. Gradients are averaged over all ranks after every batch, so
+    all copies stay identical. Each rank trains on batch_size / world_size
+    examples per step, so a step covers args.batch_size examples overall,
+    as in NNetWrapper.train, and every rank runs the same number of steps.
+    Rank 0 saves the weights to checkpoint (a file path).
+
+    Batch norm statistics are not synchronized (SyncBatchNorm needs CUDA);
+    the ones of rank 0 are kept.
+    """
+    dist.init_process_group('gloo', init_method=init_method, rank=rank, world_size=world_size)
+    torch.set_num_threads(args.get('threads_per_worker') or max(1, (os.cpu_count() or 1) // world_size))
+    nnet = onnet(game, args)
+    nnet.load_state_dict(state_dict)
+    model = DistributedDataParallel(nnet)
+    optimizer = optim.Adam(model.parameters())
+    batch_size = max(1, args.batch_size // world_size)
+    steps = int(num_examples / args.batch_size)
+    rng = np.random.RandomState(rank)
+
+    boards = torch.FloatTensor(np.array([board for board, _, _ in examples]).astype(np.float32))
+    pis = torch.FloatTensor(np.array([pi for _, pi, _ in examples]).astype(np.float32))
+    vs = torch.FloatTensor(np.array([v for _, _, v in examples]).astype(np.float32))
+
+    start = time.time()
+    for epoch in range(args.epochs):
+        model.train()
+        for step in range(steps):
+            ids = torch.from_numpy(rng.randint(len(examples), size=batch_size))
+            out_pi, out_v = model(boards[ids])
+            l_pi = -torch.sum(pis[ids]*out_pi)/batch_size
+            l_v = torch.sum((vs[ids]-out_v.view(-1))**2)/batch_size
+            optimizer.zero_grad()
+            (l_pi + l_v).backward()
+            optimizer.step()
+        if rank == 0:
+            print('EPOCH ::: {} Loss_pi: {:.4f} | Loss_v: {:.3f} | {:.1f}s'.format(epoch+1, l_pi.item(), l_v.item(), time.time() - start))
+
+    if rank == 0:
+        torch.save({'state_dict': nnet.state_dict()}, checkpoint)
+    dist.barrier()
+    dist.destroy_process_group()
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def train(nnet, game, examples, args, world_size, checkpoint):
+    """
+    Trains nnet (an OthelloNNet) on examples with world_size processes on
+    this machine, and loads the trained weights back into it.
+
+    Returns:
+        the number of examples trained on per second
+    """
+    init_method = 'tcp://127.0.0.1:{}'.format(free_port())
+    state_dict = {k: v.cpu() for k, v in nnet.state_dict().items()}
+    context = mp.get_context('spawn')
+    start = time.time()
+    processes = [context.Process(target=train_shard, args=(rank, world_size, init_method, game, args, state_dict,
+                                                           shard(examples, rank, world_size), len(examples), checkpoint))
+                 for rank in range(world_size)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    if any(p.exitcode != 0 for p in processes):
+        raise RuntimeError('Distributed training failed, exit codes: {}'.format([p.exitcode for p in processes]))
+    elapsed = time.time() - start
+    nnet.load_state_dict(torch.load(checkpoint)['state_dict'])
+    return args.epochs * int(len(examples) / args.batch_size) * args.batch_size / elapsed
+
+
+def main():
+    from othello.OthelloGame import OthelloGame
+    from .NNet import args
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rank', type=int, required=True)
+    parser.add_argument('--world_size', type=int, required=True)
+    parser.add_argument('--init_method', required=True)
+    parser.add_argument('--examples', required=True)
+    parser.add_argument('--board_size', type=int, default=6)
+    parser.add_argument('--load', nargs=2, default=None, metavar=('FOLDER', 'FILE'))
+    parser.add_argument('--save', nargs=2, required=True, metavar=('FOLDER', 'FILE'))
+    options = parser.parse_args()
+
+    game = OthelloGame(options.board_size)
+    nnet = onnet(game, args)
+    if options.load:
+        nnet.load_state_dict(torch.load(os.path.join(*options.load), map_location='cpu')['state_dict'])
+    with open(options.examples, 'rb') as f:
+        history = pickle.load(f)
+    examples = [example for iteration in history for example in iteration]
+    if options.rank == 0 and not os.path.exists(options.save[0]):
+        os.makedirs(options.save[0])
+    train_shard(options.rank, options.world_size, options.init_method, game, args, nnet.state_dict(),
+                shard(examples, options.rank, options.world_size), len(examples), os.path.join(*options.save))
+
+
+if __name__ == "__main__":
+    main()
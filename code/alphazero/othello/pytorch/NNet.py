@@ -6,10 +6,13 @@ import random
 import numpy as np
 import math
 import sys
+import threading
+import warnings
 sys.path.append('../../')
 from utils import *
 from pytorch_classification.utils import Bar, AverageMeter
 from NeuralNet import NeuralNet
+import FlatCheckpoint
 
 import argparse
 import torch
@@ -20,6 +23,8 @@ from torchvision import datasets, transforms
 from torch.autograd import Variable
 
 from .OthelloNNet import OthelloNNet as onnet
+from . import OthelloInferenceNNet
+from . import DistributedNNet
 
 args = dotdict({
     'lr': 0.001,
@@ -28,10 +33,15 @@ args = dotdict({
     'batch_size': 64,
     'cuda': torch.cuda.is_available(),
     'num_channels': 512,
+    'inference': 'eager',   # or 'script' or 'quantized', see NNetWrapper.set_inference
+    'world_size': 1,        # training processes, see DistributedNNet
+    'threads_per_worker': None,
+    'distributed_checkpoint': os.path.join('temp', 'distributed.pth.tar'),
 })
 
 class NNetWrapper(NeuralNet):
     def __init__(self, game):
+        self.game = game
         self.nnet = onnet(game, args)
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
@@ -39,10 +49,48 @@ class NNetWrapper(NeuralNet):
         if args.cuda:
             self.nnet.cuda()
 
+        self.set_inference(args.inference)
+        self.local = threading.local()  # per thread input buffers of predict
+        self.shared_weights = False     # see load_checkpoint
+        self.checkpoint_hash = None     # of the loaded or saved flat checkpoint
+
+    def set_inference(self, mode):
+        """
+        Selects how predict evaluates boards. 'eager' runs OthelloNNet as is.
+        'script' runs a TorchScript export on the CPU, with the batch norms
+        folded into the layers before them. 'quantized' also quantizes the
+        linear layers to int8. The export is validated against the eager
+        model when it is first used, and again after the weights change.
+        """
+        if mode not in ('eager', 'script', 'quantized'):
+            raise ValueError('Unknown inference mode: {}'.format(mode))
+        self.inference = mode
+        self.inference_model = None
+
+    def get_inference_model(self):
+        if self.inference_model is None:
+            self.inference_model = OthelloInferenceNNet.export(self.nnet, quantize=self.inference == 'quantized')
+        return self.inference_model
+
     def train(self, examples):
         """
         examples: list of examples, each example is of form (board, pi, v)
+
+        With args.world_size > 1, trains with that many data parallel
+        processes on the CPU instead (see DistributedNNet).
         """
+        self.unshare_weights()
+        self.checkpoint_hash = None
+
+        if args.world_size > 1:
+            folder = os.path.dirname(args.distributed_checkpoint)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            rate = DistributedNNet.train(self.nnet, self.game, examples, args, args.world_size, args.distributed_checkpoint)
+            print('Trained on {:.0f} examples/s with {} processes'.format(rate, args.world_size))
+            self.inference_model = None     # the weights changed
+            return
+
         optimizer = optim.Adam(self.nnet.parameters())
 
         for epoch in range(args.epochs):
@@ -79,8 +127,8 @@ class NNetWrapper(NeuralNet):
                 total_loss = l_pi + l_v
 
                 # record loss
-                pi_losses.update(l_pi.data[0], boards.size(0))
-                v_losses.update(l_v.data[0], boards.size(0))
+                pi_losses.update(l_pi.item(), boards.size(0))
+                v_losses.update(l_v.item(), boards.size(0))
 
                 # compute gradient and do SGD step
                 optimizer.zero_grad()
@@ -106,6 +154,7 @@ class NNetWrapper(NeuralNet):
                 bar.next()
             bar.finish()
 
+        self.inference_model = None     # the weights changed
 
     def predict(self, board):
         """
@@ -114,6 +163,18 @@ class NNetWrapper(NeuralNet):
         # timing
         start = time.time()
 
+        if self.inference != 'eager':
+            # reuse the input tensor of this thread
+            board_input = getattr(self.local, 'board', None)
+            if board_input is None:
+                board_input = self.local.board = torch.zeros(1, self.board_x, self.board_y)
+            # through numpy, which handles the negative strides of the
+            # symmetric boards (e.g. np.rot90 views) from EvalCache
+            board_input.numpy()[0] = board
+            with torch.no_grad():
+                pi, v = self.get_inference_model()(board_input)
+            return pi.numpy()[0], v.numpy()[0]
+
         # preparing input
         board = torch.FloatTensor(board.astype(np.float64))
         if args.cuda: board = board.contiguous().cuda()
@@ -126,6 +187,25 @@ class NNetWrapper(NeuralNet):
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: np array of boards, batch_size x board_x x board_y
+
+        Returns:
+            pis: batch_size x action_size policies
+            vs: batch_size x 1 values
+        """
+        boards = torch.from_numpy(np.ascontiguousarray(boards, dtype=np.float32))
+        with torch.no_grad():
+            if self.inference != 'eager':
+                pis, vs = self.get_inference_model()(boards)
+            else:
+                if args.cuda: boards = boards.contiguous().cuda()
+                self.nnet.eval()
+                log_pis, vs = self.nnet(boards)
+                pis = torch.exp(log_pis)
+        return pis.cpu().numpy(), vs.cpu().numpy()
+
     def loss_pi(self, targets, outputs):
         return -torch.sum(targets*outputs)/targets.size()[0]
 
@@ -139,14 +219,42 @@ class NNetWrapper(NeuralNet):
             os.mkdir(folder)
         else:
             print("Checkpoint Directory exists! ")
+        if filename.endswith(FlatCheckpoint.EXTENSION):
+            self.checkpoint_hash = FlatCheckpoint.save(filepath, {k: v.cpu().numpy() for k, v in self.nnet.state_dict().items()})
+            return
         torch.save({
             'state_dict' : self.nnet.state_dict(),
         }, filepath)
 
     def load_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
+        """
+        Checkpoints whose filename ends with FlatCheckpoint.EXTENSION are
+        memory-mapped. On the CPU the network then uses the mapped weights
+        directly, so processes loading the same checkpoint share them, and
+        train copies them before changing them.
+        """
         # https://github.com/pytorch/examples/blob/master/imagenet/main.py#L98
         filepath = os.path.join(folder, filename)
         if not os.path.exists(filepath):
             raise("No model in path {}".format(filepath))
+        self.inference_model = None
+        if filename.endswith(FlatCheckpoint.EXTENSION):
+            arrays, self.checkpoint_hash = FlatCheckpoint.load(filepath)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')     # the mapped arrays are read-only
+                state_dict = {k: torch.from_numpy(a) for k, a in arrays.items()}
+            self.shared_weights = not args.cuda
+            self.nnet.load_state_dict(state_dict, assign=self.shared_weights)
+            return
         checkpoint = torch.load(filepath)
+        self.unshare_weights()
         self.nnet.load_state_dict(checkpoint['state_dict'])
+        self.checkpoint_hash = None
+
+    def unshare_weights(self):
+        """
+        Replaces memory-mapped weights with private, writable copies.
+        """
+        if self.shared_weights:
+            self.nnet.load_state_dict({k: v.clone() for k, v in self.nnet.state_dict().items()}, assign=True)
+            self.shared_weights = False
@@ -0,0 +1,91 @@
+import copy
+import numpy as np
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval, fuse_linear_bn_eval
+
+
+class FusedOthelloNNet(nn.Module):
+    """
+    An inference only copy of OthelloNNet with every batch norm folded into
+    the convolution or linear layer before it, and without dropout. It
+    returns the policy itself (not its log) and the value.
+    """
+    def __init__(self, nnet):
+        super(FusedOthelloNNet, self).__init__()
+        self.board_x, self.board_y = nnet.board_x, nnet.board_y
+        # The fuse functions copy the layers. nnet itself can't be deep
+        # copied, because of its dotdict args.
+        training = nnet.training
+        nnet.eval()
+        try:
+            self.conv1 = fuse_conv_bn_eval(nnet.conv1, nnet.bn1)
+            self.conv2 = fuse_conv_bn_eval(nnet.conv2, nnet.bn2)
+            self.conv3 = fuse_conv_bn_eval(nnet.conv3, nnet.bn3)
+            self.conv4 = fuse_conv_bn_eval(nnet.conv4, nnet.bn4)
+            self.fc1 = fuse_linear_bn_eval(nnet.fc1, nnet.fc_bn1)
+            self.fc2 = fuse_linear_bn_eval(nnet.fc2, nnet.fc_bn2)
+        finally:
+            nnet.train(training)
+        self.fc3 = copy.deepcopy(nnet.fc3)
+        self.fc4 = copy.deepcopy(nnet.fc4)
+        self.cpu()
+
+    def forward(self, s):
+        s = s.view(-1, 1, self.board_x, self.board_y)
+        s = F.relu(self.conv1(s))
+        s = F.relu(self.conv2(s))
+        s = F.relu(self.conv3(s))
+        s = F.relu(self.conv4(s))
+        s = s.flatten(1)
+        s = F.relu(self.fc1(s))
+        s = F.relu(self.fc2(s))
+        return F.softmax(self.fc3(s), dim=1), torch.tanh(self.fc4(s))
+
+
+def export(nnet, quantize=False, validate=True, atol=None, batch_size=64):
+    """
+    Exports OthelloNNet nnet for CPU inference: batch norms are folded, the
+    linear layers are optionally quantized to int8 (dynamic quantization,
+    which pytorch only supports for linear layers), and the result is traced
+    and frozen with TorchScript.
+
+    If validate, the exported model is compared with the eager nnet on
+    random boards and a ValueError is raised if any output differs by more
+    than atol (by default 1e-4, or 5e-2 when quantized).
+
+    Returns:
+        model: a TorchScript module mapping a batch of boards to (pi, v)
+    """
+    fused = FusedOthelloNNet(nnet).eval()
+    if quantize:
+        fused = torch.quantization.quantize_dynamic(fused, {nn.Linear}, dtype=torch.qint8)
+    example = torch.zeros(1, fused.board_x, fused.board_y)
+    with torch.no_grad():
+        model = torch.jit.freeze(torch.jit.trace(fused, example).eval())
+
+    if validate:
+        check(nnet, model, batch_size, atol if atol is not None else (5e-2 if quantize else 1e-4))
+    return model
+
+
+def check(nnet, model, batch_size, atol):
+    """
+    Raises a ValueError if model and the eager nnet disagree on random
+    boards.
+    """
+    boards = torch.from_numpy(np.random.randint(-1, 2, size=(batch_size, nnet.board_x, nnet.board_y)).astype(np.float32))
+    device = next(nnet.parameters()).device
+    training = nnet.training
+    nnet.eval()
+    with torch.no_grad():
+        log_pi, v = nnet(boards.to(device))
+        pi, v = torch.exp(log_pi).cpu(), v.cpu()
+        model_pi, model_v = model(boards)
+    nnet.train(training)
+    error = max((pi - model_pi).abs().max().item(), (v - model_v).abs().max().item())
+    if error > atol:
+        raise ValueError('Exported model differs from the eager model by {:.2e} > {:.2e}'.format(error, atol))
+    return error
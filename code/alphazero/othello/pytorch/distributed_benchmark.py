@@ -0,0 +1,57 @@
+"""
+Measures the training throughput of OthelloNNet with 1 to N data parallel
+processes (gloo, on the CPU) on this machine. Run from the alphazero
+directory:
+
+    python -m othello.pytorch.distributed_benchmark --n 6 --processes 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import torch
+
+from othello.OthelloGame import OthelloGame
+from . import NNet
+from . import DistributedNNet
+from .OthelloNNet import OthelloNNet as onnet
+
+
+def random_examples(game, count):
+    n = game.getBoardSize()[0]
+    examples = []
+    for _ in range(count):
+        board = np.random.randint(-1, 2, size=(n, n)).astype(np.float32)
+        pi = np.random.dirichlet(np.ones(game.getActionSize()))
+        examples.append((board, pi, np.random.uniform(-1, 1)))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=6, help='Board size.')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Largest number of processes.')
+    parser.add_argument('--examples', type=int, default=8192)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batch_size', type=int, default=NNet.args.batch_size)
+    options = parser.parse_args()
+
+    args = NNet.dotdict(dict(NNet.args, cuda=False, epochs=options.epochs, batch_size=options.batch_size))
+    game = OthelloGame(options.n)
+    examples = random_examples(game, options.examples)
+    checkpoint = os.path.join(tempfile.mkdtemp(), 'distributed.pth.tar')
+
+    print('{:>10} {:>12} {:>10} {:>10}'.format('processes', 'examples/s', 'speedup', 'seconds'))
+    base = None
+    for world_size in range(1, options.processes + 1):
+        nnet = onnet(game, args)
+        start = time.time()
+        rate = DistributedNNet.train(nnet, game, examples, args, world_size, checkpoint)
+        base = base or rate
+        print('{:>10} {:>12.0f} {:>10.2f} {:>10.1f}'.format(world_size, rate, rate / base, time.time() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares the eager, TorchScript and quantized inference of the pytorch
+Othello network on the CPU. Run from the alphazero directory:
+
+    python -m othello.pytorch.inference_benchmark --n 8 --checkpoint folder file
+"""
+
+import argparse
+import time
+import numpy as np
+import torch
+
+from othello.OthelloGame import OthelloGame
+from . import NNet
+from . import OthelloInferenceNNet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=8, help='Board size.')
+    parser.add_argument('--checkpoint', nargs=2, default=None, metavar=('FOLDER', 'FILE'))
+    parser.add_argument('--calls', type=int, default=500, help='Single board predictions timed per mode.')
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--threads', type=int, default=None, help='torch.set_num_threads, if set.')
+    options = parser.parse_args()
+
+    if options.threads:
+        torch.set_num_threads(options.threads)
+    NNet.args.cuda = False
+    game = OthelloGame(options.n)
+    nnet = NNet.NNetWrapper(game)
+    if options.checkpoint:
+        nnet.load_checkpoint(*options.checkpoint)
+    boards = np.random.randint(-1, 2, size=(options.batch_size, options.n, options.n)).astype(np.float32)
+
+    print('{:>10} {:>12} {:>16} {:>12}'.format('mode', 'latency ms', 'boards/s (batch)', 'max error'))
+    for mode in ['eager', 'script', 'quantized']:
+        nnet.set_inference(mode)
+        error = 0.0
+        if mode != 'eager':
+            model = nnet.get_inference_model()
+            error = OthelloInferenceNNet.check(nnet.nnet, model, options.batch_size, atol=float('inf'))
+        for board in boards[:10]:
+            nnet.predict(board)     # warm up
+        start = time.time()
+        for i in range(options.calls):
+            nnet.predict(boards[i % len(boards)])
+        latency = 1000 * (time.time() - start) / options.calls
+
+        nnet.predict_batch(boards)
+        start = time.time()
+        for _ in range(10):
+            nnet.predict_batch(boards)
+        throughput = 10 * len(boards) / (time.time() - start)
+        print('{:>10} {:>12.3f} {:>16.0f} {:>12.2e}'.format(mode, latency, throughput, error))
+
+
+if __name__ == "__main__":
+    main()
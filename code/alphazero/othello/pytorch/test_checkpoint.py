@@ -0,0 +1,36 @@
+"""
+To run tests:
+pytest-3 othello/pytorch
+"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from othello.OthelloGame import OthelloGame
+from . import NNet
+
+
+def test_flat_checkpoint(tmpdir, monkeypatch):
+    monkeypatch.setitem(NNet.args, 'cuda', False)
+    monkeypatch.setitem(NNet.args, 'num_channels', 32)
+    monkeypatch.setitem(NNet.args, 'epochs', 1)
+    game = OthelloGame(6)
+    saved = NNet.NNetWrapper(game)
+    saved.save_checkpoint(str(tmpdir), 'model.flat')
+
+    loaded = NNet.NNetWrapper(game)
+    loaded.load_checkpoint(str(tmpdir), 'model.flat')
+    assert loaded.shared_weights
+    assert loaded.checkpoint_hash == saved.checkpoint_hash
+    board = np.random.randint(-1, 2, size=(6, 6)).astype(np.float32)
+    for a, b in zip(saved.predict(board), loaded.predict(board)):
+        assert np.allclose(a, b, atol=1e-6)
+
+    # training works on private copies of the mapped weights
+    loaded.train([(board, np.ones(game.getActionSize()) / game.getActionSize(), 1.0)] * NNet.args.batch_size)
+    assert not loaded.shared_weights
+    assert loaded.checkpoint_hash is None
+    loaded.save_checkpoint(str(tmpdir), 'trained.flat')
+    assert loaded.checkpoint_hash != saved.checkpoint_hash
@@ -0,0 +1,30 @@
+"""
+To run tests:
+pytest-3 othello/pytorch
+"""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from othello.OthelloGame import OthelloGame
+from . import NNet
+from . import DistributedNNet
+from .distributed_benchmark import random_examples
+
+
+def test_shards_cover_examples():
+    examples = list(range(10))
+    shards = [DistributedNNet.shard(examples, rank, 3) for rank in range(3)]
+    assert sorted(sum(shards, [])) == examples
+    assert [len(s) for s in shards] == [4, 3, 3]
+
+
+def test_train_two_processes(tmpdir):
+    game = OthelloGame(6)
+    args = NNet.dotdict(dict(NNet.args, cuda=False, num_channels=16, epochs=1, batch_size=16))
+    nnet = DistributedNNet.onnet(game, args)
+    before = {k: v.clone() for k, v in nnet.state_dict().items()}
+    rate = DistributedNNet.train(nnet, game, random_examples(game, 64), args, 2, str(tmpdir.join('ddp.pth.tar')))
+    assert rate > 0
+    assert any(not torch.equal(before[k], v) for k, v in nnet.state_dict().items())
@@ -0,0 +1,81 @@
+"""
+To run tests:
+pytest-3 othello/pytorch
+"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from EvalCache import EvalCache
+from othello.OthelloGame import OthelloGame
+from . import NNet
+from . import OthelloInferenceNNet
+
+
+@pytest.fixture
+def nnet(monkeypatch):
+    monkeypatch.setitem(NNet.args, 'cuda', False)
+    monkeypatch.setitem(NNet.args, 'num_channels', 32)
+    wrapper = NNet.NNetWrapper(OthelloGame(6))
+    # non trivial batch norm statistics, so folding them matters
+    wrapper.nnet.train()
+    with torch.no_grad():
+        for _ in range(5):
+            wrapper.nnet(torch.randn(16, 6, 6))
+    return wrapper
+
+
+@pytest.mark.parametrize('mode,atol', [('script', 1e-4), ('quantized', 5e-2)])
+def test_matches_eager(nnet, mode, atol):
+    boards = np.random.randint(-1, 2, size=(8, 6, 6))
+    expected = [nnet.predict(board) for board in boards]
+    nnet.set_inference(mode)
+    for board, (pi, v) in zip(boards, expected):
+        fast_pi, fast_v = nnet.predict(board)
+        np.testing.assert_allclose(fast_pi, pi, atol=atol)
+        np.testing.assert_allclose(fast_v, v, atol=atol)
+    pis, vs = nnet.predict_batch(boards)
+    np.testing.assert_allclose(pis, np.array([pi for pi, _ in expected]), atol=atol)
+
+
+@pytest.mark.parametrize('mode', ['eager', 'script', 'quantized'])
+def test_symmetric_views(nnet, mode):
+    nnet.set_inference(mode)
+    board = np.random.randint(-1, 2, size=(6, 6))
+    view = np.rot90(board)
+    assert any(stride < 0 for stride in view.strides)
+    pi, v = nnet.predict(view)
+    expected_pi, expected_v = nnet.predict(np.ascontiguousarray(view))
+    np.testing.assert_allclose(pi, expected_pi, atol=1e-6)
+    np.testing.assert_allclose(v, expected_v, atol=1e-6)
+    pis, _ = nnet.predict_batch(view[np.newaxis])
+    np.testing.assert_allclose(pis[0], expected_pi, atol=1e-6)
+
+    # EvalCache evaluates the canonical symmetric board, usually such a view.
+    game = OthelloGame(6)
+    cache = EvalCache(game, nnet)
+    board, player = game.getInitBoard(), 1
+    for _ in range(6):
+        canonical = game.getCanonicalForm(board, player)
+        pi, v = cache.predict(canonical)
+        _, symmetric, perm = cache.canonicalize(canonical)
+        expected_pi, expected_v = nnet.predict(np.ascontiguousarray(symmetric))
+        np.testing.assert_allclose(pi[perm], expected_pi, atol=1e-6)
+        np.testing.assert_allclose(v, expected_v, atol=1e-6)
+        action = np.nonzero(game.getValidMoves(board, player))[0][0]
+        board, player = game.getNextState(board, player, action)
+
+
+def test_check_detects_mismatch(nnet):
+    model = OthelloInferenceNNet.export(nnet.nnet)
+    with torch.no_grad():
+        nnet.nnet.fc4.bias += 1
+    with pytest.raises(ValueError):
+        OthelloInferenceNNet.check(nnet.nnet, model, 8, atol=1e-4)
+
+
+def test_invalid_mode(nnet):
+    with pytest.raises(ValueError):
+        nnet.set_inference('onnx')
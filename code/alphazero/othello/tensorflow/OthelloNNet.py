@@ -1,6 +1,7 @@
 import sys
 sys.path.append('..')
 from utils import *
+from ExamplePipeline import ExamplePipeline
 
 import tensorflow as tf
 
@@ -21,7 +22,9 @@ class OthelloNNet():
         # Neural Net
         self.graph = tf.Graph()
         with self.graph.as_default(): 
-            self.input_boards = tf.placeholder(tf.float32, shape=[None, self.board_x, self.board_y])    # s: batch_size x board_x x board_y
+            # read from the training examples unless fed
+            self.examples = ExamplePipeline(self.board_x, self.board_y, self.action_size, args, symmetry='square')
+            self.input_boards = tf.placeholder_with_default(self.examples.boards, shape=[None, self.board_x, self.board_y])    # s: batch_size x board_x x board_y
             self.dropout = tf.placeholder(tf.float32)
             self.isTraining = tf.placeholder(tf.bool, name="is_training")
 
@@ -43,8 +46,9 @@ class OthelloNNet():
       return tf.layers.conv2d(x, out_channels, kernel_size=[3,3], padding=padding, use_bias=False)
 
     def calculate_loss(self):
-        self.target_pis = tf.placeholder(tf.float32, shape=[None, self.action_size])
-        self.target_vs = tf.placeholder(tf.float32, shape=[None])
+        self.target_pis = tf.placeholder_with_default(self.examples.pis, shape=[None, self.action_size])
+        self.target_vs = tf.placeholder_with_default(self.examples.vs, shape=[None])
+        self.batch_size = tf.shape(self.target_vs)[0]
         self.loss_pi =  tf.losses.softmax_cross_entropy(self.target_pis, self.pi)
         self.loss_v = tf.losses.mean_squared_error(self.target_vs, tf.reshape(self.v, shape=[-1,]))
         self.total_loss = self.loss_pi + self.loss_v
@@ -62,7 +66,9 @@ class ResNet():
         # Neural Net
         self.graph = tf.Graph()
         with self.graph.as_default(): 
-            self.input_boards = tf.placeholder(tf.float32, shape=[None, self.board_x, self.board_y])    # s: batch_size x board_x x board_y
+            # read from the training examples unless fed
+            self.examples = ExamplePipeline(self.board_x, self.board_y, self.action_size, args, symmetry='square')
+            self.input_boards = tf.placeholder_with_default(self.examples.boards, shape=[None, self.board_x, self.board_y])    # s: batch_size x board_x x board_y
             self.dropout = tf.placeholder(tf.float32)
             self.isTraining = tf.placeholder(tf.bool, name="is_training")
 
@@ -123,8 +129,9 @@ class ResNet():
         return residual_result
 
     def calculate_loss(self):
-        self.target_pis = tf.placeholder(tf.float32, shape=[None, self.action_size])
-        self.target_vs = tf.placeholder(tf.float32, shape=[None])
+        self.target_pis = tf.placeholder_with_default(self.examples.pis, shape=[None, self.action_size])
+        self.target_vs = tf.placeholder_with_default(self.examples.vs, shape=[None])
+        self.batch_size = tf.shape(self.target_vs)[0]
         self.loss_pi =  tf.losses.softmax_cross_entropy(self.target_pis, self.pi)
         self.loss_v = tf.losses.mean_squared_error(self.target_vs, tf.reshape(self.v, shape=[-1,]))
         self.total_loss = self.loss_pi + self.loss_v
@@ -1,5 +1,5 @@
 import Arena
-from MCTS import MCTS
+from MCTS import makeMCTS
 from othello.OthelloGame import OthelloGame, display
 from othello.OthelloPlayers import *
 from othello.pytorch.NNet import NNetWrapper as NNet
@@ -22,15 +22,15 @@ hp = HumanOthelloPlayer(g).play
 # nnet players
 n1 = NNet(g)
 n1.load_checkpoint('./pretrained_models/othello/pytorch/','6x100x25_best.pth.tar')
-args1 = dotdict({'numMCTSSims': 50, 'cpuct':1.0})
-mcts1 = MCTS(g, n1, args1)
+args1 = dotdict({'numMCTSSims': 50, 'cpuct':1.0, 'numThreads': 1, 'parallelMode': 'tree'})
+mcts1 = makeMCTS(g, n1, args1)
 n1p = lambda x: np.argmax(mcts1.getActionProb(x, temp=0))
 
 
 #n2 = NNet(g)
 #n2.load_checkpoint('/dev/8x50x25/','best.pth.tar')
-#args2 = dotdict({'numMCTSSims': 25, 'cpuct':1.0})
-#mcts2 = MCTS(g, n2, args2)
+#args2 = dotdict({'numMCTSSims': 25, 'cpuct':1.0, 'numThreads': 1, 'parallelMode': 'tree'})
+#mcts2 = makeMCTS(g, n2, args2)
 #n2p = lambda x: np.argmax(mcts2.getActionProb(x, temp=0))
 
 arena = Arena.Arena(n1p, hp, g, display=display)
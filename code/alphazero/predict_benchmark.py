@@ -0,0 +1,78 @@
+"""
+Measures the per board latency of the keras and tensorflow wrappers: the
+previous single board path (model.predict / sess.run with a feed_dict)
+against predict and predict_batch. Run from the alphazero directory:
+
+    python predict_benchmark.py --game othello --framework tensorflow
+"""
+
+import argparse
+import importlib
+import time
+import numpy as np
+
+GAMES = {
+    'othello': ('othello.OthelloGame', 'OthelloGame', (6,)),
+    'gobang': ('gobang.GobangGame', 'GobangGame', (15, 5)),
+    'connect4': ('connect4.Connect4Game', 'Connect4Game', ()),
+    'tictactoe': ('tictactoe.TicTacToeGame', 'TicTacToeGame', (3,)),
+}
+FRAMEWORKS = {
+    'othello': ['keras', 'tensorflow'],
+    'gobang': ['keras', 'tensorflow'],
+    'connect4': ['tensorflow'],
+    'tictactoe': ['keras'],
+}
+
+
+def legacy_predict(framework, nnet):
+    """
+    Returns the single board predict as it was before predict_batch.
+    """
+    if framework == 'tensorflow':
+        def predict(board):
+            prob, v = nnet.sess.run([nnet.nnet.prob, nnet.nnet.v], feed_dict={nnet.nnet.input_boards: board[np.newaxis, :, :], nnet.nnet.dropout: 0, nnet.nnet.isTraining: False})
+            return prob[0], v[0]
+    else:
+        def predict(board):
+            pi, v = nnet.nnet.model.predict(board[np.newaxis, :, :])
+            return pi[0], v[0]
+    return predict
+
+
+def timed(fn, calls):
+    fn()    # warm up
+    start = time.time()
+    for _ in range(calls):
+        fn()
+    return (time.time() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--game', default='othello', choices=sorted(GAMES))
+    parser.add_argument('--framework', default=None, choices=['keras', 'tensorflow'])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--batch_size', type=int, default=64)
+    options = parser.parse_args()
+
+    module, name, game_args = GAMES[options.game]
+    game = getattr(importlib.import_module(module), name)(*game_args)
+    frameworks = [options.framework] if options.framework else FRAMEWORKS[options.game]
+    board_x, board_y = game.getBoardSize()
+    boards = np.random.randint(-1, 2, size=(options.batch_size, board_x, board_y)).astype(np.float32)
+
+    for framework in frameworks:
+        nnet = importlib.import_module('{}.{}.NNet'.format(options.game, framework)).NNetWrapper(game)
+        legacy = legacy_predict(framework, nnet)
+        np.testing.assert_allclose(nnet.predict(boards[0])[0], legacy(boards[0])[0], rtol=1e-5, atol=1e-6)
+
+        print('{} {}: ms per board'.format(options.game, framework))
+        print('  previous predict : {:.3f}'.format(1000 * timed(lambda: legacy(boards[0]), options.calls)))
+        print('  predict          : {:.3f}'.format(1000 * timed(lambda: nnet.predict(boards[0]), options.calls)))
+        batch = timed(lambda: nnet.predict_batch(boards), max(1, options.calls // 10))
+        print('  predict_batch({}) : {:.3f}'.format(options.batch_size, 1000 * batch / options.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+To run tests:
+pytest-3 test_AsyncCoach.py
+"""
+
+import os
+import pickle
+import threading
+from types import SimpleNamespace
+import numpy as np
+
+from AsyncCoach import AsyncCoach, selfPlayWorker
+import FlatCheckpoint
+from tictactoe.TicTacToeGame import TicTacToeGame
+from utils import dotdict
+
+
+class CountingNNet():
+    """Uniform policy and a constant value. Counts how often it was trained,
+    and saves only that count."""
+
+    def __init__(self, game):
+        self.actionSize = game.getActionSize()
+        self.trained = 0
+
+    def predict(self, board):
+        return np.ones(self.actionSize) / self.actionSize, 0.0
+
+    def train(self, examples):
+        assert examples
+        self.trained += 1
+
+    def save_checkpoint(self, folder, filename):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(os.path.join(folder, filename), 'wb') as f:
+            pickle.dump(self.trained, f)
+
+    def load_checkpoint(self, folder, filename):
+        with open(os.path.join(folder, filename), 'rb') as f:
+            self.trained = pickle.load(f)
+
+
+class FlatCountingNNet(CountingNNet):
+    """Saves its count as a flat checkpoint, and counts how often it was
+    loaded."""
+
+    loads = 0
+
+    def save_checkpoint(self, folder, filename):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self.checkpoint_hash = FlatCheckpoint.save(os.path.join(folder, filename), {'trained': np.array(self.trained)})
+
+    def load_checkpoint(self, folder, filename):
+        arrays, self.checkpoint_hash = FlatCheckpoint.load(os.path.join(folder, filename))
+        self.trained = int(arrays['trained'])
+        FlatCountingNNet.loads += 1
+
+
+class EpisodeQueue():
+    """Switches bestVersion to the next version after every episode, and
+    stops the worker after the last one."""
+
+    def __init__(self, bestVersion, versions, stop):
+        self.bestVersion = bestVersion
+        self.versions = list(versions)
+        self.stop = stop
+        self.episodes = []
+
+    def cancel_join_thread(self):
+        pass
+
+    def put(self, item):
+        self.episodes.append(item)
+        if self.versions:
+            self.bestVersion.value = self.versions.pop(0)
+        else:
+            self.stop.set()
+
+
+def test_self_play_skips_unchanged_checkpoints(tmpdir):
+    args = dotdict({
+        'numMCTSSims': 2,
+        'cpuct': 1,
+        'tempThreshold': 15,
+        'checkpoint': str(tmpdir),
+        'checkpointExtension': FlatCheckpoint.EXTENSION,
+    })
+    game = TicTacToeGame(3)
+    nnet = FlatCountingNNet(game)
+    nnet.save_checkpoint(str(tmpdir), 'checkpoint_0.flat')
+    nnet.save_checkpoint(str(tmpdir), 'checkpoint_1.flat')     # same weights
+    nnet.trained = 1
+    nnet.save_checkpoint(str(tmpdir), 'checkpoint_2.flat')
+
+    bestVersion = SimpleNamespace(value=0)
+    stop = threading.Event()
+    episodes = EpisodeQueue(bestVersion, [1, 2], stop)
+    FlatCountingNNet.loads = 0
+    selfPlayWorker(game, FlatCountingNNet, args, bestVersion, episodes, stop)
+
+    assert [version for version, _ in episodes.episodes] == [0, 1, 2]
+    assert FlatCountingNNet.loads == 2
+
+
+def test_learn(tmpdir):
+    args = dotdict({
+        'numIters': 2,
+        'numMCTSSims': 4,
+        'cpuct': 1,
+        'tempThreshold': 15,
+        'updateThreshold': 0.6,
+        'arenaCompare': 2,
+        'maxlenOfQueue': 1000,
+        'examplesPerCandidate': 20,
+        'numSelfPlayWorkers': 2,
+        'checkpoint': str(tmpdir),
+    })
+    nnet = CountingNNet(TicTacToeGame(3))
+    AsyncCoach(TicTacToeGame(3), nnet, args).learn()
+
+    assert nnet.trained == 2
+    for i in range(3):
+        assert tmpdir.join('checkpoint_%d.pth.tar' % i).check()
+    with open(str(tmpdir.join('checkpoint_2.pth.tar.examples')), 'rb') as f:
+        history = pickle.load(f)
+    assert len(history) == 1 and len(history[0]) >= 40
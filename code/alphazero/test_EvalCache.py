@@ -0,0 +1,82 @@
+"""
+To run tests:
+pytest-3 test_EvalCache.py
+"""
+
+import numpy as np
+
+from EvalCache import EvalCache
+from MCTS import MCTS
+from connect4.Connect4Game import Connect4Game
+from utils import dotdict
+
+
+class FakeNNet():
+    """Scores every column by its stones, which is left/right equivariant."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, board):
+        self.calls += 1
+        pi = np.abs(board).sum(axis=0) + np.arange(board.shape[1]) + 1.0
+        return pi / pi.sum(), float(board.sum())
+
+
+def play(game, moves):
+    board, player = game.getInitBoard(), 1
+    for move in moves:
+        board, player = game.getNextState(board, player, move)
+    return board
+
+
+def test_symmetric_boards_share_entry():
+    game = Connect4Game()
+    nnet = FakeNNet()
+    cache = EvalCache(game, nnet)
+    board = play(game, [0, 1, 1])
+    mirrored = board[:, ::-1]
+
+    pi, v = cache.predict(board)
+    mirroredPi, mirroredV = cache.predict(mirrored)
+    assert nnet.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert v == mirroredV
+    np.testing.assert_allclose(mirroredPi, pi[::-1])
+
+    # The policy is returned in the orientation of the queried board.
+    for query in [board, mirrored]:
+        queryPi, _ = cache.predict(query)
+        key, canonicalBoard, perm = cache.canonicalize(query)
+        canonicalPi, _ = FakeNNet().predict(canonicalBoard)
+        np.testing.assert_allclose(queryPi[perm], canonicalPi)
+
+
+def test_bounded_and_invalidate():
+    game = Connect4Game()
+    nnet = FakeNNet()
+    cache = EvalCache(game, nnet, maxSize=2)
+    boards = [play(game, [move]) for move in range(3)]
+    for board in boards:
+        cache.predict(board)
+    assert len(cache.entries) == 2
+    # The least recently used board was evicted.
+    cache.predict(boards[0])
+    assert nnet.calls == 4
+
+    cache.invalidate()
+    cache.predict(boards[0])
+    assert nnet.calls == 5
+
+
+def test_shared_across_searches():
+    game = Connect4Game()
+    nnet = FakeNNet()
+    cache = EvalCache(game, nnet)
+    args = dotdict({'numMCTSSims': 20, 'cpuct': 1.0})
+    board = game.getInitBoard()
+    MCTS(game, cache, args).getActionProb(board)
+    calls = nnet.calls
+    MCTS(game, cache, args).getActionProb(board)
+    assert nnet.calls == calls
+    assert cache.hitRate() > 0
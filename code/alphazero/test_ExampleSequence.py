@@ -0,0 +1,38 @@
+"""
+To run tests:
+pytest-3 test_ExampleSequence.py
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('keras')
+
+from ExampleSequence import ExampleSequence
+
+
+def examples(count):
+    return [(np.full((3, 3), i), [i, 1, 2], float(i)) for i in range(count)]
+
+
+def test_batches_cover_examples_once_per_epoch():
+    sequence = ExampleSequence(examples(10), batch_size=4, seed=0)
+    assert len(sequence) == 3
+    for _ in range(2):
+        seen = []
+        for idx in range(len(sequence)):
+            boards, (pis, vs) = sequence[idx]
+            assert boards.shape[1:] == (3, 3)
+            assert pis.shape == (len(boards), 3)
+            np.testing.assert_array_equal(boards[:, 0, 0], vs)
+            np.testing.assert_array_equal(pis[:, 0], vs)
+            seen.extend(vs)
+        assert sorted(seen) == list(range(10))
+        sequence.on_epoch_end()
+
+
+def test_reshuffles():
+    sequence = ExampleSequence(examples(100), batch_size=100, seed=0)
+    first = sequence[0][1][1]
+    sequence.on_epoch_end()
+    assert list(sequence[0][1][1]) != list(first)
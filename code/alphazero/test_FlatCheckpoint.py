@@ -0,0 +1,80 @@
+"""
+To run tests:
+pytest-3 test_FlatCheckpoint.py
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pytest
+
+import FlatCheckpoint
+
+
+def weights():
+    return OrderedDict([
+        ('conv.weight', np.random.randn(8, 1, 3, 3).astype(np.float32)),
+        ('bn.num_batches_tracked', np.array(7, dtype=np.int64)),
+        ('fc.bias', np.random.randn(5)),
+        ('empty', np.zeros((0, 4), dtype=np.float16)),
+    ])
+
+
+def test_roundtrip(tmpdir):
+    path = str(tmpdir.join('w' + FlatCheckpoint.EXTENSION))
+    saved = weights()
+    contentHash = FlatCheckpoint.save(path, saved)
+    arrays, loadedHash = FlatCheckpoint.load(path, verify=True)
+
+    assert loadedHash == contentHash == FlatCheckpoint.readHash(path)
+    assert list(arrays) == list(saved)
+    for name, a in saved.items():
+        assert arrays[name].dtype == a.dtype
+        assert arrays[name].shape == a.shape
+        assert np.array_equal(arrays[name], a)
+    assert not arrays['conv.weight'].flags.writeable
+    assert arrays['conv.weight'].ctypes.data % FlatCheckpoint.ALIGNMENT == 0
+
+
+def test_hash_changes_with_content(tmpdir):
+    path = str(tmpdir.join('w.flat'))
+    saved = weights()
+    first = FlatCheckpoint.save(path, saved)
+    assert FlatCheckpoint.save(path, saved) == first
+    saved['fc.bias'][0] += 1
+    assert FlatCheckpoint.save(path, saved) != first
+
+
+def test_hash_changes_with_layout(tmpdir):
+    path = str(tmpdir.join('w.flat'))
+    saved = weights()
+    first = FlatCheckpoint.save(path, saved)
+    saved['conv.weight'] = saved['conv.weight'].reshape(8, 3, 3, 1)
+    reshaped = FlatCheckpoint.save(path, saved)
+    assert reshaped != first
+    saved['conv.weight'] = saved['conv.weight'].view(np.int32)
+    assert FlatCheckpoint.save(path, saved) not in (first, reshaped)
+
+
+def test_replace_keeps_mapped_arrays(tmpdir):
+    path = str(tmpdir.join('w.flat'))
+    saved = weights()
+    FlatCheckpoint.save(path, saved)
+    arrays, _ = FlatCheckpoint.load(path)
+    FlatCheckpoint.save(path, OrderedDict((name, a + 1) for name, a in saved.items()))
+    assert np.array_equal(arrays['fc.bias'], saved['fc.bias'])
+    assert tmpdir.listdir() == [tmpdir.join('w.flat')]
+
+
+def test_detects_corruption(tmpdir):
+    path = str(tmpdir.join('w.flat'))
+    FlatCheckpoint.save(path, weights())
+    with open(path, 'r+b') as f:
+        _, start = FlatCheckpoint.readHeader(f)
+        f.seek(start)
+        first = f.read(1)
+        f.seek(start)
+        f.write(b'\x00' if first == b'\xff' else b'\xff')
+    with pytest.raises(ValueError):
+        FlatCheckpoint.load(path, verify=True)
+    with pytest.raises(ValueError):
+        FlatCheckpoint.readHash(__file__)
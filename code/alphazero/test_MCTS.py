@@ -0,0 +1,141 @@
+"""
+To run tests:
+pytest-3 test_MCTS.py
+"""
+
+import time
+import numpy as np
+
+from MCTS import MCTS, RootParallelMCTS, SearchController, TreeParallelMCTS, makeMCTS
+from connect4.Connect4Game import Connect4Game
+from utils import dotdict
+
+
+class SlowNNet():
+    """Uniform policy and a value which depends on the board. Sleeps to let
+    the other threads run, like a real network would."""
+
+    def predict(self, board):
+        time.sleep(0.0005)
+        pi = np.ones(board.shape[1])
+        return pi / pi.sum(), float(np.tanh(np.sum(board * np.arange(board.shape[1]))))
+
+
+def args(**kwargs):
+    return dotdict(dict({'numMCTSSims': 64, 'cpuct': 1.0}, **kwargs))
+
+
+def test_make_mcts():
+    game = Connect4Game()
+    assert type(makeMCTS(game, SlowNNet(), args())) is MCTS
+    assert type(makeMCTS(game, SlowNNet(), args(numThreads=4))) is TreeParallelMCTS
+    assert type(makeMCTS(game, SlowNNet(), args(numThreads=4, parallelMode='root'))) is RootParallelMCTS
+
+
+def test_tree_parallel():
+    game = Connect4Game()
+    board = game.getInitBoard()
+    mcts = TreeParallelMCTS(game, SlowNNet(), args(numThreads=8, earlyStop=False))
+    probs = mcts.getActionProb(board)
+    # One simulation expands the root, the others go through a root action.
+    assert sum(mcts.rootCounts(board)) == 63
+    assert abs(sum(probs) - 1) < 1e-6
+    assert all(n == 0 for n in mcts.VLsa.values())
+    assert all(n == 0 for n in mcts.VLs.values())
+    # Every visit of a board went through one of its edges.
+    for s, n in mcts.Ns.items():
+        assert n == sum(mcts.Nsa.get((s, a), 0) for a in range(game.getActionSize()))
+
+    probs = mcts.getActionProb(board, temp=0)
+    assert sum(probs) == 1
+    assert sum(mcts.rootCounts(board)) == 127
+
+
+def test_root_parallel():
+    game = Connect4Game()
+    board = game.getInitBoard()
+    mcts = RootParallelMCTS(game, SlowNNet(), args(numThreads=3))
+    probs = mcts.getActionProb(board)
+    # Each tree spends one simulation expanding the root.
+    assert sum(sum(tree.rootCounts(board)) for tree in mcts.trees) == 61
+    assert abs(sum(probs) - 1) < 1e-6
+    # The noise makes the trees differ.
+    assert mcts.trees[0].rootCounts(board) != mcts.trees[1].rootCounts(board)
+
+
+class BiasedNNet():
+    """Strongly prefers the first column."""
+
+    def predict(self, board):
+        pi = np.ones(board.shape[1])
+        pi[0] = 100
+        return pi / pi.sum(), 0.0
+
+
+def test_early_stop():
+    game = Connect4Game()
+    board = game.getInitBoard()
+    greedy = MCTS(game, BiasedNNet(), args(numMCTSSims=200))
+    probs = greedy.getActionProb(board, temp=0)
+    assert greedy.numSims < 200
+    full = MCTS(game, BiasedNNet(), args(numMCTSSims=200, earlyStop=False))
+    assert full.getActionProb(board, temp=0) == probs
+    assert full.numSims == 200
+
+    # With several threads, the simulations still in flight when the search
+    # stopped can't have changed the best action.
+    for mode in ['tree', 'root']:
+        mcts = makeMCTS(game, BiasedNNet(), args(numMCTSSims=200, numThreads=4, parallelMode=mode))
+        probs = mcts.getActionProb(board, temp=0)
+        assert mcts.numSims < 200
+        counts = sorted(mcts.rootCounts(board))
+        assert counts[-1] - counts[-2] > 200 - mcts.numSims
+        assert np.argmax(probs) == np.argmax(mcts.rootCounts(board))
+
+    # Early termination would change the probabilities with temp 1.
+    mcts = MCTS(game, BiasedNNet(), args(numMCTSSims=200))
+    mcts.getActionProb(board, temp=1)
+    assert mcts.numSims == 200
+
+
+def test_early_stop_counts_simulations_in_flight():
+    counts = [10, 0]
+    controller = SearchController(args(), 0, 20, lambda: counts)
+    for _ in range(15):
+        assert controller.startSimulation()
+    for _ in range(10):
+        controller.finishSimulation()
+    # Only 5 simulations are left to start, but the 5 in flight may also
+    # go to the second action.
+    assert not controller.shouldStop()
+    for _ in range(5):
+        controller.finishSimulation()
+    counts[0] += 5
+    assert controller.shouldStop()
+
+
+def test_move_time():
+    game = Connect4Game()
+    board = game.getInitBoard()
+    mcts = MCTS(game, SlowNNet(), args(numMCTSSims=100000, moveTime=0.05))
+    start = time.time()
+    probs = mcts.getActionProb(board)
+    assert time.time() - start < 1
+    assert 1 < mcts.numSims < 100000
+    assert abs(sum(probs) - 1) < 1e-6
+
+    for mode in ['tree', 'root']:
+        mcts = makeMCTS(game, SlowNNet(), args(numMCTSSims=100000, moveTime=0.05, numThreads=4, parallelMode=mode))
+        start = time.time()
+        probs = mcts.getActionProb(board)
+        assert time.time() - start < 1
+        assert abs(sum(probs) - 1) < 1e-6
+
+
+def test_num_sims():
+    game = Connect4Game()
+    board = game.getInitBoard()
+    mcts = MCTS(game, SlowNNet(), args())
+    mcts.getActionProb(board, numSims=10)
+    assert mcts.numSims == 10
+    assert sum(mcts.rootCounts(board)) == 9
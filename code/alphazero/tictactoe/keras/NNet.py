@@ -9,6 +9,8 @@ import sys
 sys.path.append('..')
 from utils import *
 from NeuralNet import NeuralNet
+import FlatCheckpoint
+from ExampleSequence import ExampleSequence
 
 import argparse
 from .TicTacToeNNet import TicTacToeNNet as onnet
@@ -29,6 +31,8 @@ args = dotdict({
     'batch_size': 64,
     'cuda': False,
     'num_channels': 512,
+    'workers': 4,           # threads preparing training batches
+    'max_queue_size': 10,   # batches prepared ahead of training
 })
 
 class NNetWrapper(NeuralNet):
@@ -36,16 +40,16 @@ class NNetWrapper(NeuralNet):
         self.nnet = onnet(game, args)
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
+        self.checkpoint_hash = None     # of the loaded or saved flat checkpoint
 
     def train(self, examples):
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
-        input_boards, target_pis, target_vs = list(zip(*examples))
-        input_boards = np.asarray(input_boards)
-        target_pis = np.asarray(target_pis)
-        target_vs = np.asarray(target_vs)
-        self.nnet.model.fit(x = input_boards, y = [target_pis, target_vs], batch_size = args.batch_size, epochs = args.epochs)
+        self.checkpoint_hash = None
+        # stream shuffled batches instead of copying all examples at once
+        sequence = ExampleSequence(examples, args.batch_size)
+        self.nnet.model.fit_generator(sequence, epochs = args.epochs, workers = args.workers, use_multiprocessing = False, max_queue_size = args.max_queue_size)
 
     def predict(self, board):
         """
@@ -57,12 +61,22 @@ class NNetWrapper(NeuralNet):
         # preparing input
         board = board[np.newaxis, :, :]
 
-        # run
-        pi, v = self.nnet.model.predict(board)
+        # run, skipping the batching and callbacks of model.predict
+        pi, v = self.nnet.model.predict_on_batch(board)
 
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: np array of boards, batch_size x board_x x board_y
+
+        Returns:
+            pis: batch_size x action_size policies
+            vs: batch_size x 1 values
+        """
+        return self.nnet.model.predict(np.asarray(boards), batch_size=args.batch_size)
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         filepath = os.path.join(folder, filename)
         if not os.path.exists(folder):
@@ -70,6 +84,9 @@ class NNetWrapper(NeuralNet):
             os.mkdir(folder)
         else:
             print("Checkpoint Directory exists! ")
+        if filename.endswith(FlatCheckpoint.EXTENSION):
+            self.checkpoint_hash = FlatCheckpoint.save(filepath, {str(i): w for i, w in enumerate(self.nnet.model.get_weights())})
+            return
         self.nnet.model.save_weights(filepath)
 
     def load_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
@@ -77,4 +94,9 @@ class NNetWrapper(NeuralNet):
         filepath = os.path.join(folder, filename)
         if not os.path.exists(filepath):
             raise("No model in path '{}'".format(filepath))
+        if filename.endswith(FlatCheckpoint.EXTENSION):
+            arrays, self.checkpoint_hash = FlatCheckpoint.load(filepath)
+            self.nnet.model.set_weights(list(arrays.values()))
+            return
         self.nnet.model.load_weights(filepath)
+        self.checkpoint_hash = None
@@ -0,0 +1,46 @@
+"""
+Measures the training throughput of the tensorflow wrappers, with batches
+fed through feed_dict (the previous path) and through the tf.data pipeline.
+Run from the alphazero directory:
+
+    python train_benchmark.py --game othello --examples 20000
+"""
+
+import argparse
+import importlib
+import time
+import numpy as np
+
+from predict_benchmark import GAMES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--game', default='othello', choices=['othello', 'gobang', 'connect4'])
+    parser.add_argument('--examples', type=int, default=20000)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--augment', action='store_true')
+    options = parser.parse_args()
+
+    module, name, game_args = GAMES[options.game]
+    game = getattr(importlib.import_module(module), name)(*game_args)
+    board_x, board_y = game.getBoardSize()
+    rng = np.random.RandomState(0)
+    pis = rng.rand(options.examples, game.getActionSize())
+    pis /= pis.sum(axis=1, keepdims=True)
+    examples = [(rng.randint(-1, 2, size=(board_x, board_y)), list(pi), float(rng.choice([-1, 1]))) for pi in pis]
+
+    NNet = importlib.import_module('{}.tensorflow.NNet'.format(options.game))
+    NNet.args.epochs = options.epochs
+    NNet.args.augment = options.augment
+    nnet = NNet.NNetWrapper(game)
+    for tf_data in [False, True]:
+        NNet.args.tf_data = tf_data
+        start = time.time()
+        nnet.train(examples)
+        rate = options.examples * options.epochs / (time.time() - start)
+        print('{}: {:.0f} examples/sec'.format('tf.data' if tf_data else 'feed_dict', rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import enum
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from simulation.core import board
+from simulation.core import common
+from simulation.core import player as player_module
+from simulation import utils
+
+# Number of terrains which can be transformed into each other. Transforming
+# between two terrains costs one spade per step around the terrain cycle.
+_NUM_LAND_TERRAINS = len(common.Terrain) - 1
+
+# The structures which a player can upgrade to, in action space order.
+UPGRADES: Tuple[common.Structure, ...] = (
+    common.Structure.TRADING_POST,
+    common.Structure.TEMPLE,
+    common.Structure.STRONGHOLD,
+    common.Structure.SANCTUARY,
+)
+
+
+def spades_required(current: common.Terrain, target: common.Terrain) -> int:
+  """Returns the number of spades needed to transform current into target."""
+  return _SPADES[(current, target)]
+
+
+_SPADES: Dict[Tuple[common.Terrain, common.Terrain], int] = {
+    (current, target):
+    min(abs(current.index - target.index),
+        _NUM_LAND_TERRAINS - abs(current.index - target.index))
+    for current in common.Terrain for target in common.Terrain
+    if common.Terrain.WATER not in (current, target)
+}
+
+
+@enum.unique
+class ActionType(common.IndexedEnum):
+  """The types of actions a player can take on his turn."""
+  # Transform a tile to the home terrain (if needed) and build a dwelling.
+  BUILD = enum.auto()
+  # Transform a tile to the home terrain without building on it.
+  TRANSFORM = enum.auto()
+  # Upgrade an existing structure.
+  UPGRADE = enum.auto()
+  # Send a priest to a cult track.
+  CULT = enum.auto()
+  # Pass, taking the given bonus card.
+  PASS = enum.auto()
+
+
+class Action(NamedTuple):
+  """A single action. Only the fields relevant to the type are set."""
+  type: ActionType
+  tile: Optional[board.Position] = None
+  structure: Optional[common.Structure] = None
+  track: Optional[common.CultTrack] = None
+  bonus_card: Optional[common.BonusCard] = None
+
+
+class ActionSpace:
+  """A fixed enumeration of all possible actions on a given board.
+
+  Action i corresponds to bit i of the masks returned by legal_actions().
+  The layout is:
+    BUILD   : one per land tile.
+    TRANSFORM: one per land tile.
+    UPGRADE : one per (land tile, upgrade in UPGRADES).
+    CULT    : one per cult track.
+    PASS    : one per bonus card.
+  """
+
+  def __init__(self, game_board: board.GameBoard) -> None:
+    self.tiles: Tuple[board.Position, ...] = game_board.land_tiles()
+    num_tiles = len(self.tiles)
+    self.build_offset = 0
+    self.transform_offset = self.build_offset + num_tiles
+    self.upgrade_offset = self.transform_offset + num_tiles
+    self.cult_offset = self.upgrade_offset + num_tiles * len(UPGRADES)
+    self.pass_offset = self.cult_offset + len(common.CultTrack)
+    self.size = self.pass_offset + len(common.BonusCard)
+
+  def build(self, tile: int) -> int:
+    return self.build_offset + tile
+
+  def transform(self, tile: int) -> int:
+    return self.transform_offset + tile
+
+  def upgrade(self, tile: int, structure: common.Structure) -> int:
+    return (self.upgrade_offset + tile * len(UPGRADES) +
+            _UPGRADE_INDEX[structure])
+
+  def cult(self, track: common.CultTrack) -> int:
+    return self.cult_offset + track.index
+
+  def pass_turn(self, card: common.BonusCard) -> int:
+    return self.pass_offset + card.index
+
+  def decode(self, index: int) -> Action:
+    """Returns the action with the given index."""
+    if index < 0 or index >= self.size:
+      raise utils.InternalError("Action %s is out of range." % index)
+    if index >= self.pass_offset:
+      return Action(ActionType.PASS,
+                    bonus_card=common.BonusCard.from_index(index -
+                                                           self.pass_offset))
+    if index >= self.cult_offset:
+      return Action(ActionType.CULT,
+                    track=common.CultTrack.from_index(index -
+                                                      self.cult_offset))
+    if index >= self.upgrade_offset:
+      tile, upgrade = divmod(index - self.upgrade_offset, len(UPGRADES))
+      return Action(ActionType.UPGRADE,
+                    tile=self.tiles[tile],
+                    structure=UPGRADES[upgrade])
+    if index >= self.transform_offset:
+      return Action(ActionType.TRANSFORM,
+                    tile=self.tiles[index - self.transform_offset])
+    return Action(ActionType.BUILD, tile=self.tiles[index - self.build_offset])
+
+
+_UPGRADE_INDEX: Dict[common.Structure, int] = {
+    structure: i
+    for i, structure in enumerate(UPGRADES)
+}
+
+
+def iterate_mask(mask: int) -> Iterator[int]:
+  """Yields the indexes of the bits set in the mask, in increasing order."""
+  while mask:
+    lowest = mask & -mask
+    yield lowest.bit_length() - 1
+    mask ^= lowest
+
+
+def mask_to_list(mask: int) -> List[int]:
+  """Returns the indexes of the bits set in the mask."""
+  return list(iterate_mask(mask))
+
+
+def legal_actions(space: ActionSpace, game_board: board.GameBoard,
+                  player: player_module.Player,
+                  available_bonus_cards: List[common.BonusCard]) -> int:
+  """Returns a bitmask over the action space with the legal actions for the
+  player."""
+  mask = 0
+  home: common.Terrain = player.faction.home_terrain()
+
+  # Transforming and building. Affordability only depends on the number of
+  # spades, so we compute it once per spade count.
+  can_build: Dict[int, bool] = {}
+  can_transform: Dict[int, bool] = {}
+  has_dwellings = player.structures[common.Structure.DWELLING] > 0
+  dwelling_cost = player.faction.structure_cost(common.Structure.DWELLING,
+                                                adjacentEnemyStructure=False)
+  for tile in game_board.reachable_tiles(home, player.shipping):
+    if game_board.tile_structure(tile) is not None:
+      continue
+    spades = _SPADES[(game_board.tile_terrain(tile), home)]
+    if spades not in can_build:
+      spade_cost = player.spade_cost(spades)
+      can_build[spades] = has_dwellings and player.can_afford(spade_cost +
+                                                              dwelling_cost)
+      can_transform[spades] = spades > 0 and player.can_afford(spade_cost)
+    if can_build[spades]:
+      mask |= 1 << space.build(tile)
+    if can_transform[spades]:
+      mask |= 1 << space.transform(tile)
+
+  # Upgrades. The cost of a trading post depends on the neighbors.
+  for tile in game_board.structure_tiles(home):
+    existing = game_board.tile_structure(tile)
+    assert existing is not None
+    adjacent: Optional[bool] = None
+    for structure in UPGRADES:
+      if not existing.is_upgradeable_to(structure):
+        continue
+      if adjacent is None:
+        adjacent = has_adjacent_opponents(game_board, tile, home)
+      if player.can_build(structure, adjacent):
+        mask |= 1 << space.upgrade(tile, structure)
+
+  # Cult tracks.
+  if player.resources.priests > 0:
+    for track in common.CultTrack:
+      mask |= 1 << space.cult(track)
+
+  # Passing.
+  for card in available_bonus_cards:
+    mask |= 1 << space.pass_turn(card)
+  return mask
+
+
+def has_adjacent_opponents(game_board: board.GameBoard, tile: int,
+                           home: common.Terrain) -> bool:
+  """True if a structure not on the home terrain is adjacent to the tile."""
+  for terrain in common.Terrain:
+    if terrain != home and game_board.has_adjacent_structure(tile, terrain):
+      return True
+  return False
@@ -0,0 +1,208 @@
+import random
+import unittest
+
+from typing import List, Optional
+
+from unittest import mock
+
+from simulation.core import actions
+from simulation.core import board
+from simulation.core import common
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player
+from simulation.interface import io
+from simulation import utils
+
+
+def _pos(name: str) -> board.Position:
+  pos: Optional[board.Position] = board.ParsePosition(name)
+  assert pos is not None
+  return pos
+
+
+def _new_game(bonus_cards: List[common.BonusCard]) -> gameplay.Game:
+  players = [
+      player.Player("halflings", faction.Halflings()),
+      player.Player("engineers", faction.Engineers())
+  ]
+  return gameplay.Game(players=players,
+                       scoring_tiles=[],
+                       bonus_cards=bonus_cards,
+                       interface=mock.Mock(auto_spec=io.IO))
+
+
+def _place_dwelling(game: gameplay.Game, pl: player.Player, name: str) -> None:
+  game.board.build(_pos(name), common.Structure.DWELLING)
+  pl.build(common.Structure.DWELLING, adjacentEnemies=False, free=True)
+
+
+class TestSpades(unittest.TestCase):
+  def test_spades_required(self) -> None:
+    self.assertEqual(
+        actions.spades_required(common.Terrain.PLAIN, common.Terrain.PLAIN), 0)
+    self.assertEqual(
+        actions.spades_required(common.Terrain.PLAIN, common.Terrain.SWAMP), 1)
+    self.assertEqual(
+        actions.spades_required(common.Terrain.PLAIN, common.Terrain.DESERT),
+        1)
+    self.assertEqual(
+        actions.spades_required(common.Terrain.PLAIN, common.Terrain.FOREST),
+        3)
+    self.assertEqual(
+        actions.spades_required(common.Terrain.LAKE, common.Terrain.DESERT), 3)
+    for current in common.Terrain:
+      for target in common.Terrain:
+        if common.Terrain.WATER in (current, target):
+          continue
+        self.assertEqual(actions.spades_required(current, target),
+                         actions.spades_required(target, current))
+
+
+class TestActionSpace(unittest.TestCase):
+  def test_decode_round_trip(self) -> None:
+    space = actions.ActionSpace(board.GameBoard())
+    self.assertEqual(
+        space.size,
+        len(space.tiles) * (2 + len(actions.UPGRADES)) +
+        len(common.CultTrack) + len(common.BonusCard))
+    for index in range(space.size):
+      action = space.decode(index)
+      if action.type == actions.ActionType.BUILD:
+        assert action.tile is not None
+        encoded = space.build(space.tiles.index(action.tile))
+      elif action.type == actions.ActionType.TRANSFORM:
+        assert action.tile is not None
+        encoded = space.transform(space.tiles.index(action.tile))
+      elif action.type == actions.ActionType.UPGRADE:
+        assert action.tile is not None and action.structure is not None
+        encoded = space.upgrade(space.tiles.index(action.tile),
+                                action.structure)
+      elif action.type == actions.ActionType.CULT:
+        assert action.track is not None
+        encoded = space.cult(action.track)
+      else:
+        assert action.bonus_card is not None
+        encoded = space.pass_turn(action.bonus_card)
+      self.assertEqual(encoded, index)
+
+    with self.assertRaises(utils.InternalError):
+      space.decode(space.size)
+
+  def test_mask_to_list(self) -> None:
+    self.assertEqual(actions.mask_to_list(0), [])
+    self.assertEqual(actions.mask_to_list(0b10110), [1, 2, 4])
+    self.assertEqual(actions.mask_to_list(1 << 200), [200])
+
+
+class TestLegalActions(unittest.TestCase):
+  def setUp(self) -> None:
+    self.game = _new_game([common.BonusCard.PRIEST, common.BonusCard.COIN6])
+    self.halflings, self.engineers = self.game.players
+    self.space = self.game.action_space
+
+  def _actions(self, pl: player.Player) -> List[actions.Action]:
+    return [
+        self.space.decode(index)
+        for index in actions.mask_to_list(self.game.legal_actions(pl))
+    ]
+
+  def test_only_pass_without_structures(self) -> None:
+    self.assertCountEqual(self._actions(self.halflings), [
+        actions.Action(actions.ActionType.PASS,
+                       bonus_card=common.BonusCard.PRIEST),
+        actions.Action(actions.ActionType.PASS,
+                       bonus_card=common.BonusCard.COIN6),
+    ])
+
+  def test_build_transform_and_upgrade(self) -> None:
+    _place_dwelling(self.game, self.engineers, "C5")
+    # Engineers start with 2 workers and 10 coins. The neighbors B4 (PLAIN)
+    # and B5 (SWAMP) both need 3 spades, which they can't afford.
+    self.assertCountEqual(self._actions(self.engineers), [
+        actions.Action(actions.ActionType.UPGRADE,
+                       tile=_pos("C5"),
+                       structure=common.Structure.TRADING_POST),
+        actions.Action(actions.ActionType.PASS,
+                       bonus_card=common.BonusCard.PRIEST),
+        actions.Action(actions.ActionType.PASS,
+                       bonus_card=common.BonusCard.COIN6),
+    ])
+
+    # With more workers (and a shipping level) many more tiles are available.
+    self.engineers.resources.workers = 10
+    self.engineers.shipping = 1
+    legal = self._actions(self.engineers)
+    self.assertIn(actions.Action(actions.ActionType.BUILD, tile=_pos("B4")),
+                  legal)
+    self.assertIn(actions.Action(actions.ActionType.BUILD, tile=_pos("E6")),
+                  legal)
+    self.assertIn(
+        actions.Action(actions.ActionType.TRANSFORM, tile=_pos("E6")), legal)
+    # Mountain needs no spades, so it can't be transformed.
+    self.assertNotIn(
+        actions.Action(actions.ActionType.TRANSFORM, tile=_pos("C5")), legal)
+
+  def test_cult_actions_require_priests(self) -> None:
+    self.halflings.resources.priests = 1
+    self.assertCountEqual([
+        action.track for action in self._actions(self.halflings)
+        if action.type == actions.ActionType.CULT
+    ], list(common.CultTrack))
+
+  def test_apply_build(self) -> None:
+    _place_dwelling(self.game, self.halflings, "A1")
+    # A2 is a mountain, 3 spades away from the halflings' plains.
+    b1 = self.space.build(self.game.board.tile_index(_pos("B1")))
+    self.assertTrue((self.game.legal_actions(self.halflings) >> b1) & 1)
+    self.game.apply_action(self.halflings, b1)
+    self.assertEqual(self.game.board.get_terrain(_pos("B1")),
+                     common.Terrain.PLAIN)
+    self.assertEqual(self.game.board.get_structure(_pos("B1")),
+                     common.Structure.DWELLING)
+    # One spade (3 workers) and a dwelling (1 worker, 2 coins).
+    self.assertEqual(self.halflings.resources,
+                     common.Resources(coins=13, workers=0))
+    self.assertEqual(
+        self.halflings.built_structures[common.Structure.DWELLING], 2)
+
+  def test_apply_upgrade(self) -> None:
+    _place_dwelling(self.game, self.halflings, "A1")
+    upgrade = self.space.upgrade(self.game.board.tile_index(_pos("A1")),
+                                 common.Structure.TRADING_POST)
+    self.game.apply_action(self.halflings, upgrade)
+    self.assertEqual(self.game.board.get_structure(_pos("A1")),
+                     common.Structure.TRADING_POST)
+    self.assertEqual(
+        self.halflings.built_structures[common.Structure.DWELLING], 0)
+    self.assertEqual(
+        self.halflings.built_structures[common.Structure.TRADING_POST], 1)
+    self.assertEqual(self.halflings.structures[common.Structure.DWELLING], 8)
+
+  def test_apply_pass(self) -> None:
+    self.game.apply_action(self.halflings,
+                           self.space.pass_turn(common.BonusCard.COIN6))
+    self.assertEqual(self.halflings.bonus_card, common.BonusCard.COIN6)
+    self.assertEqual(self.game.available_bonus_cards,
+                     [common.BonusCard.PRIEST])
+
+  def test_random_legal_actions_can_be_applied(self) -> None:
+    rng = random.Random(0)
+    for _ in range(20):
+      game = _new_game(list(common.BonusCard))
+      game_journal = game.enable_journal()
+      _place_dwelling(game, game.players[0], "A1")
+      _place_dwelling(game, game.players[1], "C5")
+      for _ in range(30):
+        for pl in game.players:
+          pl.resources += common.Resources(coins=2, workers=2, priests=1)
+          legal = actions.mask_to_list(game.legal_actions(pl))
+          mark = game_journal.mark()
+          for action in legal:
+            game.apply_action(pl, action)
+            game_journal.undo_to(mark)
+          game.apply_action(pl, rng.choice(legal))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,342 @@
+"""Vectorized representations of simulation state for many players at once.
+
+Resources and incomes of N players are stored as (N, len(FIELDS)) integer
+arrays whose columns follow common.Resources.FIELDS and common.Income.FIELDS.
+All arithmetic is done in place on the arrays.
+"""
+import itertools
+
+from typing import Dict, List, Optional, Sequence, Type
+
+import numpy as np
+
+from simulation.core import common
+from simulation.core import faction as faction_module
+from simulation.core import player as player_module
+from simulation import utils
+
+DTYPE = np.int32
+
+# Column indexes for resource and income arrays.
+COINS: int = common.Income.FIELDS.index('coins')
+WORKERS: int = common.Income.FIELDS.index('workers')
+BRIDGES: int = common.Income.FIELDS.index('bridges')
+PRIESTS: int = common.Income.FIELDS.index('priests')
+POWER: int = common.Income.FIELDS.index('power')
+
+NUM_RESOURCES: int = len(common.Resources.FIELDS)
+NUM_INCOME: int = len(common.Income.FIELDS)
+NUM_BOWLS: int = len(common.PowerBowl)
+NUM_STRUCTURES: int = len(common.Structure)
+
+# The power needed to make up for one missing coin, worker, bridge and priest.
+# Missing bridges can't be paid for with power.
+_POWER_PER_RESOURCE = np.array([1, 3, 0, 5], dtype=DTYPE)
+
+
+def resources_to_array(resources: Sequence[common.Resources]) -> np.ndarray:
+  """Returns a (len(resources), NUM_RESOURCES) array."""
+  array = np.zeros((len(resources), NUM_RESOURCES), dtype=DTYPE)
+  for i, resource in enumerate(resources):
+    array[i] = resource.to_vector()
+  return array
+
+
+def array_to_resources(array: np.ndarray) -> List[common.Resources]:
+  """Inverse of resources_to_array()."""
+  return [common.Resources.from_vector(row) for row in array.tolist()]
+
+
+def incomes_to_array(incomes: Sequence[common.Income]) -> np.ndarray:
+  """Returns a (len(incomes), NUM_INCOME) array."""
+  array = np.zeros((len(incomes), NUM_INCOME), dtype=DTYPE)
+  for i, income in enumerate(incomes):
+    array[i] = income.to_vector()
+  return array
+
+
+def array_to_incomes(array: np.ndarray) -> List[common.Income]:
+  """Inverse of incomes_to_array()."""
+  return [common.Income.from_vector(row) for row in array.tolist()]
+
+
+def is_valid(resources: np.ndarray) -> np.ndarray:
+  """Batched common.Resources.is_valid(). Returns a boolean array."""
+  result: np.ndarray = np.all(resources >= 0, axis=-1)
+  return result
+
+
+def force_valid(resources: np.ndarray) -> None:
+  """Batched common.Resources.force_valid(). Modifies resources in place."""
+  np.maximum(resources, 0, out=resources)
+
+
+def add_resources(resources: np.ndarray, other: np.ndarray) -> None:
+  """Batched common.Resources.__iadd__. other may be a single vector, which
+  is then added to every row."""
+  resources += other
+
+
+def subtract_resources(resources: np.ndarray, other: np.ndarray) -> None:
+  """Batched common.Resources.__isub__. other may be a single vector, which
+  is then subtracted from every row."""
+  resources -= other
+
+
+def add_income_resources(resources: np.ndarray, incomes: np.ndarray) -> None:
+  """Adds the resource columns of incomes to resources, in place. The power
+  column is ignored since it must be gained through the power bowls."""
+  resources += incomes[..., :NUM_RESOURCES]
+
+
+def _income_table(faction: faction_module.Faction) -> np.ndarray:
+  """Returns an array indexed by the number of built structures of each type
+  (in common.Structure index order) with the corresponding income vectors."""
+  totals = [
+      faction_module.Faction.TOTAL_STRUCTURES[structure]
+      for structure in common.Structure
+  ]
+  table = np.zeros([total + 1 for total in totals] + [NUM_INCOME], dtype=DTYPE)
+  for counts in itertools.product(*[range(total + 1) for total in totals]):
+    table[counts] = faction.income_vector_for_structures(
+        dict(zip(common.Structure, counts)))
+  return table
+
+
+def _cost_table(faction: faction_module.Faction) -> np.ndarray:
+  """Returns a (NUM_STRUCTURES, 2, NUM_RESOURCES) array with the cost of each
+  structure without and with adjacent enemy structures."""
+  table = np.zeros((NUM_STRUCTURES, 2, NUM_RESOURCES), dtype=DTYPE)
+  for structure in common.Structure:
+    for adjacent in (False, True):
+      table[structure.index, int(adjacent)] = faction.structure_cost_vector(
+          structure, adjacent)
+  return table
+
+
+# Cache of _income_table() and _cost_table(), by faction class.
+_FACTION_TABLES: Dict[Type[faction_module.Faction], Sequence[np.ndarray]] = {}
+
+
+def _faction_tables(faction: faction_module.Faction) -> Sequence[np.ndarray]:
+  tables = _FACTION_TABLES.get(type(faction))
+  if tables is None:
+    tables = (_income_table(faction), _cost_table(faction))
+    _FACTION_TABLES[type(faction)] = tables
+  return tables
+
+
+class PlayerBatch:
+  """The economic state of N players stored as arrays, one row per player.
+
+  Operations mirror the methods of player.Player with the same names but
+  apply to every row at once. Amounts are given as arrays with one entry per
+  player; rows which should not change simply use an amount of zero (or are
+  excluded with a boolean mask where noted).
+
+  Only the state needed by these operations is kept: power bowls,
+  resources, available and built structures, priests still in play and the
+  extra income (from bonus cards and favor tiles) of each player.
+  """
+
+  def __init__(self, factions: Sequence[faction_module.Faction]) -> None:
+    num_players = len(factions)
+    # Columns follow common.PowerBowl index order.
+    self.power = np.zeros((num_players, NUM_BOWLS), dtype=DTYPE)
+    # Columns follow common.Resources.FIELDS.
+    self.resources = np.zeros((num_players, NUM_RESOURCES), dtype=DTYPE)
+    # Columns follow common.Structure index order.
+    self.structures = np.zeros((num_players, NUM_STRUCTURES), dtype=DTYPE)
+    self.built_structures = np.zeros((num_players, NUM_STRUCTURES),
+                                     dtype=DTYPE)
+    self.priests_still_in_play = np.zeros(num_players, dtype=DTYPE)
+    # Income from bonus cards and favor tiles, added to the income of the
+    # structures during collect_phase_ii_income().
+    self.extra_income = np.zeros((num_players, NUM_INCOME), dtype=DTYPE)
+
+    # The tables of all distinct factions are stacked so that rows can look
+    # up their faction's values with a single gather.
+    ids: Dict[Type[faction_module.Faction], int] = {}
+    tables: List[Sequence[np.ndarray]] = []
+    for faction in factions:
+      if type(faction) not in ids:
+        ids[type(faction)] = len(tables)
+        tables.append(_faction_tables(faction))
+    self._faction_ids = np.array([ids[type(faction)] for faction in factions],
+                                 dtype=np.intp)
+    self._income_tables = np.stack([income for income, _ in tables])
+    self._cost_tables = np.stack([cost for _, cost in tables])
+    self._rows = np.arange(num_players)
+
+  @staticmethod
+  def from_players(players: Sequence[player_module.Player]) -> 'PlayerBatch':
+    """Returns a batch with the state of the given players."""
+    players_batch = PlayerBatch([pl.faction for pl in players])
+    for i, pl in enumerate(players):
+      players_batch.power[i] = [pl.power[bowl] for bowl in common.PowerBowl]
+      players_batch.resources[i] = pl.resources.to_vector()
+      players_batch.structures[i] = [
+          pl.structures[structure] for structure in common.Structure
+      ]
+      players_batch.built_structures[i] = [
+          pl.built_structures[structure] for structure in common.Structure
+      ]
+      players_batch.priests_still_in_play[i] = pl.priests_still_in_play
+      if pl.bonus_card is not None:
+        players_batch.extra_income[i] += pl.bonus_card.income_vector()
+      for tile in pl.favor_tiles:
+        players_batch.extra_income[i] += tile.income_vector()
+    return players_batch
+
+  def to_players(self, players: Sequence[player_module.Player]) -> None:
+    """Writes the state of the batch back into the given players."""
+    if len(players) != len(self._rows):
+      raise utils.InternalError("Expected %s players, got %s." %
+                                (len(self._rows), len(players)))
+    for i, pl in enumerate(players):
+      power = self.power[i].tolist()
+      for bowl in common.PowerBowl:
+        pl.power[bowl] = power[bowl.index]
+      pl.resources = common.Resources.from_vector(self.resources[i].tolist())
+      for structure in common.Structure:
+        pl.structures[structure] = int(self.structures[i, structure.index])
+        pl.built_structures[structure] = int(
+            self.built_structures[i, structure.index])
+      pl.priests_still_in_play = int(self.priests_still_in_play[i])
+
+  def __len__(self) -> int:
+    return len(self._rows)
+
+  def max_useable_power(self) -> np.ndarray:
+    result: np.ndarray = (self.power[:, common.PowerBowl.III.index] +
+                          self.power[:, common.PowerBowl.II.index] // 2)
+    return result
+
+  def can_use_power(self, amount: np.ndarray) -> np.ndarray:
+    """Batched Player.can_use_power(). Returns a boolean array."""
+    result: np.ndarray = self.max_useable_power() >= amount
+    return result
+
+  def gain_power(self, amount: np.ndarray) -> None:
+    """Batched Player.gain_power()."""
+    remaining = np.array(amount, dtype=DTYPE)
+    if np.any(remaining < 0):
+      raise utils.InternalError("Can't gain negative power: %s" % amount)
+    bowl_i = self.power[:, common.PowerBowl.I.index]
+    bowl_ii = self.power[:, common.PowerBowl.II.index]
+    bowl_iii = self.power[:, common.PowerBowl.III.index]
+    to_move = np.minimum(bowl_i, remaining)
+    bowl_i -= to_move
+    bowl_ii += to_move
+    remaining -= to_move
+    to_move = np.minimum(bowl_ii, remaining)
+    bowl_ii -= to_move
+    bowl_iii += to_move
+    remaining -= to_move
+    # Excess power is converted to coins, two power per coin. A remaining odd
+    # power is spent by moving one power back from bowl III to bowl II.
+    odd = remaining % 2
+    bowl_iii -= odd
+    bowl_ii += odd
+    self.resources[:, COINS] += remaining // 2 + odd
+
+  def use_power(self, amount: np.ndarray) -> None:
+    """Batched Player.use_power(). Raises an error if any of the players
+    doesn't have enough power. Using no power is always possible."""
+    remaining = np.array(amount, dtype=DTYPE)
+    possible = (remaining == 0) | self.can_use_power(remaining)
+    if np.any(remaining < 0) or not np.all(possible):
+      raise utils.InternalError(
+          "Requesting to use %s power, which is not possible! Current "
+          "power: %s." % (amount, self.power))
+    bowl_i = self.power[:, common.PowerBowl.I.index]
+    bowl_ii = self.power[:, common.PowerBowl.II.index]
+    bowl_iii = self.power[:, common.PowerBowl.III.index]
+    # Power is used from bowl III first, and then by burning bowl II.
+    to_move = np.minimum(remaining, bowl_iii)
+    bowl_iii -= to_move
+    bowl_i += to_move
+    remaining -= to_move
+    to_move = np.minimum(2 * remaining, bowl_ii)
+    bowl_ii -= to_move
+    bowl_i += to_move // 2
+
+  def _power_required_to_zero_negative_resources(self, resources: np.ndarray
+                                                 ) -> np.ndarray:
+    result: np.ndarray = np.maximum(-resources, 0) @ _POWER_PER_RESOURCE
+    return result
+
+  def can_afford(self, cost: np.ndarray) -> np.ndarray:
+    """Batched Player.can_afford(). cost may be a single vector. Returns a
+    boolean array."""
+    remaining = self.resources - cost
+    result: np.ndarray = is_valid(remaining) | (
+        self.max_useable_power() >=
+        self._power_required_to_zero_negative_resources(remaining))
+    return result
+
+  def pay(self, cost: np.ndarray) -> None:
+    """Batched Player.pay(). cost may be a single vector. Raises an error if
+    any of the players can't afford it."""
+    if not np.all(self.can_afford(cost)):
+      raise utils.InternalError(
+          "Attempted to pay %s which is impossible with current "
+          "resources: %s and power: %s" % (cost, self.resources, self.power))
+    self.resources -= cost
+    self.use_power(
+        self._power_required_to_zero_negative_resources(self.resources))
+    force_valid(self.resources)
+
+  def structure_cost(self, structure: common.Structure,
+                     adjacentEnemies: np.ndarray) -> np.ndarray:
+    """Returns the (N, NUM_RESOURCES) cost for each player to build the
+    structure, given whether it's adjacent to enemy structures."""
+    result: np.ndarray = self._cost_tables[self._faction_ids, structure.index,
+                                           np.asarray(adjacentEnemies,
+                                                      dtype=np.intp)]
+    return result
+
+  def can_build(self, structure: common.Structure,
+                adjacentEnemies: np.ndarray) -> np.ndarray:
+    """Batched Player.can_build(). Returns a boolean array."""
+    result: np.ndarray = (self.structures[:, structure.index] > 0) & (
+        self.can_afford(self.structure_cost(structure, adjacentEnemies)))
+    return result
+
+  def build(self,
+            structure: common.Structure,
+            adjacentEnemies: np.ndarray,
+            mask: Optional[np.ndarray] = None) -> None:
+    """Batched Player.build(). Only the players selected by the boolean mask
+    (all by default) build the structure and pay for it. Raises an error if
+    any of them can't."""
+    if mask is None:
+      mask = np.ones(len(self), dtype=bool)
+    if not np.all(self.can_build(structure, adjacentEnemies)[mask]):
+      raise utils.InternalError(
+          "Attempted to build %s which is impossible with current "
+          "resources: %s and power: %s" %
+          (structure, self.resources, self.power))
+    selected = mask.astype(DTYPE)
+    self.structures[:, structure.index] -= selected
+    self.built_structures[:, structure.index] += selected
+    self.pay(
+        self.structure_cost(structure, adjacentEnemies) * selected[:, None])
+
+  def income(self) -> np.ndarray:
+    """Returns the (N, NUM_INCOME) income of each player for their built
+    structures, bonus card and favor tiles."""
+    counts = tuple(self.built_structures.T)
+    result: np.ndarray = (self._income_tables[(self._faction_ids, ) + counts] +
+                          self.extra_income)
+    return result
+
+  def collect_phase_ii_income(self) -> None:
+    """Batched Player.collect_phase_ii_income()."""
+    income = self.income()
+    add_income_resources(self.resources, income)
+    # The number of priests that can be collected is bound.
+    np.minimum(self.resources[:, PRIESTS],
+               self.priests_still_in_play,
+               out=self.resources[:, PRIESTS])
+    self.gain_power(income[:, POWER])
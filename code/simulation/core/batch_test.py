@@ -0,0 +1,191 @@
+import random
+import unittest
+
+from typing import List
+
+import numpy as np
+
+from simulation.core import batch
+from simulation.core import common
+from simulation.core import faction
+from simulation.core import player
+from simulation import utils
+
+
+def _random_resources() -> common.Resources:
+  return common.Resources(coins=random.randint(-5, 20),
+                          workers=random.randint(-5, 10),
+                          bridges=random.randint(-1, 3),
+                          priests=random.randint(-2, 7))
+
+
+class TestResourceArrays(unittest.TestCase):
+  def setUp(self) -> None:
+    random.seed(0)
+
+  def test_round_trip(self) -> None:
+    resources = [_random_resources() for _ in range(10)]
+    array = batch.resources_to_array(resources)
+    self.assertEqual(array.shape, (10, batch.NUM_RESOURCES))
+    self.assertEqual(batch.array_to_resources(array), resources)
+
+    incomes = [
+        common.Income(coins=i, priests=1, power=2 * i) for i in range(5)
+    ]
+    self.assertEqual(batch.array_to_incomes(batch.incomes_to_array(incomes)),
+                     incomes)
+
+  def test_matches_scalar_operations(self) -> None:
+    resources = [_random_resources() for _ in range(50)]
+    others = [_random_resources() for _ in range(50)]
+    array = batch.resources_to_array(resources)
+
+    self.assertEqual(list(batch.is_valid(array)),
+                     [bool(r.is_valid()) for r in resources])
+
+    batch.add_resources(array, batch.resources_to_array(others))
+    batch.subtract_resources(array, np.array([1, 1, 0, 0]))
+    for resource, other in zip(resources, others):
+      resource += other
+      resource -= common.Resources(coins=1, workers=1)
+    self.assertEqual(batch.array_to_resources(array), resources)
+
+    batch.force_valid(array)
+    for resource in resources:
+      resource.force_valid()
+    self.assertEqual(batch.array_to_resources(array), resources)
+
+  def test_add_income_resources(self) -> None:
+    array = batch.resources_to_array([common.Resources(coins=1)] * 3)
+    income = batch.incomes_to_array([common.Income(coins=2, power=5)])
+    batch.add_income_resources(array, income[0])
+    self.assertEqual(batch.array_to_resources(array),
+                     [common.Resources(coins=3)] * 3)
+
+
+def _random_player() -> player.Player:
+  test_player = player.Player(
+      "test", random.choice([faction.Halflings(),
+                             faction.Engineers()]))
+  total = random.randint(1, 20)
+  bowl_i = random.randint(0, total)
+  bowl_ii = random.randint(0, total - bowl_i)
+  test_player.power = {
+      common.PowerBowl.I: bowl_i,
+      common.PowerBowl.II: bowl_ii,
+      common.PowerBowl.III: total - bowl_i - bowl_ii,
+  }
+  test_player.resources = common.Resources(coins=random.randint(0, 15),
+                                           workers=random.randint(0, 8),
+                                           priests=random.randint(0, 3))
+  for structure, count in faction.Faction.TOTAL_STRUCTURES.items():
+    built = random.randint(0, count)
+    test_player.built_structures[structure] = built
+    test_player.structures[structure] = count - built
+  test_player.priests_still_in_play = random.randint(3, 7)
+  test_player.bonus_card = random.choice(list(common.BonusCard))
+  test_player.favor_tiles = random.sample(list(common.FavorTile), 2)
+  return test_player
+
+
+class TestPlayerBatch(unittest.TestCase):
+  def setUp(self) -> None:
+    random.seed(0)
+    self.players = [_random_player() for _ in range(40)]
+    self.batch = batch.PlayerBatch.from_players(self.players)
+
+  def _assert_matches_players(self) -> None:
+    expected = batch.PlayerBatch.from_players(self.players)
+    for name in [
+        'power', 'resources', 'structures', 'built_structures',
+        'priests_still_in_play', 'extra_income'
+    ]:
+      np.testing.assert_array_equal(getattr(self.batch, name),
+                                    getattr(expected, name),
+                                    err_msg=name)
+
+  def test_round_trip(self) -> None:
+    self._assert_matches_players()
+    others = [_random_player() for _ in self.players]
+    self.batch.to_players(others)
+    for pl, other in zip(self.players, others):
+      self.assertEqual(pl.power, other.power)
+      self.assertEqual(pl.resources, other.resources)
+      self.assertEqual(pl.structures, other.structures)
+      self.assertEqual(pl.built_structures, other.built_structures)
+    with self.assertRaises(utils.InternalError):
+      self.batch.to_players(others[1:])
+
+  def test_income(self) -> None:
+    for i, pl in enumerate(self.players):
+      income = pl.faction.income_for_structures(pl.built_structures)
+      assert pl.bonus_card is not None
+      income += pl.bonus_card.player_income()
+      for tile in pl.favor_tiles:
+        income += tile.player_income()
+      self.assertEqual(common.Income.from_vector(self.batch.income()[i]),
+                       income)
+
+  def test_matches_scalar_player(self) -> None:
+    num_players = len(self.players)
+    for _ in range(200):
+      operation = random.randrange(5)
+      if operation == 0:
+        amounts = [random.randint(0, 12) for _ in self.players]
+        for pl, amount in zip(self.players, amounts):
+          pl.gain_power(amount)
+        self.batch.gain_power(np.array(amounts))
+      elif operation == 1:
+        amounts = [
+            random.randint(0, pl._max_useable_power()) for pl in self.players
+        ]
+        for pl, amount in zip(self.players, amounts):
+          pl.use_power(amount)
+        self.batch.use_power(np.array(amounts))
+      elif operation == 2:
+        costs = batch.resources_to_array([
+            common.Resources(coins=random.randint(0, 8),
+                             workers=random.randint(0, 4),
+                             priests=random.randint(0, 1))
+            for _ in self.players
+        ])
+        affordable = self.batch.can_afford(costs)
+        self.assertEqual(list(affordable), [
+            pl.can_afford(common.Resources.from_vector(cost))
+            for pl, cost in zip(self.players, costs.tolist())
+        ])
+        costs[~affordable] = 0
+        for pl, cost in zip(self.players, costs.tolist()):
+          pl.pay(common.Resources.from_vector(cost))
+        self.batch.pay(costs)
+      elif operation == 3:
+        structure = random.choice(list(common.Structure))
+        adjacent = np.array(
+            [random.random() < 0.5 for _ in range(num_players)])
+        mask = self.batch.can_build(structure, adjacent)
+        self.assertEqual(list(mask), [
+            pl.can_build(structure, bool(adj))
+            for pl, adj in zip(self.players, adjacent)
+        ])
+        for pl, adj, selected in zip(self.players, adjacent, mask):
+          if selected:
+            pl.build(structure, bool(adj))
+        self.batch.build(structure, adjacent, mask)
+      else:
+        for pl in self.players:
+          pl.collect_phase_ii_income()
+        self.batch.collect_phase_ii_income()
+      self._assert_matches_players()
+
+  def test_invalid_operations(self) -> None:
+    with self.assertRaises(utils.InternalError):
+      self.batch.use_power(self.batch.max_useable_power() + 1)
+    with self.assertRaises(utils.InternalError):
+      self.batch.gain_power(np.full(len(self.players), -1))
+    with self.assertRaises(utils.InternalError):
+      self.batch.pay(np.array([100, 0, 0, 0]))
+    self._assert_matches_players()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,10 +1,24 @@
 import collections
+import operator
 
-from typing import Dict, NamedTuple, List, Optional, Set, Tuple
+from typing import AbstractSet, Dict, NamedTuple, List, Optional, Set, Tuple
 
 from simulation.core import common
+from simulation.core import journal as journal_lib
 from simulation import utils
 
+# The highest shipping level any player can reach. Larger values are treated
+# as this one by GameBoard.reachable_tiles().
+MAX_SHIPPING = 6
+# Distance of tiles out of reach of all structures of a player.
+_UNREACHABLE = MAX_SHIPPING + 1
+
+# The number of structures needed to found a town. A sanctuary counts as two.
+TOWN_SIZE = 4
+
+# Cache of GameBoard._water_distances, by map file.
+_WATER_DISTANCES: Dict[str, List[Dict[int, int]]] = {}
+
 
 class Position(NamedTuple):
   """A position consits of a row and column.
@@ -20,6 +34,11 @@ class Position(NamedTuple):
   column: int
 
 
+def _town_size(structure: common.Structure) -> int:
+  """The number of structures the given one counts as for founding towns."""
+  return 2 if structure == common.Structure.SANCTUARY else 1
+
+
 def ParsePosition(msg: str) -> Optional[Position]:
   """Parses the given msg (usually typed by the user) into a valid position.
 
@@ -70,6 +89,81 @@ class GameBoard:
     self._structures: Dict[Tuple[int, int], Optional[
         common.Structure]] = collections.defaultdict(lambda: None)
 
+    # The land tiles of the map, in a fixed order. The index of a tile in this
+    # list is used to refer to it compactly (eg, by the action space).
+    self._land_tiles: Tuple[Position, ...] = self._find_land_tiles()
+    self._tile_index: Dict[Position, int] = {
+        pos: i
+        for i, pos in enumerate(self._land_tiles)
+    }
+    # self._land_neighbors[i] are the indexes of the land tiles directly
+    # adjacent to tile i.
+    self._land_neighbors: List[Tuple[int, ...]] = [
+        tuple(self._tile_index[neighbor]
+              for neighbor in self.get_neighbor_tiles(pos)
+              if neighbor in self._tile_index) for pos in self._land_tiles
+    ]
+    # Map from terrain to the indexes of tiles with a structure on that
+    # terrain. Since players only build on their home terrain, these are the
+    # tiles owned by the faction with that home terrain.
+    self._structure_tiles: Dict[common.Terrain, Set[int]] = {
+        terrain: set()
+        for terrain in common.Terrain
+    }
+    # Map from terrain to the number of structures on that terrain which are
+    # directly adjacent to each tile (by index).
+    self._adjacent_counts: Dict[common.Terrain, List[int]] = {
+        terrain: [0] * len(self._land_tiles)
+        for terrain in common.Terrain
+    }
+    # self._water_distances[i] maps each land tile j reachable from tile i by
+    # crossing at most MAX_SHIPPING water tiles to the minimum number of water
+    # tiles crossed. Directly adjacent tiles (and i itself) are at distance 0.
+    # Water never changes, so this is computed once per map and shared by all
+    # boards. It must not be modified.
+    self._water_distances: List[Dict[int, int]] = _WATER_DISTANCES.get(
+        self._TERRAIN_MAP_FILE, [])
+    if not self._water_distances:
+      self._water_distances = [
+          self._compute_water_distances(pos) for pos in self._land_tiles
+      ]
+      _WATER_DISTANCES[self._TERRAIN_MAP_FILE] = self._water_distances
+    # Map from terrain to the minimum water distance from any structure on
+    # that terrain to each tile (by index). Tiles out of range of every
+    # structure are at _UNREACHABLE.
+    self._min_distances: Dict[common.Terrain, List[int]] = {
+        terrain: [_UNREACHABLE] * len(self._land_tiles)
+        for terrain in common.Terrain
+    }
+    # self._reachable[terrain][k] is the set of tiles at distance at most k
+    # from a structure on the terrain. Kept up to date on every build.
+    self._reachable: Dict[common.Terrain, List[Set[int]]] = {
+        terrain: [set() for _ in range(MAX_SHIPPING + 1)]
+        for terrain in common.Terrain
+    }
+
+    # Union-find over the tiles with structures. Adjacent structures on the
+    # same terrain (or ones connected by a bridge of that terrain's player)
+    # are in the same component. The size, power value and whether the
+    # component already founded a town are only valid for roots. We use union
+    # by size without path compression, which keeps find() logarithmic and
+    # lets the journal undo unions by simply detaching the merged root.
+    num_tiles = len(self._land_tiles)
+    self._parent: List[int] = list(range(num_tiles))
+    self._component_size: List[int] = [0] * num_tiles
+    self._component_power: List[int] = [0] * num_tiles
+    self._component_is_town: List[bool] = [False] * num_tiles
+    # Map from terrain to the bridges built by the corresponding player, as
+    # a map from tile to the tiles it's connected to.
+    self._bridges: Dict[common.Terrain, Dict[int, Set[int]]] = {
+        terrain: collections.defaultdict(set)
+        for terrain in common.Terrain
+    }
+
+    # If set, all mutations to the board are recorded in this journal so they
+    # can be undone.
+    self.journal: Optional[journal_lib.Journal] = None
+
   @staticmethod
   def lines_to_map(lines: List[str]) -> Dict[Tuple[int, int], common.Terrain]:
     """See documentation of LoadStartingMap
@@ -124,7 +218,251 @@ class GameBoard:
     if not self.can_be_built(pos, structure, [terrain]):
       raise utils.InternalError(
           "Attempting to build %s at %s which is invalid!" % (structure, pos))
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self._structures, rawPos,
+                          self._structures[rawPos])
+    previous = self._structures[rawPos]
+    if previous is None and pos in self._tile_index:
+      changes = self._add_to_index(terrain, self._tile_index[pos])
+      if self.journal is not None:
+        self.journal.record(self._remove_from_index, terrain,
+                            self._tile_index[pos], changes)
     self._structures[rawPos] = structure
+    if pos in self._tile_index:
+      self._add_to_component(terrain, self._tile_index[pos], previous,
+                             structure)
+
+  def build_bridge(self, first: Position, second: Position,
+                   terrain: common.Terrain) -> None:
+    """Builds a bridge for the player with the given home terrain between two
+    land tiles separated by a single water tile."""
+    if first not in self._tile_index or second not in self._tile_index:
+      raise utils.InternalError("Bridges must connect two land tiles, not "
+                                "%s and %s." % (first, second))
+    tile, other = self._tile_index[first], self._tile_index[second]
+    if self.water_distance(tile, other) != 1:
+      raise utils.InternalError(
+          "Attempting to build a bridge between %s and %s which is invalid!" %
+          (first, second))
+    bridges = self._bridges[terrain]
+    if other in bridges[tile]:
+      raise utils.InternalError(
+          "There already is a bridge between %s and %s." % (first, second))
+    bridges[tile].add(other)
+    bridges[other].add(tile)
+    if self.journal is not None:
+      self.journal.record(self._remove_bridge, terrain, tile, other)
+    structures = self._structure_tiles[terrain]
+    if tile in structures and other in structures:
+      self._union(tile, other)
+
+  def _remove_bridge(self, terrain: common.Terrain, tile: int,
+                     other: int) -> None:
+    self._bridges[terrain][tile].remove(other)
+    self._bridges[terrain][other].remove(tile)
+
+  def _add_to_component(self, terrain: common.Terrain, tile: int,
+                        previous: Optional[common.Structure],
+                        structure: common.Structure) -> None:
+    """Updates the components after structure replaced previous at tile."""
+    if previous is not None:
+      self._update_component(self._find(tile),
+                             _town_size(structure) - _town_size(previous),
+                             structure.power_value() - previous.power_value())
+      return
+    self._update_component(tile, _town_size(structure),
+                           structure.power_value())
+    structures = self._structure_tiles[terrain]
+    for neighbor in self._land_neighbors[tile]:
+      if neighbor in structures:
+        self._union(tile, neighbor)
+    for neighbor in self._bridges[terrain].get(tile, ()):
+      if neighbor in structures:
+        self._union(tile, neighbor)
+
+  def _update_component(self, root: int, size: int, power: int) -> None:
+    """Adds size and power to the totals of the component with the given
+    root."""
+    self._component_size[root] += size
+    self._component_power[root] += power
+    if self.journal is not None:
+      self.journal.record(self._revert_component_update, root, size, power)
+
+  def _revert_component_update(self, root: int, size: int, power: int) -> None:
+    self._component_size[root] -= size
+    self._component_power[root] -= power
+
+  def _find(self, tile: int) -> int:
+    while self._parent[tile] != tile:
+      tile = self._parent[tile]
+    return tile
+
+  def _union(self, tile: int, other: int) -> None:
+    root, other_root = self._find(tile), self._find(other)
+    if root == other_root:
+      return
+    if self._component_size[root] < self._component_size[other_root]:
+      root, other_root = other_root, root
+    was_town = self._component_is_town[root]
+    self._parent[other_root] = root
+    self._component_size[root] += self._component_size[other_root]
+    self._component_power[root] += self._component_power[other_root]
+    self._component_is_town[root] = (was_town
+                                     or self._component_is_town[other_root])
+    if self.journal is not None:
+      self.journal.record(self._split, root, other_root, was_town)
+
+  def _split(self, root: int, other_root: int, was_town: bool) -> None:
+    """Reverts the _union() which attached other_root to root."""
+    self._parent[other_root] = other_root
+    self._component_size[root] -= self._component_size[other_root]
+    self._component_power[root] -= self._component_power[other_root]
+    self._component_is_town[root] = was_town
+
+  def component_size(self, tile: int) -> int:
+    """Returns the number of structures connected to the structure at the
+    given tile, counting sanctuaries twice as required for towns."""
+    return self._component_size[self._find(tile)]
+
+  def component_power(self, tile: int) -> int:
+    """Returns the combined power value of the structures connected to the
+    structure at the given tile."""
+    return self._component_power[self._find(tile)]
+
+  def is_connected(self, tile: int, other: int) -> bool:
+    """True if the structures at the two tiles are connected."""
+    return self._find(tile) == self._find(other)
+
+  def forms_town(self, tile: int, required_power: int) -> bool:
+    """True if the structures connected to the structure at the given tile
+    can found a new town, given the power value the player needs."""
+    root = self._find(tile)
+    return (not self._component_is_town[root]
+            and self._component_size[root] >= TOWN_SIZE
+            and self._component_power[root] >= required_power)
+
+  def found_town(self, tile: int) -> None:
+    """Marks the structures connected to the given tile as a town. They can't
+    found another one, even when more structures are connected to them."""
+    root = self._find(tile)
+    if self._component_is_town[root]:
+      raise utils.InternalError("%s is already part of a town." %
+                                (self._land_tiles[tile], ))
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self._component_is_town, root,
+                          False)
+    self._component_is_town[root] = True
+
+  def transform(self, pos: Position, terrain: common.Terrain) -> None:
+    """Transforms the (empty, land) tile at the given position into the given
+    terrain. Will throw if the tile can't be transformed."""
+    rawPos = self._to_raw(pos)
+    if (pos not in self._tile_index or terrain == common.Terrain.WATER
+        or self._structures[rawPos] is not None):
+      raise utils.InternalError("Attempting to transform %s into %s which is "
+                                "invalid!" % (pos, terrain))
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self._tiles, rawPos,
+                          self._tiles[rawPos])
+    # Only this half of the tile is ever used to look up its terrain.
+    self._tiles[rawPos] = terrain
+
+  def _add_to_index(self, terrain: common.Terrain,
+                    tile: int) -> List[Tuple[int, int]]:
+    """Indexes a new structure on the given terrain at the given tile.
+
+    Returns the (tile, previous distance) pairs whose distance changed, which
+    _remove_from_index() needs to revert the update."""
+    self._structure_tiles[terrain].add(tile)
+    counts = self._adjacent_counts[terrain]
+    for neighbor in self._land_neighbors[tile]:
+      counts[neighbor] += 1
+    distances = self._min_distances[terrain]
+    reachable = self._reachable[terrain]
+    changes: List[Tuple[int, int]] = []
+    for other, distance in self._water_distances[tile].items():
+      previous = distances[other]
+      if distance < previous:
+        changes.append((other, previous))
+        distances[other] = distance
+        for shipping in range(distance, previous):
+          reachable[shipping].add(other)
+    return changes
+
+  def _remove_from_index(self, terrain: common.Terrain, tile: int,
+                         changes: List[Tuple[int, int]]) -> None:
+    """Reverts _add_to_index(), which returned changes."""
+    self._structure_tiles[terrain].remove(tile)
+    counts = self._adjacent_counts[terrain]
+    for neighbor in self._land_neighbors[tile]:
+      counts[neighbor] -= 1
+    distances = self._min_distances[terrain]
+    reachable = self._reachable[terrain]
+    for other, previous in changes:
+      for shipping in range(distances[other], previous):
+        reachable[shipping].remove(other)
+      distances[other] = previous
+
+  def land_tiles(self) -> Tuple[Position, ...]:
+    """Returns all land tiles. Their order defines the tile indexes."""
+    return self._land_tiles
+
+  def tile_index(self, pos: Position) -> int:
+    """Returns the index of the land tile at the given position."""
+    return self._tile_index[pos]
+
+  def tile_terrain(self, tile: int) -> common.Terrain:
+    """Same as get_terrain() but for the land tile with the given index."""
+    return self.get_terrain(self._land_tiles[tile])
+
+  def tile_structure(self, tile: int) -> Optional[common.Structure]:
+    """Same as get_structure() but for the land tile with the given
+    index."""
+    return self.get_structure(self._land_tiles[tile])
+
+  def structure_tiles(self, terrain: common.Terrain) -> AbstractSet[int]:
+    """Returns the indexes of the tiles with a structure on the given
+    terrain. The returned set must not be modified."""
+    return self._structure_tiles[terrain]
+
+  def has_adjacent_structure(self, tile: int, terrain: common.Terrain) -> bool:
+    """True if the given tile is directly adjacent to a structure on the given
+    terrain."""
+    return self._adjacent_counts[terrain][tile] > 0
+
+  def reachable_tiles(self, terrain: common.Terrain,
+                      shipping: int) -> AbstractSet[int]:
+    """Returns the indexes of all land tiles which are directly adjacent to a
+    structure on the given terrain, or which can be reached from one by
+    crossing at most 'shipping' water tiles.
+
+    Tiles which already have a structure are included. This takes constant
+    time. The returned set must not be modified, and changes as structures are
+    built."""
+    return self._reachable[terrain][max(0, min(shipping, MAX_SHIPPING))]
+
+  def water_distance(self, source: int, target: int) -> Optional[int]:
+    """Returns the minimum number of water tiles to cross to get from the land
+    tile with index source to the one with index target, or None if that is
+    more than MAX_SHIPPING."""
+    return self._water_distances[source].get(target)
+
+  def _compute_water_distances(self, pos: Position) -> Dict[int, int]:
+    # Breadth-first search over the water tiles, starting from pos.
+    distances: Dict[int, int] = {self._tile_index[pos]: 0}
+    visited: Set[Position] = {pos}
+    frontier: Set[Position] = {pos}
+    for distance in range(MAX_SHIPPING + 1):
+      next_frontier: Set[Position] = set()
+      for current in frontier:
+        for neighbor in self.get_neighbor_tiles(current):
+          if neighbor in self._tile_index:
+            distances.setdefault(self._tile_index[neighbor], distance)
+          elif neighbor not in visited:
+            visited.add(neighbor)
+            next_frontier.add(neighbor)
+      frontier = next_frontier
+    return distances
 
   def get_terrain(self, pos: Position) -> common.Terrain:
     """Returns the terrain for the row, column specified, where row is one of
@@ -182,6 +520,21 @@ class GameBoard:
       column = int((rawColumn - 1) / 2) + 1
     return Position(row=row, column=column)
 
+  def _find_land_tiles(self) -> Tuple[Position, ...]:
+    land: List[Position] = []
+    for rawRow in range(self._maxRowIndex + 1):
+      row = chr(ord('A') + rawRow)
+      column = 1
+      while True:
+        pos = Position(row=row, column=column)
+        rawPos = self._to_raw(pos)
+        if rawPos not in self._tiles:
+          break
+        if self._tiles[rawPos] != common.Terrain.WATER:
+          land.append(pos)
+        column += 1
+    return tuple(land)
+
   def _load_starting_map(self) -> Dict[Tuple[int, int], common.Terrain]:
     """
     To make finding neighbors easier, we split the typical hexagonal map for TM
@@ -1,10 +1,38 @@
+import random
 import unittest
 
+from typing import Dict, List, Set, Tuple
+
 from simulation.core import board
 from simulation.core import common
+from simulation.core import journal
 from simulation import utils
 
 
+def _reachable_by_search(gameBoard: board.GameBoard, terrain: common.Terrain,
+                         shipping: int) -> Set[int]:
+  """Straightforward search used to check GameBoard.reachable_tiles()."""
+  land = gameBoard.land_tiles()
+  reachable: Set[int] = set()
+  for tile in gameBoard.structure_tiles(terrain):
+    reachable.add(tile)
+    visited: Set[board.Position] = {land[tile]}
+    frontier: Set[board.Position] = {land[tile]}
+    for _ in range(shipping + 1):
+      next_frontier: Set[board.Position] = set()
+      for pos in frontier:
+        for neighbor in gameBoard.get_neighbor_tiles(pos):
+          if neighbor in visited:
+            continue
+          visited.add(neighbor)
+          if neighbor in land:
+            reachable.add(gameBoard.tile_index(neighbor))
+          else:
+            next_frontier.add(neighbor)
+      frontier = next_frontier
+  return reachable
+
+
 class TestPosition(unittest.TestCase):
   def test_initialization(self) -> None:
     pos = board.Position(row='row', column=1)
@@ -431,3 +459,190 @@ class TestGameBoard(unittest.TestCase):
         (common.Structure.DWELLING, common.Terrain.WASTELAND),
         (common.Structure.DWELLING, common.Terrain.DESERT),
     ])
+
+
+class TestReachability(unittest.TestCase):
+  def setUp(self) -> None:
+    self.board = board.GameBoard()
+
+  def _tile(self, name: str) -> int:
+    pos = board.ParsePosition(name)
+    assert pos is not None
+    return self.board.tile_index(pos)
+
+  def test_water_distance(self) -> None:
+    self.assertEqual(
+        self.board.water_distance(self._tile("A1"), self._tile("A1")), 0)
+    self.assertEqual(
+        self.board.water_distance(self._tile("A1"), self._tile("B1")), 0)
+    # C5 and E6 are separated by a single river tile.
+    self.assertEqual(
+        self.board.water_distance(self._tile("C5"), self._tile("E6")), 1)
+    self.assertIsNone(
+        self.board.water_distance(self._tile("A1"), self._tile("I13")))
+
+  def test_reachable_tiles(self) -> None:
+    a1 = board.ParsePosition("A1")
+    assert a1 is not None
+    self.assertEqual(len(self.board.reachable_tiles(common.Terrain.PLAIN, 3)),
+                     0)
+    self.board.build(a1, common.Structure.DWELLING)
+    self.assertCountEqual(
+        self.board.reachable_tiles(common.Terrain.PLAIN, 0),
+        [self._tile("A1"),
+         self._tile("A2"),
+         self._tile("B1")])
+    c5 = board.ParsePosition("C5")
+    assert c5 is not None
+    self.board.build(c5, common.Structure.DWELLING)
+    self.assertNotIn(self._tile("E6"),
+                     self.board.reachable_tiles(common.Terrain.MOUNTAIN, 0))
+    self.assertIn(self._tile("E6"),
+                  self.board.reachable_tiles(common.Terrain.MOUNTAIN, 1))
+
+  def test_matches_search_and_undo(self) -> None:
+    rng = random.Random(0)
+    test_journal = journal.Journal()
+    self.board.journal = test_journal
+    land = self.board.land_tiles()
+    marks = []
+    for pos in rng.sample(land, 20):
+      marks.append(test_journal.mark())
+      self.board.build(pos, common.Structure.DWELLING)
+      terrain = self.board.get_terrain(pos)
+      for shipping in range(board.MAX_SHIPPING + 1):
+        self.assertEqual(self.board.reachable_tiles(terrain, shipping),
+                         _reachable_by_search(self.board, terrain, shipping))
+    test_journal.undo_to(marks[10])
+    for terrain in common.Terrain:
+      for shipping in range(4):
+        self.assertEqual(self.board.reachable_tiles(terrain, shipping),
+                         _reachable_by_search(self.board, terrain, shipping))
+    test_journal.undo_to(0)
+    for terrain in common.Terrain:
+      self.assertEqual(
+          len(self.board.reachable_tiles(terrain, board.MAX_SHIPPING)), 0)
+
+
+def _component_by_search(gameBoard: board.GameBoard, tile: int,
+                         bridges: List[Tuple[int, int]]) -> Tuple[int, int]:
+  """Flood fill used to check GameBoard.component_size/power()."""
+  land = gameBoard.land_tiles()
+  owned = gameBoard.structure_tiles(gameBoard.tile_terrain(tile))
+  links: Dict[int, Set[int]] = {
+      i: {
+          gameBoard.tile_index(neighbor)
+          for neighbor in gameBoard.get_neighbor_tiles(land[i])
+          if neighbor in land
+      }
+      for i in owned
+  }
+  for first, second in bridges:
+    if first in owned and second in owned:
+      links[first].add(second)
+      links[second].add(first)
+  component, frontier = {tile}, [tile]
+  while frontier:
+    for neighbor in links[frontier.pop()] & owned:
+      if neighbor not in component:
+        component.add(neighbor)
+        frontier.append(neighbor)
+  structures = [gameBoard.tile_structure(i) for i in component]
+  return (len(structures) + structures.count(common.Structure.SANCTUARY),
+          sum(s.power_value() for s in structures if s is not None))
+
+
+class TestTowns(unittest.TestCase):
+  def setUp(self) -> None:
+    self.board = board.GameBoard()
+
+  def _pos(self, name: str) -> board.Position:
+    pos = board.ParsePosition(name)
+    assert pos is not None
+    return pos
+
+  def test_forms_town(self) -> None:
+    for name in ["A1", "A2", "A3", "A4"]:
+      pos = self._pos(name)
+      if self.board.get_terrain(pos) != common.Terrain.PLAIN:
+        self.board.transform(pos, common.Terrain.PLAIN)
+      self.board.build(pos, common.Structure.DWELLING)
+    a1 = self.board.tile_index(self._pos("A1"))
+    self.assertTrue(
+        self.board.is_connected(a1, self.board.tile_index(self._pos("A4"))))
+    self.assertEqual(self.board.component_size(a1), 4)
+    self.assertEqual(self.board.component_power(a1), 4)
+    self.assertFalse(self.board.forms_town(a1, required_power=6))
+
+    self.board.build(self._pos("A2"), common.Structure.TRADING_POST)
+    self.board.build(self._pos("A3"), common.Structure.TRADING_POST)
+    self.assertEqual(self.board.component_power(a1), 6)
+    self.assertTrue(self.board.forms_town(a1, required_power=6))
+    self.assertFalse(self.board.forms_town(a1, required_power=7))
+    self.board.build(self._pos("A3"), common.Structure.STRONGHOLD)
+    self.assertTrue(self.board.forms_town(a1, required_power=7))
+
+    self.board.found_town(a1)
+    self.assertFalse(self.board.forms_town(a1, required_power=7))
+    with self.assertRaises(utils.InternalError):
+      self.board.found_town(a1)
+
+  def test_bridges(self) -> None:
+    c5, e6 = self._pos("C5"), self._pos("E6")
+    self.board.build(c5, common.Structure.DWELLING)
+    self.board.transform(e6, common.Terrain.MOUNTAIN)
+    self.board.build(e6, common.Structure.DWELLING)
+    c5_tile, e6_tile = self.board.tile_index(c5), self.board.tile_index(e6)
+    self.assertFalse(self.board.is_connected(c5_tile, e6_tile))
+    self.board.build_bridge(c5, e6, common.Terrain.MOUNTAIN)
+    self.assertTrue(self.board.is_connected(c5_tile, e6_tile))
+    self.assertEqual(self.board.component_size(e6_tile), 2)
+    with self.assertRaises(utils.InternalError):
+      self.board.build_bridge(e6, c5, common.Terrain.MOUNTAIN)
+    with self.assertRaises(utils.InternalError):
+      self.board.build_bridge(self._pos("A1"), self._pos("A2"),
+                              common.Terrain.PLAIN)
+
+  def test_matches_search_and_undo(self) -> None:
+    rng = random.Random(0)
+    test_journal = journal.Journal()
+    self.board.journal = test_journal
+    land = self.board.land_tiles()
+    crossings = [(i, j) for i in range(len(land)) for j in range(i)
+                 if self.board.water_distance(i, j) == 1]
+    built_bridges: Set[Tuple[int, int]] = set()
+    # Only bridges between tiles of the same terrain connect structures.
+    bridges: List[Tuple[int, int]] = []
+    history = []
+    for _ in range(120):
+      history.append((test_journal.mark(), len(bridges), set(built_bridges)))
+      if rng.random() < 0.1:
+        first, second = rng.choice(crossings)
+        if (first, second) not in built_bridges:
+          terrain = self.board.tile_terrain(first)
+          self.board.build_bridge(land[first], land[second], terrain)
+          built_bridges.add((first, second))
+          if self.board.tile_terrain(second) == terrain:
+            bridges.append((first, second))
+        continue
+      pos = rng.choice(land)
+      existing = self.board.get_structure(pos)
+      if existing is None:
+        self.board.build(pos, common.Structure.DWELLING)
+        continue
+      upgrades = [
+          structure for structure in common.Structure
+          if existing.is_upgradeable_to(structure)
+      ]
+      if upgrades:
+        self.board.build(pos, rng.choice(upgrades))
+
+    for mark, num_bridges, previous_bridges in reversed(history[::10]):
+      for terrain in common.Terrain:
+        for tile in self.board.structure_tiles(terrain):
+          self.assertEqual((self.board.component_size(tile),
+                            self.board.component_power(tile)),
+                           _component_by_search(self.board, tile, bridges))
+      test_journal.undo_to(mark)
+      del bridges[num_bridges:]
+      built_bridges = previous_bridges
@@ -1,11 +1,21 @@
 import enum
 
-from typing import Any
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from simulation import utils
 
 
 class Resources:
+  """The resources held (or paid) by a player.
+
+  Uses __slots__ since many of these are created during simulation. The
+  in-place operators (+= and -=) do not allocate new objects.
+  """
+  __slots__ = ('coins', 'workers', 'bridges', 'priests')
+
+  # Order of the resources when represented as a vector.
+  FIELDS: Tuple[str, ...] = ('coins', 'workers', 'bridges', 'priests')
+
   def __init__(self: 'Resources',
                coins: int = 0,
                workers: int = 0,
@@ -26,6 +36,19 @@ class Resources:
     self.bridges = max(0, self.bridges)
     self.priests = max(0, self.priests)
 
+  def to_vector(self: 'Resources') -> Tuple[int, int, int, int]:
+    """Returns the resources as a vector ordered as in Resources.FIELDS."""
+    return (self.coins, self.workers, self.bridges, self.priests)
+
+  @staticmethod
+  def from_vector(vector: Sequence[int]) -> 'Resources':
+    """Inverse of to_vector()."""
+    coins, workers, bridges, priests = vector
+    return Resources(coins=int(coins),
+                     workers=int(workers),
+                     bridges=int(bridges),
+                     priests=int(priests))
+
   def __eq__(self: 'Resources', other: Any) -> bool:
     return (isinstance(other, Resources) and self.coins == other.coins
             and self.workers == other.workers and self.priests == other.priests
@@ -78,25 +101,53 @@ class Resources:
 
 
 class Income:
+  """Income is a set of resources along with power.
+
+  Like Resources, uses __slots__ and supports allocation-free in-place
+  operators.
+  """
+  __slots__ = ('resources', 'power')
+
+  # Order of the income when represented as a vector.
+  FIELDS: Tuple[str, ...] = Resources.FIELDS + ('power', )
+
   def __init__(self: 'Income', power: int = 0, **kwargs: int) -> None:
     self.resources = Resources(**kwargs)
     self.power = power
 
+  @staticmethod
+  def _from_parts(resources: Resources, power: int) -> 'Income':
+    """Constructs an Income which takes ownership of the given resources."""
+    income: Income = Income.__new__(Income)
+    income.resources = resources
+    income.power = power
+    return income
+
   def is_valid(self: 'Income') -> int:
     raise utils.InternalError("Income should not be used this way!")
 
   def force_valid(self: 'Income') -> None:
     raise utils.InternalError("Income should not be used this way!")
 
+  def to_vector(self: 'Income') -> Tuple[int, int, int, int, int]:
+    """Returns the income as a vector ordered as in Income.FIELDS."""
+    resources = self.resources
+    return (resources.coins, resources.workers, resources.bridges,
+            resources.priests, self.power)
+
+  @staticmethod
+  def from_vector(vector: Sequence[int]) -> 'Income':
+    """Inverse of to_vector()."""
+    return Income._from_parts(Resources.from_vector(vector[:-1]),
+                              int(vector[-1]))
+
   def __eq__(self, other: Any) -> bool:
     return (isinstance(other, Income) and self.resources == other.resources
             and self.power == other.power)
 
   def __add__(self: 'Income', other: 'Income') -> 'Income':
-    newIncome = Income()
-    newIncome.resources = self.resources + other.resources
-    newIncome.power = self.power + other.power
-    return newIncome
+    return Income._from_parts(self.resources + other.resources,
+                              self.power + other.power)
 
   def __radd__(self: 'Income', other: 'Income') -> 'Income':
     if other == 0:
@@ -109,10 +160,8 @@ class Income:
     return self
 
   def __sub__(self: 'Income', other: 'Income') -> 'Income':
-    newIncome = Income()
-    newIncome.resources = self.resources - other.resources
-    newIncome.power = self.power - other.power
-    return newIncome
+    return Income._from_parts(self.resources - other.resources,
+                              self.power - other.power)
 
   def __rsub__(self: 'Income', other: 'Income') -> 'Income':
     if other == 0:
@@ -131,8 +180,27 @@ class Income:
     """.format(resources=self.resources, power=self.power)
 
 
+class IndexedEnum(enum.Enum):
+  """Base class for enums with a dense integer encoding.
+
+  Members are numbered 0..len(cls)-1 in declaration order, which makes them
+  suitable as indexes into lookup tables and tensors.
+  """
+
+  @property
+  def index(self) -> int:
+    # All members use enum.auto(), which numbers them from 1.
+    index: int = self.value - 1
+    return index
+
+  @classmethod
+  def from_index(cls, index: int) -> Any:
+    """Inverse of the index property."""
+    return cls(index + 1)
+
+
 @enum.unique
-class Terrain(enum.Enum):
+class Terrain(IndexedEnum):
   PLAIN = enum.auto()
   SWAMP = enum.auto()
   LAKE = enum.auto()
@@ -143,38 +211,33 @@ class Terrain(enum.Enum):
   WATER = enum.auto()  # BLUE, unbuildable
 
   def get_color(self) -> str:
-    if self == Terrain.PLAIN:
-      return "BROWN"
-    if self == Terrain.SWAMP:
-      return "BLACK"
-    if self == Terrain.LAKE:
-      return "BLUE"
-    if self == Terrain.FOREST:
-      return "GREEN"
-    if self == Terrain.MOUNTAIN:
-      return "GREY"
-    if self == Terrain.WASTELAND:
-      return "RED"
-    if self == Terrain.DESERT:
-      return "YELLOW"
-    if self == Terrain.WATER:
-      return "BLUE[unbuildable]"
-    raise utils.UnimplementedError("Humand description of %s does not exist" %
-                                   self.name)
+    return _TERRAIN_COLORS[self]
 
   def __str__(self) -> str:
     return "%s (%s)" % (super(Terrain, self).__str__(), self.get_color())
 
 
+_TERRAIN_COLORS: Dict[Terrain, str] = {
+    Terrain.PLAIN: "BROWN",
+    Terrain.SWAMP: "BLACK",
+    Terrain.LAKE: "BLUE",
+    Terrain.FOREST: "GREEN",
+    Terrain.MOUNTAIN: "GREY",
+    Terrain.WASTELAND: "RED",
+    Terrain.DESERT: "YELLOW",
+    Terrain.WATER: "BLUE[unbuildable]",
+}
+
+
 @enum.unique
-class PowerBowl(enum.Enum):
+class PowerBowl(IndexedEnum):
   I = enum.auto()  # noqa: E741
   II = enum.auto()
   III = enum.auto()
 
 
 @enum.unique
-class CultTrack(enum.Enum):
+class CultTrack(IndexedEnum):
   """The four possible cult tracks"""
   FIRE = enum.auto()  # Fire track.
   WATER = enum.auto()  # Water track.
@@ -183,7 +246,7 @@ class CultTrack(enum.Enum):
 
 
 @enum.unique
-class TownKey(enum.Enum):
+class TownKey(IndexedEnum):
   """The town keys"""
   WOKERS2 = enum.auto()
   PRIEST = enum.auto()
@@ -192,26 +255,24 @@ class TownKey(enum.Enum):
   COIN6 = enum.auto()  # 6 coins.
 
   def _get_human_description(self) -> str:
-    if self == TownKey.WOKERS2:
-      return "2 immediate workers"
-    if self == TownKey.PRIEST:
-      return "1 immediate priest"
-    if self == TownKey.CULT:
-      return "1 up on every cult-track."
-    if self == TownKey.POWER8:
-      return "8 immediate power."
-    if self == TownKey.COIN6:
-      return "6 immediate coins."
-    raise utils.UnimplementedError("Humand description of %s does not exist" %
-                                   self.name)
+    return _TOWN_KEY_DESCRIPTIONS[self]
 
   def __str__(self) -> str:
     return "%s [%s]" % (super(TownKey,
                               self).__str__(), self._get_human_description())
 
 
+_TOWN_KEY_DESCRIPTIONS: Dict[TownKey, str] = {
+    TownKey.WOKERS2: "2 immediate workers",
+    TownKey.PRIEST: "1 immediate priest",
+    TownKey.CULT: "1 up on every cult-track.",
+    TownKey.POWER8: "8 immediate power.",
+    TownKey.COIN6: "6 immediate coins.",
+}
+
+
 @enum.unique
-class BonusCard(enum.Enum):
+class BonusCard(IndexedEnum):
   """The nine possible bonus cards.  Each one tends to work at each Phase of
   the game. Phase I is income, Phase II is during gameplay, and Phase III is at
   end of round.
@@ -229,72 +290,60 @@ class BonusCard(enum.Enum):
   TRADING_POST_WORKER = enum.auto()
   STRONGHOLD_WORKER2 = enum.auto()  # 4 vp per SH/TE. 2 worker income.
 
-  def __init__(self, value: int):
-    self.coins = 0
+  def income_vector(self) -> Tuple[int, ...]:
+    """Same as player_income() but as an Income.to_vector()."""
+    return _BONUS_CARD_INCOME[self]
 
   def player_income(self) -> Income:
-    if self == BonusCard.PRIEST:
-      return Income(priests=1)
-    if self == BonusCard.WORKER_3POWER:
-      return Income(workers=1, power=3)
-    if self == BonusCard.COIN6:
-      return Income(coins=6)
-    if self == BonusCard.POWER3_SHIPPING:
-      return Income(power=3)
-    if self == BonusCard.SPADE_COIN2:
-      return Income(coins=2)
-    if self == BonusCard.CULT_COIN4:
-      return Income(coins=4)
-    if self == BonusCard.DWELLING_COIN2:
-      return Income(coins=2)
-    if self == BonusCard.TRADING_POST_WORKER:
-      return Income(workers=1)
-    if self == BonusCard.STRONGHOLD_WORKER2:
-      return Income(workers=2)
-
-    raise utils.InternalError("FavorTile %s is not implemented!" % self)
+    return Income.from_vector(_BONUS_CARD_INCOME[self])
 
-  def _get_human_description(self) -> str:
-    if self == BonusCard.PRIEST:
-      return "1 priest income%s." % ("" if self.coins == 0 else
-                                     " <%s coins> " % self.coins)
-    if self == BonusCard.WORKER_3POWER:
-      return "1 wrker income and 3 power income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.COIN6:
-      return "6 coins income%s." % ("" if self.coins == 0 else " <%s coins> " %
-                                    self.coins)
-    if self == BonusCard.POWER3_SHIPPING:
-      return "3 power income and +1 shipping for Phase I and II%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.SPADE_COIN2:
-      return "1 spade special action and 2 coin income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.CULT_COIN4:
-      return "1 cult track special action + 4 coin income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.DWELLING_COIN2:
-      return "1 vp per dwelling in board at end, 2 coin income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.TRADING_POST_WORKER:
-      return "2 vp per TP on board at end, 1 worker income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    if self == BonusCard.STRONGHOLD_WORKER2:
-      return "4 vp per SH/TE. 2 worker income%s." % (
-          "" if self.coins == 0 else " <%s coins> " % self.coins)
-    raise utils.UnimplementedError("Humand description of %s does not exist" %
-                                   self.name)
+  def _get_human_description(self, coins: int = 0) -> str:
+    return "%s%s." % (_BONUS_CARD_DESCRIPTIONS[self],
+                      "" if coins == 0 else " <%s coins> " % coins)
+
+  def to_string(self, coins: int) -> str:
+    """Same as str() but also shows the coins currently on the card. The
+    coins are part of the state of a game, not of the card."""
+    return "%s [%s]" % (super(
+        BonusCard, self).__str__(), self._get_human_description(coins))
 
   def __str__(self) -> str:
-    return "%s [%s]" % (super(BonusCard,
-                              self).__str__(), self._get_human_description())
+    return self.to_string(coins=0)
 
   def __repr__(self) -> str:
     return self.__str__()
 
 
+_BONUS_CARD_INCOME: Dict[BonusCard, Tuple[int, ...]] = {
+    BonusCard.PRIEST: Income(priests=1).to_vector(),
+    BonusCard.WORKER_3POWER: Income(workers=1, power=3).to_vector(),
+    BonusCard.COIN6: Income(coins=6).to_vector(),
+    BonusCard.POWER3_SHIPPING: Income(power=3).to_vector(),
+    BonusCard.SPADE_COIN2: Income(coins=2).to_vector(),
+    BonusCard.CULT_COIN4: Income(coins=4).to_vector(),
+    BonusCard.DWELLING_COIN2: Income(coins=2).to_vector(),
+    BonusCard.TRADING_POST_WORKER: Income(workers=1).to_vector(),
+    BonusCard.STRONGHOLD_WORKER2: Income(workers=2).to_vector(),
+}
+
+_BONUS_CARD_DESCRIPTIONS: Dict[BonusCard, str] = {
+    BonusCard.PRIEST: "1 priest income",
+    BonusCard.WORKER_3POWER: "1 wrker income and 3 power income",
+    BonusCard.COIN6: "6 coins income",
+    BonusCard.POWER3_SHIPPING:
+    "3 power income and +1 shipping for Phase I and II",
+    BonusCard.SPADE_COIN2: "1 spade special action and 2 coin income",
+    BonusCard.CULT_COIN4: "1 cult track special action + 4 coin income",
+    BonusCard.DWELLING_COIN2:
+    "1 vp per dwelling in board at end, 2 coin income",
+    BonusCard.TRADING_POST_WORKER:
+    "2 vp per TP on board at end, 1 worker income",
+    BonusCard.STRONGHOLD_WORKER2: "4 vp per SH/TE. 2 worker income",
+}
+
+
 @enum.unique
-class ScoringTile(enum.Enum):
+class ScoringTile(IndexedEnum):
   """
   Scoring Tiles apply to each round. They expecify getting additional V during
   the Action phase, cult bonus awared at the end of round (in Phase III)
@@ -316,32 +365,35 @@ class ScoringTile(enum.Enum):
   STRONGHOLD_FIRE2_WORKER = enum.auto()
 
   def _get_human_description(self) -> str:
-    if self == ScoringTile.TP_AIR4_SPADE:
-      return "Phase II: 2 VP per TP built. Phase III: Get 1 spade per 4 Air."
-    if self == ScoringTile.DWELLING_WATER4_PRIEST:
-      return "Phase II: 2 VP per Dwelling built. Phase III: Get 1 priest per 4 Water."  # noqa 501
-    if self == ScoringTile.TP_WATER4_SPADE:
-      return "Phase II: 2 VP per TP built. Phase III: Get a spade for 4 Water."
-    if self == ScoringTile.TOWN_EARTH4_SPADE:
-      return "Phase II: 5 VP per town built. Phase III: Get 1 spade per 4 on Earth."  # noqa 501
-    if self == ScoringTile.STRONGHOLD_AIR2_WORKER:
-      return "Phase II: 4 VP per stronghold. Phase III: Get 1 worker per 2 Air."  # noqa 501
-    if self == ScoringTile.SPADE_EARTH_COIN:
-      return "Phase II: 2 VP per spade used. Phase III: Get 1 coint per 1 Earth."  # noqa 501
-    if self == ScoringTile.DWELLING_FIRE4_POWER4:
-      return "Phase II: 2 VP per dwelling built. Phase III: Get 4 power per 4 Fire."  # noqa 501
-    if self == ScoringTile.STRONGHOLD_FIRE2_WORKER:
-      return "Phase II: 5 VP per stornghold. Phase III: Get 1 worker per 2 Fire."  # noqa 501
-    raise utils.UnimplementedError("Humand description of %s does not exist" %
-                                   self.name)
+    return _SCORING_TILE_DESCRIPTIONS[self]
 
   def __str__(self) -> str:
     return "%s [%s]" % (super(ScoringTile,
                               self).__str__(), self._get_human_description())
 
 
+_SCORING_TILE_DESCRIPTIONS: Dict[ScoringTile, str] = {
+    ScoringTile.TP_AIR4_SPADE:
+    "Phase II: 2 VP per TP built. Phase III: Get 1 spade per 4 Air.",
+    ScoringTile.DWELLING_WATER4_PRIEST:
+    "Phase II: 2 VP per Dwelling built. Phase III: Get 1 priest per 4 Water.",
+    ScoringTile.TP_WATER4_SPADE:
+    "Phase II: 2 VP per TP built. Phase III: Get a spade for 4 Water.",
+    ScoringTile.TOWN_EARTH4_SPADE:
+    "Phase II: 5 VP per town built. Phase III: Get 1 spade per 4 on Earth.",
+    ScoringTile.STRONGHOLD_AIR2_WORKER:
+    "Phase II: 4 VP per stronghold. Phase III: Get 1 worker per 2 Air.",
+    ScoringTile.SPADE_EARTH_COIN:
+    "Phase II: 2 VP per spade used. Phase III: Get 1 coint per 1 Earth.",
+    ScoringTile.DWELLING_FIRE4_POWER4:
+    "Phase II: 2 VP per dwelling built. Phase III: Get 4 power per 4 Fire.",
+    ScoringTile.STRONGHOLD_FIRE2_WORKER:
+    "Phase II: 5 VP per stornghold. Phase III: Get 1 worker per 2 Fire.",
+}
+
+
 @enum.unique
-class FavorTile(enum.Enum):
+class FavorTile(IndexedEnum):
   """
   You may only have one favor tile of each type. Most of these are just passive
   income and immediate advancement in the cult track. There are also some tiles
@@ -363,52 +415,47 @@ class FavorTile(enum.Enum):
   EARTH3 = enum.auto()  # 3 earth.
   AIR3 = enum.auto()  # 3 air.
 
+  def income_vector(self) -> Tuple[int, ...]:
+    """Same as player_income() but as an Income.to_vector()."""
+    return _FAVOR_TILE_INCOME[self]
+
   def player_income(self) -> Income:
-    if self == FavorTile.COIN3_FIRE:
-      return Income(coins=3)
-    if self == FavorTile.WORKER_POWER_EARTH2:
-      return Income(workers=1, power=1)
-    if self == FavorTile.POWER4_AIR2:
-      return Income(power=4)
-    if (self == FavorTile.TP3VP_WATER or self == FavorTile.DWELLING2_EARTH
-        or self == FavorTile.TP1234_AIR or self == FavorTile.TOWN_FIRE2
-        or self == FavorTile.CULTACTION_AIR2 or self == FavorTile.FIRE3
-        or self == FavorTile.WATER3 or self == FavorTile.EARTH3
-        or self == FavorTile.AIR3):
-      return Income()
-    raise utils.InternalError("FavorTile %s is not implemented!" % self)
+    return Income.from_vector(_FAVOR_TILE_INCOME[self])
 
   def _get_human_description(self) -> str:
-    if self == FavorTile.COIN3_FIRE:
-      return "3 coin income, 1 fire advancement."
-    if self == FavorTile.TP3VP_WATER:
-      return "3 VP per built dwelling, 1 water advancement."
-    if self == FavorTile.DWELLING2_EARTH:
-      return "2 VP per dwelling built, 1 earth."
-    if self == FavorTile.TP1234_AIR:
-      return "Get 2/3/3/4 VP per 1/2/3/4 TPs when passing. 1 Air."
-    if self == FavorTile.TOWN_FIRE2:
-      return "Town founding only requires combined power of 6, instead of 7. 2 Fire."  # noqa 501
-    if self == FavorTile.CULTACTION_AIR2:
-      return "Special action to use cult track, plus 2 water."
-    if self == FavorTile.WORKER_POWER_EARTH2:
-      return "1 worker + 1 power income, 2 eart."
-    if self == FavorTile.POWER4_AIR2:
-      return "4 power income, 2 air."
-    if self == FavorTile.FIRE3:
-      return "3 fire."
-    if self == FavorTile.WATER3:
-      return "3 water."
-    if self == FavorTile.EARTH3:
-      return "3 earth."
-    if self == FavorTile.AIR3:
-      return "3 air."
-    raise utils.UnimplementedError("Humand description of %s does not exist" %
-                                   self.name)
+    return _FAVOR_TILE_DESCRIPTIONS[self]
+
+
+# Favor tiles not listed here provide no income.
+_FAVOR_TILE_INCOME: Dict[FavorTile, Tuple[int, ...]] = {
+    FavorTile.COIN3_FIRE: Income(coins=3).to_vector(),
+    FavorTile.WORKER_POWER_EARTH2: Income(workers=1, power=1).to_vector(),
+    FavorTile.POWER4_AIR2: Income(power=4).to_vector(),
+}
+for _tile in FavorTile:
+  _FAVOR_TILE_INCOME.setdefault(_tile, Income().to_vector())
+
+_FAVOR_TILE_DESCRIPTIONS: Dict[FavorTile, str] = {
+    FavorTile.COIN3_FIRE: "3 coin income, 1 fire advancement.",
+    FavorTile.TP3VP_WATER: "3 VP per built dwelling, 1 water advancement.",
+    FavorTile.DWELLING2_EARTH: "2 VP per dwelling built, 1 earth.",
+    FavorTile.TP1234_AIR:
+    "Get 2/3/3/4 VP per 1/2/3/4 TPs when passing. 1 Air.",
+    FavorTile.TOWN_FIRE2:
+    "Town founding only requires combined power of 6, instead of 7. 2 Fire.",
+    FavorTile.CULTACTION_AIR2:
+    "Special action to use cult track, plus 2 water.",
+    FavorTile.WORKER_POWER_EARTH2: "1 worker + 1 power income, 2 eart.",
+    FavorTile.POWER4_AIR2: "4 power income, 2 air.",
+    FavorTile.FIRE3: "3 fire.",
+    FavorTile.WATER3: "3 water.",
+    FavorTile.EARTH3: "3 earth.",
+    FavorTile.AIR3: "3 air.",
+}
 
 
 @enum.unique
-class Structure(enum.Enum):
+class Structure(IndexedEnum):
   """The different building types available in TM."""
   DWELLING = enum.auto()
   TRADING_POST = enum.auto()
@@ -418,12 +465,32 @@ class Structure(enum.Enum):
 
   def is_upgradeable_to(self, other: 'Structure') -> bool:
     """Returns true if 'other' is a structure to which we can upgrade"""
-    if other == Structure.TRADING_POST:
-      return self == Structure.DWELLING
-    if other == Structure.TEMPLE or other == Structure.STRONGHOLD:
-      return self == Structure.TRADING_POST
-    if other == Structure.SANCTUARY:
-      return self == Structure.TEMPLE
-    if other == Structure.DWELLING:
-      return False
-    raise utils.InternalError("Invalid structure: %s" % other)
+    if other not in _UPGRADED_FROM:
+      raise utils.InternalError("Invalid structure: %s" % other)
+    return self == _UPGRADED_FROM[other]
+
+  def upgraded_from(self) -> Optional['Structure']:
+    """Returns the structure which is upgraded to this one, if any."""
+    return _UPGRADED_FROM[self]
+
+  def power_value(self) -> int:
+    """The power value of the structure, used for towns and power leech."""
+    return _POWER_VALUES[self]
+
+
+# Map from a structure to the structure it is upgraded from, if any.
+_UPGRADED_FROM: Dict[Structure, Optional[Structure]] = {
+    Structure.DWELLING: None,
+    Structure.TRADING_POST: Structure.DWELLING,
+    Structure.TEMPLE: Structure.TRADING_POST,
+    Structure.STRONGHOLD: Structure.TRADING_POST,
+    Structure.SANCTUARY: Structure.TEMPLE,
+}
+
+_POWER_VALUES: Dict[Structure, int] = {
+    Structure.DWELLING: 1,
+    Structure.TRADING_POST: 2,
+    Structure.TEMPLE: 2,
+    Structure.STRONGHOLD: 3,
+    Structure.SANCTUARY: 3,
+}
@@ -45,6 +45,25 @@ class TestResources(unittest.TestCase):
     resources -= common.Resources(workers=1)
     self.assertEqual(resources, common.Resources(workers=9))
 
+  def test_vector_round_trip(self) -> None:
+    resources = common.Resources(coins=10, workers=1, bridges=2, priests=4)
+    self.assertEqual(resources.to_vector(), (10, 1, 2, 4))
+    self.assertEqual(common.Resources.from_vector(resources.to_vector()),
+                     resources)
+
+  def test_no_instance_dict(self) -> None:
+    resources = common.Resources()
+    with self.assertRaises(AttributeError):
+      resources.spades = 1  # type: ignore
+
+  def test_in_place_operators_do_not_allocate(self) -> None:
+    resources = common.Resources(workers=10)
+    original = resources
+    resources += common.Resources(workers=1)
+    resources -= common.Resources(coins=1)
+    self.assertIs(resources, original)
+    self.assertEqual(resources, common.Resources(workers=11, coins=-1))
+
 
 class TestIncome(unittest.TestCase):
   def test_functions_raise_errors(self) -> None:
@@ -81,6 +100,20 @@ class TestIncome(unittest.TestCase):
     income -= common.Income(power=1)
     self.assertEqual(income, common.Income(power=9))
 
+  def test_vector_round_trip(self) -> None:
+    income = common.Income(coins=10, workers=1, bridges=2, priests=4, power=3)
+    self.assertEqual(income.to_vector(), (10, 1, 2, 4, 3))
+    self.assertEqual(common.Income.from_vector(income.to_vector()), income)
+
+  def test_addition_does_not_alias(self) -> None:
+    first = common.Income(coins=1, power=1)
+    second = common.Income(workers=1, power=2)
+    total = first + second
+    total += common.Income(coins=5)
+    self.assertEqual(total, common.Income(coins=6, workers=1, power=3))
+    self.assertEqual(first, common.Income(coins=1, power=1))
+    self.assertEqual(second, common.Income(workers=1, power=2))
+
 
 class TestBonusCard(unittest.TestCase):
   def test_income_from_bonus_cards(self) -> None:
@@ -128,6 +161,38 @@ class TestFavorTile(unittest.TestCase):
     self.assertEqual(common.FavorTile.AIR3.player_income(), common.Income())
 
 
+class TestIndexedEnums(unittest.TestCase):
+  def test_dense_indexes(self) -> None:
+    for enum_type in [
+        common.Terrain, common.PowerBowl, common.CultTrack, common.TownKey,
+        common.BonusCard, common.ScoringTile, common.FavorTile,
+        common.Structure
+    ]:
+      self.assertEqual([member.index for member in enum_type],
+                       list(range(len(enum_type))))
+      for member in enum_type:
+        self.assertIs(enum_type.from_index(member.index), member)
+
+  def test_every_member_has_a_description(self) -> None:
+    for terrain in common.Terrain:
+      self.assertTrue(terrain.get_color())
+    for key in common.TownKey:
+      self.assertTrue(key._get_human_description())
+    for card in common.BonusCard:
+      self.assertEqual(card.player_income().to_vector(), card.income_vector())
+      self.assertTrue(card._get_human_description())
+    for scoring_tile in common.ScoringTile:
+      self.assertTrue(scoring_tile._get_human_description())
+    for favor_tile in common.FavorTile:
+      self.assertEqual(favor_tile.player_income().to_vector(),
+                       favor_tile.income_vector())
+      self.assertTrue(favor_tile._get_human_description())
+
+  def test_bonus_card_description_without_coins(self) -> None:
+    self.assertEqual(common.BonusCard.PRIEST._get_human_description(),
+                     "1 priest income.")
+
+
 class TestStructureUpgrades(unittest.TestCase):
   def testDwellingUpgrades(self) -> None:
     structure = common.Structure.DWELLING
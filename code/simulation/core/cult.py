@@ -1,7 +1,8 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from simulation.core import common
 from simulation.core import faction as faction_lib
+from simulation.core import journal as journal_lib
 from simulation.core import player
 
 
@@ -15,15 +16,16 @@ class CultBoard:
 
   # Number of availabe order positions for priests.
   NUM_ORDERS: int = 4
+  # The spaces gained by each order position, in the order they are taken
+  # from the back of the list.
+  _ORDER_SPACES: List[int] = [2, 2, 2, 3]
 
   def __init__(self, factions: List[faction_lib.Faction]):
     # Mapping from cult track to list of availabler orders.
     # Factions is the list of factions playing on the cult track.
     self.available_orders: Dict[common.CultTrack, List[int]] = {
-        common.CultTrack.FIRE: [2, 2, 2, 3],
-        common.CultTrack.WATER: [2, 2, 2, 3],
-        common.CultTrack.EARTH: [2, 2, 2, 3],
-        common.CultTrack.AIR: [2, 2, 2, 3],
+        track: list(CultBoard._ORDER_SPACES)
+        for track in common.CultTrack
     }
     # Mapping from cult-track to index to which terrain/faction occupies order.
     # indexes map as 1 -> 3, 2 -> 2, 3 -> 2, 4 -> 2.
@@ -45,6 +47,20 @@ class CultBoard:
       for track, pos in faction.starting_cult_positions().items():
         self.positions[track][faction.home_terrain()] = pos
 
+    # If set, all mutations to the cult board are recorded in this journal so
+    # they can be undone.
+    self.journal: Optional[journal_lib.Journal] = None
+
+  def _restore_order(self, order: common.CultTrack, terrain: common.Terrain,
+                     position: int, took_order: bool) -> None:
+    """Reverts a single sacrifice_priest_to_order() call."""
+    self.positions[order][terrain] = position
+    if took_order:
+      taken: int = CultBoard.NUM_ORDERS - len(self.available_orders[order])
+      self.available_orders[order].append(
+          CultBoard._ORDER_SPACES[CultBoard.NUM_ORDERS - taken])
+      del self.occupied_orders[order][taken]
+
   def sacrifice_priest_to_order(self, player: player.Player,
                                 order: common.CultTrack) -> Tuple[int, int]:
     """The player is sacrificing their priest to the order specified.
@@ -53,6 +69,10 @@ class CultBoard:
     can be zero if the Player is at 9 but has no town key.
     """
     terrain: common.Terrain = player.faction.home_terrain()
+    if self.journal is not None:
+      self.journal.record(self._restore_order, order, terrain,
+                          self.positions[order][terrain],
+                          len(self.available_orders[order]) > 0)
     if self.available_orders[order]:
       spaces_to_attempt: int = self.available_orders[order].pop()
       self.occupied_orders[order][CultBoard.NUM_ORDERS -
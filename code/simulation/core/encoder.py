@@ -0,0 +1,217 @@
+"""Encodes game states as dense tensors for neural networks.
+
+A state is encoded from the perspective of one player as:
+  planes: (NUM_PLANES, NUM_ROWS, NUM_COLUMNS) with one cell per hex.
+  scalars: (NUM_SCALARS,) with the rest of the state.
+
+The encoding is canonical by player: the perspective player is always in
+slot 0, followed by the other players in turn order. Terrain planes are
+relabeled the same way, so the home terrain of slot i is always terrain
+plane i. Only the seat order and the terrain planes are canonicalized: the
+faction one-hot of each slot stays absolute, because factions play
+differently, and relabeled it would always be slot i.
+
+Plane layout:
+  [0, NUM_TERRAINS): one-hot terrain of each hex (water last). Cells outside
+    the map are zero.
+  then, for each player slot, one plane per structure type.
+
+Scalar layout:
+  for each player slot, _SLOT_SIZE values (see _encode_player()).
+  then the round one-hot, the scoring tile of each round, the available bonus
+  cards and the coins on each bonus card.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from simulation.core import board
+from simulation.core import common
+from simulation.core import gameplay
+from simulation.core import player as player_module
+
+DTYPE = np.float32
+
+NUM_ROWS = 9
+NUM_COLUMNS = 13
+NUM_TERRAINS = len(common.Terrain)
+NUM_STRUCTURES = len(common.Structure)
+MAX_PLAYERS = gameplay.Game.MAX_PLAYERS
+
+NUM_PLANES = NUM_TERRAINS + MAX_PLAYERS * NUM_STRUCTURES
+
+# Offsets of the values of a player slot in the scalar vector.
+_PRESENT = 0
+_FACTION = _PRESENT + 1
+_POWER = _FACTION + NUM_TERRAINS - 1
+_RESOURCES = _POWER + len(common.PowerBowl)
+_SHIPPING = _RESOURCES + len(common.Resources.FIELDS)
+_WORKERS_PER_SPADE = _SHIPPING + 1
+_VICTORY_POINTS = _WORKERS_PER_SPADE + 1
+_PRIESTS_IN_PLAY = _VICTORY_POINTS + 1
+_STRUCTURES = _PRIESTS_IN_PLAY + 1
+_BONUS_CARD = _STRUCTURES + NUM_STRUCTURES
+_FAVOR_TILES = _BONUS_CARD + len(common.BonusCard)
+_CULT = _FAVOR_TILES + len(common.FavorTile)
+_SLOT_SIZE = _CULT + len(common.CultTrack)
+
+# Offsets of the global values in the scalar vector.
+_ROUND = MAX_PLAYERS * _SLOT_SIZE
+_SCORING_TILES = _ROUND + gameplay.Game.NUM_ROUNDS
+_AVAILABLE_BONUS_CARDS = (_SCORING_TILES +
+                          gameplay.Game.NUM_ROUNDS * len(common.ScoringTile))
+_BONUS_CARD_COINS = _AVAILABLE_BONUS_CARDS + len(common.BonusCard)
+
+NUM_SCALARS = _BONUS_CARD_COINS + len(common.BonusCard)
+
+
+class StateEncoder:
+  """Encodes states into buffers which are allocated once and reused.
+
+  The arrays returned by encode() and encode_batch() are views of these
+  buffers, so they are only valid until the next call. Copy them to keep
+  them.
+  """
+
+  def __init__(self, game_board: board.GameBoard, capacity: int = 1) -> None:
+    """game_board is any board with the map to encode; only its layout is
+    used."""
+    land = game_board.land_tiles()
+    # The flat (row * NUM_COLUMNS + column) cell of each land tile.
+    self._tile_cells = np.array([_cell(pos) for pos in land], dtype=np.intp)
+    # The cells of the map with water on them.
+    self._water_cells = np.array([
+        _cell(pos) for pos in _map_positions()
+        if game_board.get_terrain(pos) == common.Terrain.WATER
+    ],
+                                 dtype=np.intp)
+    self._planes = np.zeros((0, NUM_PLANES, NUM_ROWS, NUM_COLUMNS),
+                            dtype=DTYPE)
+    self._scalars = np.zeros((0, NUM_SCALARS), dtype=DTYPE)
+    self._reserve(capacity)
+
+  def _reserve(self, capacity: int) -> None:
+    if capacity <= len(self._planes):
+      return
+    self._planes = np.zeros((capacity, NUM_PLANES, NUM_ROWS, NUM_COLUMNS),
+                            dtype=DTYPE)
+    self._scalars = np.zeros((capacity, NUM_SCALARS), dtype=DTYPE)
+
+  def encode(self, game: gameplay.Game,
+             player: player_module.Player) -> Tuple[np.ndarray, np.ndarray]:
+    """Encodes the game from the perspective of the player. Returns the
+    planes and scalars."""
+    planes, scalars = self.encode_batch([(game, player)])
+    return planes[0], scalars[0]
+
+  def encode_batch(self,
+                   states: Sequence[Tuple[gameplay.Game, player_module.Player]]
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """Encodes each (game, perspective player) pair. Returns planes of shape
+    (len(states), NUM_PLANES, NUM_ROWS, NUM_COLUMNS) and scalars of shape
+    (len(states), NUM_SCALARS)."""
+    self._reserve(len(states))
+    planes = self._planes[:len(states)]
+    scalars = self._scalars[:len(states)]
+    planes.fill(0)
+    scalars.fill(0)
+    flat_planes = planes.reshape(len(states), NUM_PLANES, -1)
+    for i, (game, player) in enumerate(states):
+      self._encode(game, player, flat_planes[i], scalars[i])
+    return planes, scalars
+
+  def _encode(self, game: gameplay.Game, player: player_module.Player,
+              planes: np.ndarray, scalars: np.ndarray) -> None:
+    slots = canonical_order(game, player)
+    terrain_planes = _terrain_permutation(
+        [pl.faction.home_terrain() for pl in slots])
+
+    # Terrain of each hex.
+    game_board = game.board
+    terrains = [
+        terrain_planes[game_board.tile_terrain(tile).index]
+        for tile in range(len(self._tile_cells))
+    ]
+    planes[terrains, self._tile_cells] = 1
+    planes[terrain_planes[common.Terrain.WATER.index], self._water_cells] = 1
+
+    # Structures of each player.
+    for slot, pl in enumerate(slots):
+      offset = NUM_TERRAINS + slot * NUM_STRUCTURES
+      for tile in game_board.structure_tiles(pl.faction.home_terrain()):
+        structure = game_board.tile_structure(tile)
+        assert structure is not None
+        planes[offset + structure.index, self._tile_cells[tile]] = 1
+      _encode_player(game, pl,
+                     scalars[slot * _SLOT_SIZE:(slot + 1) * _SLOT_SIZE])
+
+    # Global state.
+    if game.round_index < gameplay.Game.NUM_ROUNDS:
+      scalars[_ROUND + game.round_index] = 1
+    for round_index, scoring_tile in enumerate(game.scoring_tiles):
+      scalars[_SCORING_TILES + round_index * len(common.ScoringTile) +
+              scoring_tile.index] = 1
+    for card in game.available_bonus_cards:
+      scalars[_AVAILABLE_BONUS_CARDS + card.index] = 1
+    scalars[_BONUS_CARD_COINS:_BONUS_CARD_COINS +
+            len(common.BonusCard)] = game.bonus_card_coins
+
+
+def canonical_order(game: gameplay.Game, player: player_module.Player
+                    ) -> List[player_module.Player]:
+  """Returns the players in turn order, starting with the given one."""
+  index = game.players.index(player)
+  return game.players[index:] + game.players[:index]
+
+
+def _terrain_permutation(homes: Sequence[common.Terrain]) -> List[int]:
+  """Returns the plane of each terrain (by index) when the given home
+  terrains come first, followed by the other terrains with water last."""
+  order = list(homes) + [
+      terrain for terrain in common.Terrain
+      if terrain not in homes and terrain != common.Terrain.WATER
+  ] + [common.Terrain.WATER]
+  permutation = [0] * NUM_TERRAINS
+  for plane, terrain in enumerate(order):
+    permutation[terrain.index] = plane
+  return permutation
+
+
+def _encode_player(game: gameplay.Game, player: player_module.Player,
+                   values: np.ndarray) -> None:
+  values[_PRESENT] = 1
+  values[_FACTION + player.faction.home_terrain().index] = 1
+  for bowl in common.PowerBowl:
+    values[_POWER + bowl.index] = player.power[bowl]
+  values[_RESOURCES:_SHIPPING] = player.resources.to_vector()
+  values[_SHIPPING] = player.shipping
+  values[_WORKERS_PER_SPADE] = player.workers_per_spade
+  values[_VICTORY_POINTS] = player.victory_points
+  values[_PRIESTS_IN_PLAY] = player.priests_still_in_play
+  for structure in common.Structure:
+    values[_STRUCTURES + structure.index] = player.structures[structure]
+  if player.bonus_card is not None:
+    values[_BONUS_CARD + player.bonus_card.index] = 1
+  for tile in player.favor_tiles:
+    values[_FAVOR_TILES + tile.index] = 1
+  home = player.faction.home_terrain()
+  for track in common.CultTrack:
+    values[_CULT + track.index] = game.cultboard.positions[track].get(home, 0)
+
+
+def _cell(pos: board.Position) -> int:
+  return (ord(pos.row) - ord('A')) * NUM_COLUMNS + pos.column - 1
+
+
+def _map_positions() -> List[board.Position]:
+  """Returns all positions (land and water) on the map."""
+  positions: List[board.Position] = []
+  for row in range(NUM_ROWS):
+    for column in range(1, NUM_COLUMNS + 1):
+      pos = board.ParsePosition("%s%s" % (chr(ord('A') + row), column))
+      assert pos is not None
+      # Odd rows have one tile less.
+      if row % 2 == 1 and column == NUM_COLUMNS:
+        continue
+      positions.append(pos)
+  return positions
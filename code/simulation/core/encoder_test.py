@@ -0,0 +1,107 @@
+import random
+import unittest
+
+import numpy as np
+
+from simulation.core import common
+from simulation.core import encoder
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player
+from simulation.core import rollout
+
+
+def _played_game(seed: int) -> gameplay.Game:
+  rng = random.Random(seed)
+  players = [
+      player.Player("halflings", faction.Halflings()),
+      player.Player("engineers", faction.Engineers())
+  ]
+  game = gameplay.Game(players=players,
+                       scoring_tiles=rng.sample(list(common.ScoringTile),
+                                                gameplay.Game.NUM_ROUNDS),
+                       bonus_cards=rng.sample(list(common.BonusCard), 5))
+  rollout.play_game(game, [rollout.RandomAgent(rng) for _ in players])
+  return game
+
+
+class TestStateEncoder(unittest.TestCase):
+  def setUp(self) -> None:
+    self.game = _played_game(0)
+    self.encoder = encoder.StateEncoder(self.game.board)
+
+  def test_shapes(self) -> None:
+    planes, scalars = self.encoder.encode(self.game, self.game.players[0])
+    self.assertEqual(
+        planes.shape,
+        (encoder.NUM_PLANES, encoder.NUM_ROWS, encoder.NUM_COLUMNS))
+    self.assertEqual(scalars.shape, (encoder.NUM_SCALARS, ))
+    self.assertEqual(planes.dtype, encoder.DTYPE)
+
+  def test_board_planes(self) -> None:
+    pl = self.game.players[0]
+    planes, _ = self.encoder.encode(self.game, pl)
+    terrain_planes = planes[:encoder.NUM_TERRAINS]
+    # Every hex of the map has exactly one terrain.
+    self.assertEqual(terrain_planes.sum(), 113)
+    self.assertLessEqual(terrain_planes.sum(axis=0).max(), 1)
+    # The perspective player's home terrain is the first plane.
+    for tile, pos in enumerate(self.game.board.land_tiles()):
+      cell = (ord(pos.row) - ord('A'), pos.column - 1)
+      is_home = (
+          self.game.board.tile_terrain(tile) == pl.faction.home_terrain())
+      self.assertEqual(terrain_planes[0][cell], float(is_home))
+      structure = self.game.board.tile_structure(tile)
+      if is_home and structure is not None:
+        self.assertEqual(planes[encoder.NUM_TERRAINS + structure.index][cell],
+                         1)
+    self.assertEqual(
+        planes[encoder.NUM_TERRAINS:].sum(),
+        sum(sum(p.built_structures.values()) for p in self.game.players))
+
+  def test_canonical_by_player(self) -> None:
+    first, second = self.game.players
+    planes0, scalars0 = (array.copy()
+                         for array in self.encoder.encode(self.game, first))
+    planes1, scalars1 = self.encoder.encode(self.game, second)
+    size = encoder._SLOT_SIZE
+    np.testing.assert_array_equal(scalars0[:size], scalars1[size:2 * size])
+    np.testing.assert_array_equal(scalars0[size:2 * size], scalars1[:size])
+    # Factions are not relabeled.
+    self.assertEqual(
+        scalars0[encoder._FACTION + first.faction.home_terrain().index], 1)
+    self.assertEqual(
+        scalars1[encoder._FACTION + second.faction.home_terrain().index], 1)
+    np.testing.assert_array_equal(scalars0[encoder._ROUND:],
+                                  scalars1[encoder._ROUND:])
+    structures = encoder.NUM_TERRAINS
+    np.testing.assert_array_equal(
+        planes0[structures:structures + encoder.NUM_STRUCTURES],
+        planes1[structures + encoder.NUM_STRUCTURES:structures +
+                2 * encoder.NUM_STRUCTURES])
+    # Home terrains are swapped, the rest is the same.
+    np.testing.assert_array_equal(planes0[0], planes1[1])
+    np.testing.assert_array_equal(planes0[2:structures], planes1[2:structures])
+    # Empty slots are zero.
+    self.assertFalse(np.any(scalars0[2 * size:encoder._ROUND]))
+
+  def test_batch_matches_single(self) -> None:
+    games = [_played_game(seed) for seed in range(4)]
+    states = [(game, pl) for game in games for pl in game.players]
+    expected = [
+        tuple(array.copy() for array in self.encoder.encode(game, pl))
+        for game, pl in states
+    ]
+    planes, scalars = self.encoder.encode_batch(states)
+    self.assertEqual(len(planes), len(states))
+    for i, (expected_planes, expected_scalars) in enumerate(expected):
+      np.testing.assert_array_equal(planes[i], expected_planes)
+      np.testing.assert_array_equal(scalars[i], expected_scalars)
+
+    # Smaller batches reuse the same buffer.
+    smaller, _ = self.encoder.encode_batch(states[:2])
+    self.assertTrue(np.shares_memory(smaller, planes))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,6 +1,8 @@
 import abc
+import itertools
+import types
 
-from typing import Dict, List
+from typing import Dict, List, Mapping, NamedTuple, Tuple, Type
 
 from simulation.core import common
 from simulation import utils
@@ -46,8 +48,10 @@ class Faction(abc.ABC):
     pass
 
   @abc.abstractmethod
-  def structure_cost(self, structure: common.Structure,
-                     adjacentEnemyStructure: bool) -> common.Resources:
+  def _structure_cost(self, structure: common.Structure,
+                      adjacentEnemyStructure: bool) -> common.Resources:
+    """The rules for the cost of a structure. Only used when compiling the
+    faction's lookup tables. Use structure_cost() instead."""
     pass
 
   @abc.abstractmethod
@@ -74,9 +78,12 @@ class Faction(abc.ABC):
   def _default_income(self) -> common.Income:
     pass
 
-  def income_for_structures(self, structures: Dict[common.Structure, int]
-                            ) -> common.Income:
-    """This includes default income"""
+  def _compute_income_for_structures(self,
+                                     structures: Mapping[common.Structure, int]
+                                     ) -> common.Income:
+    """The rules for the income of a set of structures. Only used when
+    compiling the faction's lookup tables. Use income_for_structures()
+    instead."""
     income = self._default_income()
     for structure, count in structures.items():
       TOTAL = Faction.TOTAL_STRUCTURES[structure]
@@ -101,6 +108,43 @@ class Faction(abc.ABC):
         income += structure_income[spot]
     return income
 
+  def _tables(self) -> '_FactionTables':
+    """Returns the lookup tables for this faction, compiling them the first
+    time they are requested. The tables are shared by all instances of the
+    same faction."""
+    tables = _COMPILED_TABLES.get(type(self))
+    if tables is None:
+      tables = _compile(self)
+      _COMPILED_TABLES[type(self)] = tables
+    return tables
+
+  def structure_cost_vector(self, structure: common.Structure,
+                            adjacentEnemyStructure: bool) -> Tuple[int, ...]:
+    """Same as structure_cost() but as a common.Resources.to_vector()."""
+    return self._tables().costs[(structure, adjacentEnemyStructure)]
+
+  def structure_cost(self, structure: common.Structure,
+                     adjacentEnemyStructure: bool) -> common.Resources:
+    return common.Resources.from_vector(
+        self.structure_cost_vector(structure, adjacentEnemyStructure))
+
+  def income_vector_for_structures(self,
+                                   structures: Mapping[common.Structure, int]
+                                   ) -> Tuple[int, ...]:
+    """Same as income_for_structures() but as a common.Income.to_vector()."""
+    counts = tuple(
+        structures.get(structure, 0) for structure in _STRUCTURE_ORDER)
+    income = self._tables().incomes.get(counts)
+    if income is None:
+      raise utils.InternalError("Invalid structure counts: %s" % structures)
+    return income
+
+  def income_for_structures(self, structures: Mapping[common.Structure, int]
+                            ) -> common.Income:
+    """This includes default income"""
+    return common.Income.from_vector(
+        self.income_vector_for_structures(structures))
+
   def __str__(self) -> str:
 
     return """
@@ -154,8 +198,8 @@ class Halflings(Faction):
   def staring_shipping(self) -> int:
     return 0
 
-  def structure_cost(self, structure: common.Structure,
-                     adjacentEnemyStructure: bool) -> common.Resources:
+  def _structure_cost(self, structure: common.Structure,
+                      adjacentEnemyStructure: bool) -> common.Resources:
     if structure == common.Structure.DWELLING:
       return common.Resources(workers=1, coins=2)
     if structure == common.Structure.TRADING_POST:
@@ -228,8 +272,8 @@ class Engineers(Faction):
   def staring_shipping(self) -> int:
     return 0
 
-  def structure_cost(self, structure: common.Structure,
-                     adjacentEnemyStructure: bool) -> common.Resources:
+  def _structure_cost(self, structure: common.Structure,
+                      adjacentEnemyStructure: bool) -> common.Resources:
     if structure == common.Structure.DWELLING:
       return common.Resources(workers=1, coins=1)
     if structure == common.Structure.TRADING_POST:
@@ -281,5 +325,37 @@ class Engineers(Faction):
     return common.Income(power=2)
 
 
+# The order of the structure counts used to index _FactionTables.incomes.
+_STRUCTURE_ORDER: Tuple[common.Structure, ...] = tuple(common.Structure)
+
+
+class _FactionTables(NamedTuple):
+  """Immutable lookup tables compiled from the rules of a faction."""
+  # Map from (structure, adjacentEnemyStructure) to the cost vector.
+  costs: Mapping[Tuple[common.Structure, bool], Tuple[int, ...]]
+  # Map from the number of built structures (in _STRUCTURE_ORDER) to the
+  # income vector, including the default income.
+  incomes: Mapping[Tuple[int, ...], Tuple[int, ...]]
+
+
+# Map from faction class to its compiled tables.
+_COMPILED_TABLES: Dict[Type[Faction], _FactionTables] = {}
+
+
+def _compile(faction: Faction) -> _FactionTables:
+  costs = {(structure, adjacent):
+           faction._structure_cost(structure, adjacent).to_vector()
+           for structure in _STRUCTURE_ORDER for adjacent in (False, True)}
+  incomes: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+  for counts in itertools.product(*[
+      range(Faction.TOTAL_STRUCTURES[structure] + 1)
+      for structure in _STRUCTURE_ORDER
+  ]):
+    incomes[counts] = faction._compute_income_for_structures(
+        dict(zip(_STRUCTURE_ORDER, counts))).to_vector()
+  return _FactionTables(costs=types.MappingProxyType(costs),
+                        incomes=types.MappingProxyType(incomes))
+
+
 def all_available() -> List[Faction]:
   return [Halflings(), Engineers()]
@@ -1,7 +1,9 @@
+import itertools
 import unittest
 
 from simulation.core import common
 from simulation.core import faction
+from simulation import utils
 
 
 class TestHalflingFaction(unittest.TestCase):
@@ -201,3 +203,36 @@ class TestFactionModule(unittest.TestCase):
   def testAllFactions(self) -> None:
     # A change detector test when someone tries to add more factions.
     self.assertEqual(len(faction.all_available()), 2)
+
+  def testLookupTablesMatchRules(self) -> None:
+    for player_faction in faction.all_available():
+      for structure in common.Structure:
+        for adjacent in [False, True]:
+          self.assertEqual(player_faction.structure_cost(structure, adjacent),
+                           player_faction._structure_cost(structure, adjacent))
+      structures = list(common.Structure)
+      for counts in itertools.product(
+          *
+          [range(faction.Faction.TOTAL_STRUCTURES[s] + 1)
+           for s in structures]):
+        built = dict(zip(structures, counts))
+        self.assertEqual(player_faction.income_for_structures(built),
+                         player_faction._compute_income_for_structures(built))
+
+  def testLookupTablesAreShared(self) -> None:
+    self.assertIs(faction.Halflings()._tables(), faction.Halflings()._tables())
+    self.assertIsNot(faction.Halflings()._tables(),
+                     faction.Engineers()._tables())
+
+  def testReturnedValuesAreCopies(self) -> None:
+    halfling = faction.Halflings()
+    income = halfling.income_for_structures({common.Structure.DWELLING: 1})
+    income += common.Income(coins=100)
+    self.assertEqual(
+        halfling.income_for_structures({common.Structure.DWELLING: 1}),
+        common.Income(workers=2))
+
+  def testTooManyStructures(self) -> None:
+    with self.assertRaises(utils.InternalError):
+      faction.Halflings().income_for_structures(
+          {common.Structure.STRONGHOLD: 2})
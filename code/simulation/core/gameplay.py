@@ -1,12 +1,16 @@
+import operator
 import random
 
 from typing import List, Optional
 
+from simulation.core import actions
 from simulation.core import common
 from simulation.core import player as player_module
 from simulation.core import cult
+from simulation.core import journal as journal_lib
 from simulation.interface import io
 from simulation.core import board
+from simulation import utils
 
 
 class Game:
@@ -14,9 +18,11 @@ class Game:
   MIN_PLAYERS = 2
   MAX_PLAYERS = 5
 
-  def __init__(self, players: List[player_module.Player],
+  def __init__(self,
+               players: List[player_module.Player],
                scoring_tiles: List[common.ScoringTile],
-               bonus_cards: List[common.BonusCard], interface: io.IO) -> None:
+               bonus_cards: List[common.BonusCard],
+               interface: Optional[io.IO] = None) -> None:
     self.num_players = len(players)
     assert Game.MIN_PLAYERS <= self.num_players <= Game.MAX_PLAYERS
     # self.players[i] is the player which will go on turn i.
@@ -26,14 +32,43 @@ class Game:
     self.scoring_tiles: List[common.ScoringTile] = scoring_tiles
     # just a list of the currently available bonus tiles.
     self.available_bonus_cards: List[common.BonusCard] = bonus_cards
+    # self.bonus_card_coins[card.index] is the number of coins which have
+    # accumulated on the card. This is per-game state, so it must not be
+    # stored on the (global) common.BonusCard members.
+    self.bonus_card_coins: List[int] = [0] * len(common.BonusCard)
 
     # The index of the current round being played.
     self.round_index: int = 0
 
     self.board = board.GameBoard()
+    self.action_space = actions.ActionSpace(self.board)
     self.cultboard = cult.CultBoard(
         factions=[player.faction for player in self.players])
-    self.interface = interface
+    # The interface used to ask players for their decisions. Games driven
+    # directly through apply_action() (eg, by agents) don't need one.
+    self.interface: Optional[io.IO] = interface
+
+    # If set, mutations of the game (and its board, cult board and players) are
+    # recorded in this journal. See enable_journal().
+    self.journal: Optional[journal_lib.Journal] = None
+
+  def _io(self) -> io.IO:
+    if self.interface is None:
+      raise utils.InternalError("The game has no interface to ask players "
+                                "for decisions.")
+    return self.interface
+
+  def enable_journal(self) -> journal_lib.Journal:
+    """Starts recording all mutations of the board, cult board and players
+    into a shared journal, which is returned. Searches can then mark() the
+    journal, apply actions and undo_to() the mark to restore the game."""
+    game_journal = journal_lib.Journal()
+    self.journal = game_journal
+    self.board.journal = game_journal
+    self.cultboard.journal = game_journal
+    for player in self.players:
+      player.journal = game_journal
+    return game_journal
 
   def player_has_opponent_neighbors_at_position(self,
                                                 player: player_module.Player,
@@ -45,40 +80,107 @@ class Game:
     ]
     return len(neighbors) > 0
 
+  def legal_actions(self, player: player_module.Player) -> int:
+    """Returns a bitmask over self.action_space of the legal actions for the
+    player."""
+    return actions.legal_actions(self.action_space, self.board, player,
+                                 self.available_bonus_cards)
+
+  def apply_action(self, player: player_module.Player, action: int) -> None:
+    """Applies the given action (an index into self.action_space) for the
+    player. The action must be legal."""
+    decoded: actions.Action = self.action_space.decode(action)
+    home: common.Terrain = player.faction.home_terrain()
+    if decoded.type == actions.ActionType.BUILD:
+      assert decoded.tile is not None
+      self._transform(player, decoded.tile)
+      self.board.build(decoded.tile, common.Structure.DWELLING)
+      player.build(common.Structure.DWELLING,
+                   adjacentEnemies=actions.has_adjacent_opponents(
+                       self.board, self.board.tile_index(decoded.tile), home))
+    elif decoded.type == actions.ActionType.TRANSFORM:
+      assert decoded.tile is not None
+      self._transform(player, decoded.tile)
+    elif decoded.type == actions.ActionType.UPGRADE:
+      assert decoded.tile is not None and decoded.structure is not None
+      adjacent: bool = actions.has_adjacent_opponents(
+          self.board, self.board.tile_index(decoded.tile), home)
+      self.board.build(decoded.tile, decoded.structure)
+      player.upgrade(decoded.structure, adjacentEnemies=adjacent)
+    elif decoded.type == actions.ActionType.CULT:
+      assert decoded.track is not None
+      player.pay(common.Resources(priests=1))
+      _, power = self.cultboard.sacrifice_priest_to_order(
+          player, decoded.track)
+      player.gain_power(power)
+    elif decoded.type == actions.ActionType.PASS:
+      assert decoded.bonus_card is not None
+      self.take_bonus_card(player, decoded.bonus_card)
+    else:
+      raise utils.InternalError("Unknown action: %s" % (decoded, ))
+
+  def _transform(self, player: player_module.Player,
+                 pos: board.Position) -> None:
+    """Transforms the tile to the home terrain of the player, paying for
+    the spades."""
+    home: common.Terrain = player.faction.home_terrain()
+    spades: int = actions.spades_required(self.board.get_terrain(pos), home)
+    if spades == 0:
+      return
+    player.pay(player.spade_cost(spades))
+    self.board.transform(pos, home)
+
   def _transform_and_build(self, player: player_module.Player) -> None:
     while True:
-      pos: board.Position = self.interface.request_location(player)  # noqa
-      # final_terrains: List[common.Terrain] = player.ReachableTerrains()
-      pass
+      pos: board.Position = self._io().request_location(player)
+      try:
+        action: int = self.action_space.build(self.board.tile_index(pos))
+      except KeyError:
+        self._io().invalid_input()
+        continue
+      if not (self.legal_actions(player) >> action) & 1:
+        self._io().invalid_input()
+        continue
+      self.apply_action(player, action)
+      break
 
   def _place_initial_dwellings(self, player: player_module.Player) -> None:
     while True:
-      pos: board.Position = self.interface.request_location(player)
+      pos: board.Position = self._io().request_location(player)
       can_be_built = self.board.can_be_built(
           pos,
           structure=common.Structure.DWELLING,
           final_terrain=[player.faction.home_terrain()])
       if not can_be_built:
-        self.interface.invalid_input()
+        self._io().invalid_input()
         continue
-
-      self.board.build(pos, structure=common.Structure.DWELLING)
-      # This one is built for free!
-      player.build(
-          common.Structure.DWELLING,
-          adjacentEnemies=self.player_has_opponent_neighbors_at_position(
-              player, pos),
-          free=True)
+      self.place_initial_dwelling(player, pos)
       break
 
+  def place_initial_dwelling(self, player: player_module.Player,
+                             pos: board.Position) -> None:
+    """Places one of the player's initial dwellings at the given position,
+    which must be an empty tile of the player's home terrain."""
+    if not self.board.can_be_built(pos, common.Structure.DWELLING,
+                                   [player.faction.home_terrain()]):
+      raise utils.InternalError("%s can't place a dwelling at %s." %
+                                (player.name, pos))
+    self.board.build(pos, structure=common.Structure.DWELLING)
+    # This one is built for free!
+    player.build(
+        common.Structure.DWELLING,
+        adjacentEnemies=self.player_has_opponent_neighbors_at_position(
+            player, pos),
+        free=True)
+
   def initialize_dwellings(self) -> None:
     # 1st dwellings.
-    self.interface.inform_initial_dwelling_placement()
+    self._io().inform_initial_dwelling_placement()
     for player in self.players:
       self._place_initial_dwellings(player)
 
     # 2nd dwellings.
-    self.interface.inform_initial_dwelling_placement()
+    self._io().inform_initial_dwelling_placement()
     for player in reversed(self.players):
       self._place_initial_dwellings(player)
 
@@ -86,28 +188,54 @@ class Game:
 
   def swap_bonus_cards(self, player: player_module.Player) -> None:
     """The player has passed (usually) and we need to swap cards."""
-    selected_index: int = self.interface.request_bonus_card_selection(
-        player, self.available_bonus_cards)
-    selected_card: common.BonusCard = self.available_bonus_cards.pop(
-        selected_index)
+    selected_index: int = self._io().request_bonus_card_selection(
+        player, self.available_bonus_cards, [
+            self.bonus_card_coins[card.index]
+            for card in self.available_bonus_cards
+        ])
+    self.take_bonus_card(player, self.available_bonus_cards[selected_index])
+
+  def take_bonus_card(self, player: player_module.Player,
+                      selected_card: common.BonusCard) -> None:
+    """The player takes the given card from the available cards, returning
+    his current card (if any)."""
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self.available_bonus_cards,
+                          slice(None), list(self.available_bonus_cards))
+    self.available_bonus_cards.remove(selected_card)
+    coins: int = self.bonus_card_coins[selected_card.index]
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self.bonus_card_coins,
+                          selected_card.index, coins)
+    self.bonus_card_coins[selected_card.index] = 0
     returnedCard: Optional[common.BonusCard] = player.take_bonus_card(
-        selected_card)
+        selected_card, coins)
     if returnedCard:
       self.available_bonus_cards.append(returnedCard)
 
+  def end_bonus_card_selection(self) -> None:
+    """Called once all players selected their initial bonus card."""
+    self._end_round_for_bonus_cards()
+
   def _end_round_for_bonus_cards(self) -> None:
     """Perform required activities at the end of a round"""
+    if self.journal is not None:
+      self.journal.record(operator.setitem, self.bonus_card_coins, slice(None),
+                          list(self.bonus_card_coins))
     for card in self.available_bonus_cards:
-      card.coins += 1
+      self.bonus_card_coins[card.index] += 1
 
   def end_round(self) -> None:
     # TODO....
     self._end_round_for_bonus_cards()
+    if self.journal is not None:
+      self.journal.record(setattr, self, 'round_index', self.round_index)
+    self.round_index += 1
 
   def initialize_bonus_cards(self) -> None:
     for player in reversed(self.players):
       self.swap_bonus_cards(player)
-    self._end_round_for_bonus_cards()
+    self.end_bonus_card_selection()
 
   def income_phase(self) -> None:
     """Go through the income phase of a Round"""
@@ -120,9 +248,14 @@ class Game:
       pass
 
 
-def select_game_scoring_tiles() -> List[common.ScoringTile]:
-  return random.sample(list(common.ScoringTile), Game.NUM_ROUNDS)
+def select_game_scoring_tiles(
+    rng: Optional[random.Random] = None) -> List[common.ScoringTile]:
+  sample = rng.sample if rng is not None else random.sample
+  return sample(list(common.ScoringTile), Game.NUM_ROUNDS)
 
 
-def select_game_bonus_cards(num_players: int) -> List[common.BonusCard]:
-  return random.sample(list(common.BonusCard), num_players + 3)
+def select_game_bonus_cards(
+    num_players: int,
+    rng: Optional[random.Random] = None) -> List[common.BonusCard]:
+  sample = rng.sample if rng is not None else random.sample
+  return sample(list(common.BonusCard), num_players + 3)
@@ -1,12 +1,15 @@
 import unittest
 import random
 
+from typing import List, Tuple
+
 from unittest import mock
 
 from simulation.core import board
 from simulation.core import cult
 from simulation.core import gameplay
 from simulation.core import common
+from simulation.core import faction
 from simulation.core import player
 from simulation.interface import io
 
@@ -52,6 +55,15 @@ class TestGameObject(unittest.TestCase):
     self.assertEqual(len(gameplay.select_game_bonus_cards(num_players=5)),
                      5 + 3)
 
+  def test_selecting_with_rng(self) -> None:
+    random.seed(1)
+    state = random.getstate()
+    self.assertEqual(gameplay.select_game_scoring_tiles(random.Random(7)),
+                     gameplay.select_game_scoring_tiles(random.Random(7)))
+    self.assertEqual(gameplay.select_game_bonus_cards(3, random.Random(7)),
+                     gameplay.select_game_bonus_cards(3, random.Random(7)))
+    self.assertEqual(random.getstate(), state)
+
   @mock.patch.object(cult, 'CultBoard')
   def test_opponent_at_position(self, _: mock.Mock) -> None:
     player1 = mock.Mock(auto_spec=player.Player)
@@ -140,3 +152,79 @@ class TestGameObject(unittest.TestCase):
           scoring_tiles=[],
           bonus_cards=[],
           interface=self.mock_interface)
+
+
+def _new_game(seed: int) -> Tuple[gameplay.Game, mock.Mock]:
+  """A game whose players pick bonus cards at random using their own rng."""
+  rng = random.Random(seed)
+  num_players = rng.randint(gameplay.Game.MIN_PLAYERS,
+                            gameplay.Game.MAX_PLAYERS)
+  players = [
+      player.Player("player%s" % i, rng.choice(faction.all_available()))
+      for i in range(num_players)
+  ]
+  interface = mock.Mock(auto_spec=io.IO)
+  interface.request_bonus_card_selection.side_effect = (
+      lambda pl, available, coins: rng.randrange(len(available)))
+  bonus_cards = rng.sample(list(common.BonusCard), num_players + 3)
+  return gameplay.Game(players=players,
+                       scoring_tiles=[],
+                       bonus_cards=bonus_cards,
+                       interface=interface), interface
+
+
+def _game_state(game: gameplay.Game) -> List[object]:
+  return [
+      sorted(card.name for card in game.available_bonus_cards),
+      list(game.bonus_card_coins),
+  ] + [(p.bonus_card, p.resources.coins) for p in game.players]
+
+
+class TestBonusCardCoins(unittest.TestCase):
+  def test_coins_accumulate_per_game(self) -> None:
+    game1, _ = _new_game(seed=0)
+    game2, _ = _new_game(seed=1)
+    card = game1.available_bonus_cards[0]
+    game1.end_round()
+    game1.end_round()
+    self.assertEqual(game1.bonus_card_coins[card.index], 2)
+    self.assertEqual(game2.bonus_card_coins, [0] * len(common.BonusCard))
+
+  def test_player_collects_coins(self) -> None:
+    game, interface = _new_game(seed=0)
+    interface.request_bonus_card_selection.side_effect = None
+    interface.request_bonus_card_selection.return_value = 0
+    card = game.available_bonus_cards[0]
+    game.end_round()
+    test_player = game.players[0]
+    coins = test_player.resources.coins
+    game.swap_bonus_cards(test_player)
+    self.assertEqual(test_player.bonus_card, card)
+    self.assertEqual(test_player.resources.coins, coins + 1)
+    self.assertEqual(game.bonus_card_coins[card.index], 0)
+
+  def test_many_interleaved_games(self) -> None:
+    NUM_GAMES = 200
+
+    def play_round(game: gameplay.Game) -> None:
+      for player in game.players:
+        game.swap_bonus_cards(player)
+      game.end_round()
+
+    # Play each game on its own.
+    expected = []
+    for seed in range(NUM_GAMES):
+      game, _ = _new_game(seed)
+      game.initialize_bonus_cards()
+      for _ in range(gameplay.Game.NUM_ROUNDS):
+        play_round(game)
+      expected.append(_game_state(game))
+
+    # Play all games at once, one round at a time.
+    games = [_new_game(seed)[0] for seed in range(NUM_GAMES)]
+    for game in games:
+      game.initialize_bonus_cards()
+    for _ in range(gameplay.Game.NUM_ROUNDS):
+      for game in games:
+        play_round(game)
+    self.assertEqual([_game_state(game) for game in games], expected)
@@ -0,0 +1,45 @@
+from typing import Any, Callable, List, Tuple
+
+from simulation import utils
+
+# An undo entry is a function along with the arguments which, when called,
+# reverts a single mutation.
+UndoEntry = Tuple[Callable[..., None], Tuple[Any, ...]]
+
+
+class Journal:
+  """An append-only log of undo entries for reversible game actions.
+
+  Mutating methods of objects holding a journal record how to revert their
+  changes. Callers take a mark() before applying actions and call undo_to()
+  with that mark to roll the state back. This allows searching over a single
+  mutable game state without copying it for every branch.
+  """
+
+  def __init__(self) -> None:
+    self._entries: List[UndoEntry] = []
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def mark(self) -> int:
+    """Returns a mark which can later be passed to undo_to()."""
+    return len(self._entries)
+
+  def record(self, undo: Callable[..., None], *args: Any) -> None:
+    """Records that undo(*args) reverts the most recent mutation."""
+    self._entries.append((undo, args))
+
+  def undo_to(self, mark: int) -> None:
+    """Reverts all mutations recorded since the given mark, newest first."""
+    if mark < 0 or mark > len(self._entries):
+      raise utils.InternalError(
+          "Invalid journal mark %s for journal of length %s." %
+          (mark, len(self._entries)))
+    while len(self._entries) > mark:
+      undo, args = self._entries.pop()
+      undo(*args)
+
+  def clear(self) -> None:
+    """Forgets all recorded entries. The current state becomes permanent."""
+    self._entries.clear()
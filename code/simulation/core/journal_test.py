@@ -0,0 +1,244 @@
+import unittest
+
+from typing import Any, Dict
+
+from unittest import mock
+
+from simulation.core import board
+from simulation.core import common
+from simulation.core import cult
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import journal
+from simulation.core import player
+from simulation.interface import io
+from simulation import utils
+
+
+def _player_state(test_player: player.Player) -> Dict[str, Any]:
+  return {
+      'power': dict(test_player.power),
+      'resources': str(test_player.resources),
+      'shipping': test_player.shipping,
+      'used_town_keys': dict(test_player.used_town_keys),
+      'structures': dict(test_player.structures),
+      'built_structures': dict(test_player.built_structures),
+      'priests_still_in_play': test_player.priests_still_in_play,
+      'bonus_card': test_player.bonus_card,
+  }
+
+
+def _cult_state(cultBoard: cult.CultBoard) -> Dict[str, Any]:
+  return {
+      'available_orders': {
+          track: list(orders)
+          for track, orders in cultBoard.available_orders.items()
+      },
+      'occupied_orders': {
+          track: dict(orders)
+          for track, orders in cultBoard.occupied_orders.items()
+      },
+      'positions': {
+          track: dict(positions)
+          for track, positions in cultBoard.positions.items()
+      },
+  }
+
+
+class TestJournal(unittest.TestCase):
+  def test_undo_to_mark(self) -> None:
+    values = [0]
+    test_journal = journal.Journal()
+    self.assertEqual(test_journal.mark(), 0)
+
+    def set_value(value: int) -> None:
+      values[0] = value
+
+    test_journal.record(set_value, values[0])
+    values[0] = 1
+    mark = test_journal.mark()
+    test_journal.record(set_value, values[0])
+    values[0] = 2
+    self.assertEqual(len(test_journal), 2)
+
+    test_journal.undo_to(mark)
+    self.assertEqual(values[0], 1)
+    self.assertEqual(len(test_journal), 1)
+    test_journal.undo_to(0)
+    self.assertEqual(values[0], 0)
+    self.assertEqual(len(test_journal), 0)
+
+  def test_invalid_mark(self) -> None:
+    test_journal = journal.Journal()
+    with self.assertRaises(utils.InternalError):
+      test_journal.undo_to(1)
+    with self.assertRaises(utils.InternalError):
+      test_journal.undo_to(-1)
+
+
+class TestPlayerJournal(unittest.TestCase):
+  def setUp(self) -> None:
+    self.journal = journal.Journal()
+    self.player = player.Player("test", faction.Halflings())
+    self.player.journal = self.journal
+
+  def test_undo_build(self) -> None:
+    initial = _player_state(self.player)
+    self.player.build(common.Structure.DWELLING, adjacentEnemies=False)
+    self.player.build(common.Structure.TRADING_POST, adjacentEnemies=True)
+    self.assertNotEqual(_player_state(self.player), initial)
+    self.journal.undo_to(0)
+    self.assertEqual(_player_state(self.player), initial)
+
+  def test_undo_build_burning_power(self) -> None:
+    self.player.gain_power(6)
+    initial = _player_state(self.player)
+    mark = self.journal.mark()
+    # Not enough workers, so the player needs to use power.
+    self.player.build(common.Structure.STRONGHOLD, adjacentEnemies=False)
+    self.assertEqual(self.player.resources.workers, 0)
+    self.assertNotEqual(_player_state(self.player), initial)
+    self.journal.undo_to(mark)
+    self.assertEqual(_player_state(self.player), initial)
+
+  def test_undo_power(self) -> None:
+    initial = _player_state(self.player)
+    self.player.gain_power(19)
+    mark = self.journal.mark()
+    after_gain = _player_state(self.player)
+    self.player.use_power(7)
+    self.journal.undo_to(mark)
+    self.assertEqual(_player_state(self.player), after_gain)
+    self.journal.undo_to(0)
+    self.assertEqual(_player_state(self.player), initial)
+
+  def test_undo_take_bonus_card(self) -> None:
+    initial = _player_state(self.player)
+    self.player.take_bonus_card(common.BonusCard.POWER3_SHIPPING, coins=1)
+    self.player.take_bonus_card(common.BonusCard.COIN6, coins=2)
+    self.assertEqual(self.player.resources.coins, 18)
+    self.journal.undo_to(0)
+    self.assertEqual(_player_state(self.player), initial)
+
+  def test_undo_town_keys(self) -> None:
+    initial = _player_state(self.player)
+    self.player.gain_town(common.TownKey.PRIEST)
+    self.assertTrue(self.player.use_town_key())
+    self.journal.undo_to(0)
+    self.assertEqual(_player_state(self.player), initial)
+
+
+class TestCultBoardJournal(unittest.TestCase):
+  def test_undo_sacrifice_priest_to_order(self) -> None:
+    factions = [faction.Halflings(), faction.Engineers()]
+    player1 = player.Player(name="test", player_faction=factions[0])
+    player2 = player.Player(name="test", player_faction=factions[1])
+    cultBoard = cult.CultBoard(factions=factions)
+    test_journal = journal.Journal()
+    player1.journal = test_journal
+    player2.journal = test_journal
+    cultBoard.journal = test_journal
+    player1.gain_town(common.TownKey.PRIEST)
+
+    initial_board = _cult_state(cultBoard)
+    initial_players = [_player_state(player1), _player_state(player2)]
+    marks = []
+    states = []
+    # Fill the orders and take the town key at the top of the track.
+    for test_player in [player1] * 4 + [player2] * 3:
+      marks.append(test_journal.mark())
+      states.append(_cult_state(cultBoard))
+      cultBoard.sacrifice_priest_to_order(test_player, common.CultTrack.EARTH)
+    self.assertEqual(
+        cultBoard.positions[common.CultTrack.EARTH][common.Terrain.PLAIN], 10)
+
+    # Undo one action at a time.
+    for mark, state in reversed(list(zip(marks, states))):
+      test_journal.undo_to(mark)
+      self.assertEqual(_cult_state(cultBoard), state)
+    self.assertEqual(_cult_state(cultBoard), initial_board)
+    self.assertEqual([_player_state(player1),
+                      _player_state(player2)], initial_players)
+
+
+class TestGameBoardJournal(unittest.TestCase):
+  def test_undo_build(self) -> None:
+    gameBoard = board.GameBoard()
+    test_journal = journal.Journal()
+    gameBoard.journal = test_journal
+    a1 = board.ParsePosition("A1")
+    assert a1 is not None
+    gameBoard.build(a1, common.Structure.DWELLING)
+    mark = test_journal.mark()
+    gameBoard.build(a1, common.Structure.TRADING_POST)
+    gameBoard.build(a1, common.Structure.TEMPLE)
+    test_journal.undo_to(mark)
+    self.assertEqual(gameBoard.get_structure(a1), common.Structure.DWELLING)
+    test_journal.undo_to(0)
+    self.assertIsNone(gameBoard.get_structure(a1))
+    self.assertTrue(
+        gameBoard.can_be_built(a1, common.Structure.DWELLING,
+                               [common.Terrain.PLAIN]))
+
+
+class TestGameJournal(unittest.TestCase):
+  def test_enable_journal(self) -> None:
+    players = [
+        player.Player("test1", faction.Halflings()),
+        player.Player("test2", faction.Engineers())
+    ]
+    game = gameplay.Game(players=players,
+                         scoring_tiles=[],
+                         bonus_cards=[],
+                         interface=mock.Mock(auto_spec=io.IO))
+    game_journal = game.enable_journal()
+    initial = [_player_state(p) for p in players]
+    initial_cult = _cult_state(game.cultboard)
+
+    a1 = board.ParsePosition("A1")
+    assert a1 is not None
+    game.board.build(a1, common.Structure.DWELLING)
+    players[0].build(common.Structure.DWELLING, adjacentEnemies=False)
+    game.cultboard.sacrifice_priest_to_order(players[1], common.CultTrack.FIRE)
+    players[1].gain_power(5)
+    self.assertEqual(game.board.get_structure(a1), common.Structure.DWELLING)
+
+    game_journal.undo_to(0)
+    self.assertIsNone(game.board.get_structure(a1))
+    self.assertEqual([_player_state(p) for p in players], initial)
+    self.assertEqual(_cult_state(game.cultboard), initial_cult)
+
+  def test_undo_bonus_cards(self) -> None:
+    players = [
+        player.Player("test1", faction.Halflings()),
+        player.Player("test2", faction.Engineers())
+    ]
+    interface = mock.Mock(auto_spec=io.IO)
+    interface.request_bonus_card_selection.return_value = 0
+    cards = [
+        common.BonusCard.PRIEST, common.BonusCard.COIN6,
+        common.BonusCard.CULT_COIN4, common.BonusCard.SPADE_COIN2,
+        common.BonusCard.DWELLING_COIN2
+    ]
+    game = gameplay.Game(players=players,
+                         scoring_tiles=[],
+                         bonus_cards=list(cards),
+                         interface=interface)
+    game.initialize_bonus_cards()
+    available = list(game.available_bonus_cards)
+    coins = list(game.bonus_card_coins)
+    initial = [_player_state(p) for p in players]
+
+    game_journal = game.enable_journal()
+    game.swap_bonus_cards(players[0])
+    game.end_round()
+    game.swap_bonus_cards(players[1])
+    game_journal.undo_to(0)
+
+    self.assertEqual(game.available_bonus_cards, available)
+    self.assertEqual(game.bonus_card_coins, coins)
+    self.assertEqual([_player_state(p) for p in players], initial)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,14 +1,24 @@
 import copy
+import operator
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from simulation.core import common
 from simulation.core import faction
+from simulation.core import journal as journal_lib
 from simulation import utils
 
+# The scalar state of a player, as returned by Player._snapshot().
+_Snapshot = Tuple[int, int, int, int, int, int, int, int, int, Optional[
+    common.BonusCard]]
+
 
 class Player:
   MAX_PRIESTS = 7
+  # All implemented factions start paying 3 workers per spade.
+  STARTING_WORKERS_PER_SPADE = 3
+  # The combined power value of the structures needed to found a town.
+  TOWN_POWER = 7
 
   def __init__(self, name: str, player_faction: faction.Faction) -> None:
     self.name = name
@@ -49,9 +59,49 @@ class Player:
     # A list of favor tiles the player currently holds.
     self.favor_tiles: List[common.FavorTile] = []
 
-    # Tracks the number of spades
+    # Tracks the number of workers required to get a single spade.
+    self.workers_per_spade: int = Player.STARTING_WORKERS_PER_SPADE
+
+    # If set, all mutations to the player are recorded in this journal so
+    # they can be undone.
+    self.journal: Optional[journal_lib.Journal] = None
+
+  def _snapshot(self) -> '_Snapshot':
+    """Returns the scalar state of the player which actions can modify."""
+    return (self.power[common.PowerBowl.I], self.power[common.PowerBowl.II],
+            self.power[common.PowerBowl.III], self.resources.coins,
+            self.resources.workers, self.resources.bridges,
+            self.resources.priests, self.shipping, self.priests_still_in_play,
+            self.bonus_card)
+
+  def _restore(self, powerI: int, powerII: int, powerIII: int, coins: int,
+               workers: int, bridges: int, priests: int, shipping: int,
+               priests_still_in_play: int,
+               bonus_card: Optional[common.BonusCard]) -> None:
+    """Inverse of _snapshot(). Modifies the existing objects in place."""
+    self.power[common.PowerBowl.I] = powerI
+    self.power[common.PowerBowl.II] = powerII
+    self.power[common.PowerBowl.III] = powerIII
+    self.resources.coins = coins
+    self.resources.workers = workers
+    self.resources.bridges = bridges
+    self.resources.priests = priests
+    self.shipping = shipping
+    self.priests_still_in_play = priests_still_in_play
+    self.bonus_card = bonus_card
+
+  def _record_state(self) -> None:
+    """Records the current scalar state of the player in the journal."""
+    if self.journal is not None:
+      self.journal.record(self._restore, *self._snapshot())
+
+  def _restore_structure(self, structure: common.Structure, available: int,
+                         built: int) -> None:
+    self.structures[structure] = available
+    self.built_structures[structure] = built
 
   def sacrifice_priest_to_order(self) -> None:
+    self._record_state()
     self.priests_still_in_play -= 1
 
   def _max_useable_power(self) -> int:
@@ -81,6 +131,35 @@ class Player:
     return (self._max_useable_power() >=
             self._power_required_to_zero_negative_resources(resources))
 
+  def can_afford(self, cost: common.Resources) -> bool:
+    """Returns true if the player can pay the given cost, possibly by using
+    power to cover missing resources."""
+    remainingResources = self.resources - cost
+    if remainingResources.is_valid():
+      return True
+    return self._can_burn_power_for_missing_resources(remainingResources)
+
+  def pay(self, cost: common.Resources) -> None:
+    """Pays the given cost, using power to cover any missing resources.
+
+    Raises an error if the player can't afford it.
+    """
+    if not self.can_afford(cost):
+      raise utils.InternalError(
+          "Attempted to pay %s which is impossible with current "
+          "resources: %s and power: %s" % (cost, self.resources, self.power))
+    self._record_state()
+    self.resources -= cost
+    if self.resources.is_valid():
+      return
+    self.use_power(
+        self._power_required_to_zero_negative_resources(self.resources))
+    self.resources.force_valid()
+
+  def spade_cost(self, spades: int) -> common.Resources:
+    """The cost of the given number of spades."""
+    return common.Resources(workers=spades * self.workers_per_spade)
+
   def can_build(self, structure: common.Structure,
                 adjacentEnemies: bool) -> bool:
     """
@@ -93,10 +172,7 @@ class Player:
       return False
     cost: common.Resources = self.faction.structure_cost(
         structure, adjacentEnemies)
-    remainingResources = self.resources - cost
-    if remainingResources.is_valid():
-      return True
-    return self._can_burn_power_for_missing_resources(remainingResources)
+    return self.can_afford(cost)
 
   def build(self,
             structure: common.Structure,
@@ -109,21 +185,35 @@ class Player:
           "Attempted to build %s which is impossible with current "
           "resources: %s and power: %s" %
           (structure, self.resources, self.power))
+    if self.journal is not None:
+      self.journal.record(self._restore_structure, structure,
+                          self.structures[structure],
+                          self.built_structures[structure])
+      self._record_state()
     # Even though we haven't paid, we assume it's possible to build it.
     # It's invalid to call this function otherwise.
     self.structures[structure] -= 1
     self.built_structures[structure] += 1
     if free:
       return
-    cost: common.Resources = self.faction.structure_cost(
-        structure, adjacentEnemies)
-    self.resources -= cost
-    if self.resources.is_valid():
-      return
-    self.use_power(
-        self._power_required_to_zero_negative_resources(self.resources))
-    self.resources.force_valid()
-    return
+    self.pay(self.faction.structure_cost(structure, adjacentEnemies))
+
+  def upgrade(self, structure: common.Structure,
+              adjacentEnemies: bool) -> None:
+    """Asks the player to upgrade one of his built structures to the
+    specified structure. The replaced structure returns to the player's
+    board."""
+    previous: Optional[common.Structure] = structure.upgraded_from()
+    if previous is None or self.built_structures[previous] <= 0:
+      raise utils.InternalError("Attempted to upgrade to %s without a %s." %
+                                (structure, previous))
+    self.build(structure, adjacentEnemies)
+    if self.journal is not None:
+      self.journal.record(self._restore_structure, previous,
+                          self.structures[previous],
+                          self.built_structures[previous])
+    self.structures[previous] += 1
+    self.built_structures[previous] -= 1
 
   def collect_phase_ii_income(self) -> None:
     """
@@ -151,6 +241,9 @@ class Player:
     """
     for key, used in self.used_town_keys.items():
       if not used:
+        if self.journal is not None:
+          self.journal.record(operator.setitem, self.used_town_keys, key,
+                              False)
         self.used_town_keys[key] = True
         return True
     return False
@@ -173,6 +266,7 @@ class Player:
       raise utils.InternalError(
           "Requesting to use %s power, which is not possible! Current "
           "power: %s." % (amount, self.power))
+    self._record_state()
     # We assume you'll always use power from Bowl 3 downwards.
     to_move: int = min(amount, self.power[common.PowerBowl.III])
     amount -= to_move
@@ -190,10 +284,32 @@ class Player:
     self.power[common.PowerBowl.I] += (to_move // 2)
     return
 
-  def take_bonus_card(self,
-                      card: common.BonusCard) -> Optional[common.BonusCard]:
-    """Takes the given card and returns the card the player currently holds,
-    if any"""
+  def spend_power(self, amount: int) -> None:
+    """Spends the given amount of power from bowl III only, moving it back
+    to bowl I. Unlike use_power(), never burns power to make up for a
+    shortfall."""
+    if amount < 0 or amount > self.power[common.PowerBowl.III]:
+      raise utils.InternalError("Can't spend %s power with power: %s." %
+                                (amount, self.power))
+    self._record_state()
+    self.power[common.PowerBowl.III] -= amount
+    self.power[common.PowerBowl.I] += amount
+
+  def burn_power(self, amount: int) -> None:
+    """Burns the given amount of power: twice that is removed from bowl II
+    and half of it moves to bowl III."""
+    if amount < 0 or 2 * amount > self.power[common.PowerBowl.II]:
+      raise utils.InternalError("Can't burn %s power with power: %s." %
+                                (amount, self.power))
+    self._record_state()
+    self.power[common.PowerBowl.II] -= 2 * amount
+    self.power[common.PowerBowl.III] += amount
+
+  def take_bonus_card(self, card: common.BonusCard,
+                      coins: int = 0) -> Optional[common.BonusCard]:
+    """Takes the given card along with the coins which had accumulated on it
+    and returns the card the player currently holds, if any"""
+    self._record_state()
     oldCard = self.bonus_card
     # NWe need to handle if we had a shipping card.
     if oldCard is not None and oldCard == common.BonusCard.POWER3_SHIPPING:
@@ -202,8 +318,7 @@ class Player:
       self.shipping -= 1
     self.bonus_card = card
     # Move the coins (if any) from the bonus card to the income.
-    self.resources.coins += self.bonus_card.coins
-    self.bonus_card.coins = 0
+    self.resources.coins += coins
 
     # We need to handle the shipping card.
     if card == common.BonusCard.POWER3_SHIPPING:
@@ -213,8 +328,21 @@ class Player:
     return oldCard
 
   def gain_town(self, townKey: common.TownKey) -> None:
+    if self.journal is not None:
+      if townKey in self.used_town_keys:
+        self.journal.record(operator.setitem, self.used_town_keys, townKey,
+                            self.used_town_keys[townKey])
+      else:
+        self.journal.record(operator.delitem, self.used_town_keys, townKey)
     self.used_town_keys[townKey] = False
 
+  def town_power_threshold(self) -> int:
+    """The combined power value of structures this player needs to found a
+    town."""
+    if common.FavorTile.TOWN_FIRE2 in self.favor_tiles:
+      return Player.TOWN_POWER - 1
+    return Player.TOWN_POWER
+
   def gain_power(self, power: int) -> None:
     # Gain the given amount of power. Overflowing power is automatically
     # converted to coins.
@@ -222,6 +350,7 @@ class Player:
     assert remaining_power >= 0
     if remaining_power == 0:
       return None
+    self._record_state()
 
     if self.power[common.PowerBowl.I] > 0:
       to_move = min(self.power[common.PowerBowl.I], remaining_power)
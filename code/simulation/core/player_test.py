@@ -427,3 +427,45 @@ class TestPlayer(unittest.TestCase):
     self.assertEqual(test_player.take_bonus_card(common.BonusCard.CULT_COIN4),
                      common.BonusCard.POWER3_SHIPPING)
     self.assertEqual(test_player.shipping, 0)
+
+  def test_player_town_power_threshold(self) -> None:
+    test_player = player.Player(name="test",
+                                player_faction=faction.Halflings())
+    self.assertEqual(test_player.town_power_threshold(), 7)
+    test_player.favor_tiles.append(common.FavorTile.TOWN_FIRE2)
+    self.assertEqual(test_player.town_power_threshold(), 6)
+
+  def test_player_burn_power(self) -> None:
+    test_player = player.Player(name="test",
+                                player_faction=faction.Halflings())
+    test_player.power = {
+        common.PowerBowl.I: 0,
+        common.PowerBowl.II: 5,
+        common.PowerBowl.III: 1,
+    }
+    test_player.burn_power(2)
+    self.assertEqual(test_player.power, {
+        common.PowerBowl.I: 0,
+        common.PowerBowl.II: 1,
+        common.PowerBowl.III: 3,
+    })
+    with self.assertRaises(utils.InternalError):
+      test_player.burn_power(1)
+
+  def test_player_spend_power(self) -> None:
+    test_player = player.Player(name="test",
+                                player_faction=faction.Halflings())
+    test_player.power = {
+        common.PowerBowl.I: 0,
+        common.PowerBowl.II: 5,
+        common.PowerBowl.III: 2,
+    }
+    test_player.spend_power(2)
+    self.assertEqual(test_player.power, {
+        common.PowerBowl.I: 2,
+        common.PowerBowl.II: 5,
+        common.PowerBowl.III: 0,
+    })
+    # Bowl II is never burned to make up for a shortfall.
+    with self.assertRaises(utils.InternalError):
+      test_player.spend_power(1)
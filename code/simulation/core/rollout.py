@@ -0,0 +1,119 @@
+"""Agents which play full games directly through gameplay.Game.
+
+Unlike the io.IO interface, agents are handed the legal actions as a mask
+over Game.action_space, which makes playing many games cheap.
+
+The engine doesn't score games yet (nothing awards victory points), so a
+rollout can't evaluate a position: it only reports how many decisions were
+made, eg to measure throughput.
+"""
+import abc
+import random
+
+from typing import List, NamedTuple, Optional, Sequence
+
+from simulation.core import actions
+from simulation.core import board
+from simulation.core import common
+from simulation.core import gameplay
+from simulation.core import player as player_module
+from simulation import utils
+
+
+class Agent(abc.ABC):
+  """Makes the decisions for a single player."""
+
+  @abc.abstractmethod
+  def select_initial_dwelling(self, game: gameplay.Game,
+                              player: player_module.Player) -> board.Position:
+    """Returns an empty tile of the player's home terrain."""
+    pass
+
+  @abc.abstractmethod
+  def select_bonus_card(self, game: gameplay.Game,
+                        player: player_module.Player) -> common.BonusCard:
+    """Returns one of game.available_bonus_cards."""
+    pass
+
+  @abc.abstractmethod
+  def select_action(self, game: gameplay.Game, player: player_module.Player,
+                    legal: int) -> int:
+    """Returns one of the actions set in the legal mask."""
+    pass
+
+
+class RandomAgent(Agent):
+  """Picks uniformly at random between all legal choices."""
+
+  def __init__(self, rng: Optional[random.Random] = None) -> None:
+    self.rng = rng if rng is not None else random.Random()
+
+  def select_initial_dwelling(self, game: gameplay.Game,
+                              player: player_module.Player) -> board.Position:
+    home: common.Terrain = player.faction.home_terrain()
+    candidates: List[board.Position] = [
+        pos for pos in game.board.land_tiles()
+        if game.board.can_be_built(pos, common.Structure.DWELLING, [home])
+    ]
+    if not candidates:
+      raise utils.InternalError("No tile left for the initial dwellings of "
+                                "%s." % player.name)
+    return self.rng.choice(candidates)
+
+  def select_bonus_card(self, game: gameplay.Game,
+                        player: player_module.Player) -> common.BonusCard:
+    return self.rng.choice(game.available_bonus_cards)
+
+  def select_action(self, game: gameplay.Game, player: player_module.Player,
+                    legal: int) -> int:
+    # Pick the k-th set bit without building the full list of actions.
+    k = self.rng.randrange(bin(legal).count('1'))
+    for action in actions.iterate_mask(legal):
+      if k == 0:
+        return action
+      k -= 1
+    raise utils.InternalError("No legal actions for %s." % player.name)
+
+
+class RolloutResult(NamedTuple):
+  """Statistics of a game played by play_game()."""
+  # The total number of actions selected by the agents during the rounds.
+  decisions: int
+
+
+def play_game(game: gameplay.Game, agents: Sequence[Agent]) -> RolloutResult:
+  """Plays a new game to the end. agents[i] decides for game.players[i].
+
+  Players act in turn until they pass. The order in which players pass
+  becomes the turn order of the next round.
+  """
+  if len(agents) != game.num_players:
+    raise utils.InternalError("Expected %s agents, got %s." %
+                              (game.num_players, len(agents)))
+  agent_for = {id(pl): agent for pl, agent in zip(game.players, agents)}
+
+  for pl in game.players + list(reversed(game.players)):
+    game.place_initial_dwelling(
+        pl, agent_for[id(pl)].select_initial_dwelling(game, pl))
+  for pl in reversed(game.players):
+    game.take_bonus_card(pl, agent_for[id(pl)].select_bonus_card(game, pl))
+  game.end_bonus_card_selection()
+
+  decisions = 0
+  pass_offset = game.action_space.pass_offset
+  for _ in range(gameplay.Game.NUM_ROUNDS):
+    game.income_phase()
+    active = list(game.players)
+    passed: List[player_module.Player] = []
+    while active:
+      for pl in list(active):
+        action = agent_for[id(pl)].select_action(game, pl,
+                                                 game.legal_actions(pl))
+        game.apply_action(pl, action)
+        decisions += 1
+        if action >= pass_offset:
+          active.remove(pl)
+          passed.append(pl)
+    game.players = passed
+    game.end_round()
+  return RolloutResult(decisions=decisions)
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from typing import List
+
+from simulation.core import common
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player
+from simulation.core import rollout
+from simulation import utils
+
+
+def _new_game(seed: int) -> gameplay.Game:
+  rng = random.Random(seed)
+  players = [
+      player.Player("halflings", faction.Halflings()),
+      player.Player("engineers", faction.Engineers())
+  ]
+  return gameplay.Game(players=players,
+                       scoring_tiles=rng.sample(list(common.ScoringTile),
+                                                gameplay.Game.NUM_ROUNDS),
+                       bonus_cards=rng.sample(list(common.BonusCard), 5))
+
+
+class _RecordingAgent(rollout.RandomAgent):
+  """A random agent which remembers the actions it took."""
+
+  def __init__(self, seed: int) -> None:
+    super().__init__(random.Random(seed))
+    self.actions: List[int] = []
+
+  def select_action(self, game: gameplay.Game, pl: player.Player,
+                    legal: int) -> int:
+    action = super().select_action(game, pl, legal)
+    if not (legal >> action) & 1:
+      raise AssertionError("Selected illegal action %s." % action)
+    self.actions.append(action)
+    return action
+
+
+class TestRollout(unittest.TestCase):
+  def test_play_game(self) -> None:
+    for seed in range(10):
+      game = _new_game(seed)
+      agents = [_RecordingAgent(seed), _RecordingAgent(seed + 100)]
+      result = rollout.play_game(game, agents)
+      self.assertEqual(result.decisions,
+                       sum(len(agent.actions) for agent in agents))
+      self.assertEqual(game.round_index, gameplay.Game.NUM_ROUNDS)
+      for pl in game.players:
+        self.assertIsNotNone(pl.bonus_card)
+      # Every player passes exactly once per round.
+      passes = sum(1 for agent in agents for action in agent.actions
+                   if action >= game.action_space.pass_offset)
+      self.assertEqual(passes, 2 * gameplay.Game.NUM_ROUNDS)
+
+  def test_deterministic_given_seed(self) -> None:
+    actions = []
+    for _ in range(2):
+      agents = [_RecordingAgent(1), _RecordingAgent(2)]
+      rollout.play_game(_new_game(0), agents)
+      actions.append([agent.actions for agent in agents])
+    self.assertEqual(actions[0], actions[1])
+
+  def test_initial_dwellings_on_home_terrain(self) -> None:
+    game = _new_game(0)
+    rollout.play_game(game, [_RecordingAgent(1), _RecordingAgent(2)])
+    for pl in game.players:
+      home = pl.faction.home_terrain()
+      self.assertGreaterEqual(len(game.board.structure_tiles(home)), 2)
+
+  def test_wrong_number_of_agents(self) -> None:
+    with self.assertRaises(utils.InternalError):
+      rollout.play_game(_new_game(0), [rollout.RandomAgent()])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,76 @@
+"""Benchmarks encoding game states as tensors.
+
+Usage:
+  python -m simulation.encoder_benchmark [--games N] [--batch-size B]
+      [--repeats R] [--seed S]
+
+Plays random games and encodes the final state from the perspective of each
+player, one state at a time and in batches, reporting encodes per second.
+"""
+import argparse
+import random
+import time
+
+from typing import List, Optional, Tuple
+
+from simulation.core import common
+from simulation.core import encoder
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player
+from simulation.core import rollout
+
+
+def _played_games(num_games: int, seed: int) -> List[gameplay.Game]:
+  rng = random.Random(seed)
+  games: List[gameplay.Game] = []
+  for _ in range(num_games):
+    players = [
+        player.Player(name="player%s" % i, player_faction=player_faction)
+        for i, player_faction in enumerate(faction.all_available())
+    ]
+    game = gameplay.Game(
+        players, rng.sample(list(common.ScoringTile),
+                            gameplay.Game.NUM_ROUNDS),
+        rng.sample(list(common.BonusCard),
+                   len(players) + 3))
+    rollout.play_game(game, [rollout.RandomAgent(rng) for _ in players])
+    games.append(game)
+  return games
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--games', type=int, default=50)
+  parser.add_argument('--batch-size', type=int, default=64)
+  parser.add_argument('--repeats', type=int, default=20)
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args(argv)
+
+  games = _played_games(args.games, args.seed)
+  states: List[Tuple[gameplay.Game, player.Player]] = [(game, pl)
+                                                       for game in games
+                                                       for pl in game.players]
+  state_encoder = encoder.StateEncoder(games[0].board, args.batch_size)
+  print("Planes: %s, scalars: %s" %
+        ((encoder.NUM_PLANES, encoder.NUM_ROWS, encoder.NUM_COLUMNS),
+         encoder.NUM_SCALARS))
+
+  start = time.perf_counter()
+  for _ in range(args.repeats):
+    for game, pl in states:
+      state_encoder.encode(game, pl)
+  elapsed = time.perf_counter() - start
+  print("Single: %.0f encodes/sec" % (args.repeats * len(states) / elapsed))
+
+  start = time.perf_counter()
+  for _ in range(args.repeats):
+    for i in range(0, len(states), args.batch_size):
+      state_encoder.encode_batch(states[i:i + args.batch_size])
+  elapsed = time.perf_counter() - start
+  print("Batches of %s: %.0f encodes/sec" %
+        (args.batch_size, args.repeats * len(states) / elapsed))
+
+
+if __name__ == '__main__':
+  main()
@@ -53,5 +53,8 @@ class IO(abc.ABC):
 
   @abc.abstractmethod
   def request_bonus_card_selection(self, pl: player.Player,
-                                   available: List[common.BonusCard]) -> int:
+                                   available: List[common.BonusCard],
+                                   coins: List[int]) -> int:
+    """coins[i] is the number of coins on the card available[i]. Returns the
+    index of the selected card."""
     pass
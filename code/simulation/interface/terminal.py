@@ -124,10 +124,11 @@ class CommandLine(io.IO):
       print("Invalid position %s requested. Please try again." % reqStr)
 
   def request_bonus_card_selection(self, pl: player.Player,
-                                   available: List[common.BonusCard]) -> int:
+                                   available: List[common.BonusCard],
+                                   coins: List[int]) -> int:
     self._vertical_space()
-    for i, card in enumerate(available):
-      print("%s : %s" % (i + 1, card))
+    for i, (card, card_coins) in enumerate(zip(available, coins)):
+      print("%s : %s" % (i + 1, card.to_string(card_coins)))
     while True:
       index: int = self._request_integer(
           "%s - Select the index of the bonus card to take: " %
@@ -0,0 +1,92 @@
+"""Benchmarks random rollouts of full games.
+
+Usage:
+  python -m simulation.rollout_benchmark [--games N] [--players 2 3 4 5]
+      [--profile] [--seed S]
+
+For each number of players, plays games between every combination of the
+implemented factions and reports rollouts per second and the average number
+of decisions per game. With --profile, also prints the functions where most
+of the time is spent.
+"""
+import argparse
+import cProfile
+import itertools
+import pstats
+import random
+import time
+
+from typing import List, Optional, Sequence
+
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player
+from simulation.core import rollout
+
+# The number of functions shown in the profile.
+_PROFILE_LINES = 25
+
+
+def _new_game(factions: Sequence[faction.Faction],
+              rng: random.Random) -> gameplay.Game:
+  players = [
+      player.Player(name="player%s" % i, player_faction=player_faction)
+      for i, player_faction in enumerate(factions)
+  ]
+  scoring_tiles = gameplay.select_game_scoring_tiles(rng)
+  bonus_cards = gameplay.select_game_bonus_cards(len(players), rng)
+  return gameplay.Game(players, scoring_tiles, bonus_cards)
+
+
+def run(num_games: int, num_players: int, seed: int) -> Optional[str]:
+  """Plays num_games random rollouts with num_players and returns a report,
+  or None if there aren't enough factions for that many players."""
+  available = [type(f) for f in faction.all_available()]
+  matchups = list(itertools.combinations(available, num_players))
+  if not matchups:
+    return None
+  rng = random.Random(seed)
+  decisions = 0
+  start = time.perf_counter()
+  for i in range(num_games):
+    factions = [cls() for cls in matchups[i % len(matchups)]]
+    game = _new_game(factions, rng)
+    agents = [rollout.RandomAgent(rng) for _ in factions]
+    decisions += rollout.play_game(game, agents).decisions
+  elapsed = time.perf_counter() - start
+  return ("%s players: %s games in %.2fs, %.1f rollouts/sec, "
+          "%.1f decisions/game" % (num_players, num_games, elapsed,
+                                   num_games / elapsed, decisions / num_games))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--games', type=int, default=200)
+  parser.add_argument('--players',
+                      type=int,
+                      nargs='+',
+                      default=list(
+                          range(gameplay.Game.MIN_PLAYERS,
+                                gameplay.Game.MAX_PLAYERS + 1)))
+  parser.add_argument('--profile', action='store_true')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args(argv)
+
+  profiler = cProfile.Profile() if args.profile else None
+  for num_players in args.players:
+    if profiler is not None:
+      profiler.enable()
+    report = run(args.games, num_players, args.seed)
+    if profiler is not None:
+      profiler.disable()
+    if report is None:
+      print("%s players: skipped, only %s factions are implemented." %
+            (num_players, len(faction.all_available())))
+    else:
+      print(report)
+  if profiler is not None:
+    pstats.Stats(profiler).sort_stats('tottime').print_stats(_PROFILE_LINES)
+
+
+if __name__ == '__main__':
+  main()
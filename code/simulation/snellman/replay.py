@@ -0,0 +1,472 @@
+"""Replays game logs from terra.snellman.net on the simulation engine.
+
+Logs are the flat, lowercase command strings saved by
+notebook/data.py:downloadLogForGame(), eg:
+
+  "setup halflings. setup engineers. build e7. build c5. ... pass bon3. ..."
+
+To replay all the games in a file written by notebook/data.py and print the
+statistics:
+
+  python -m simulation.snellman.replay snellman/games.input
+
+Commands may be prefixed with the faction issuing them ("engineers: build
+c5"). Otherwise they are attributed to the player whose turn it is, which
+can't be done for reactions to other players (leeching power), so those are
+skipped.
+
+The engine only implements part of the game, so replays are best-effort:
+commands it doesn't model are counted and skipped, and a game stops at the
+first command which can't be applied to the reconstructed state.
+"""
+import argparse
+import collections
+import itertools
+import re
+import time
+
+from typing import (Counter, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Sequence, TextIO, Tuple, Union)
+
+from simulation.core import board
+from simulation.core import common
+from simulation.core import faction
+from simulation.core import gameplay
+from simulation.core import player as player_module
+from simulation import utils
+
+# Separates the logs of different games in files written by notebook/data.py.
+END_OF_SAMPLE_TOKEN = '\n<|endoftext|>\n'
+
+_COLORS: Dict[str, common.Terrain] = {
+    'brown': common.Terrain.PLAIN,
+    'black': common.Terrain.SWAMP,
+    'blue': common.Terrain.LAKE,
+    'green': common.Terrain.FOREST,
+    'gray': common.Terrain.MOUNTAIN,
+    'red': common.Terrain.WASTELAND,
+    'yellow': common.Terrain.DESERT,
+}
+
+_STRUCTURES: Dict[str, common.Structure] = {
+    'tp': common.Structure.TRADING_POST,
+    'te': common.Structure.TEMPLE,
+    'sh': common.Structure.STRONGHOLD,
+    'sa': common.Structure.SANCTUARY,
+}
+
+# Snellman's bonus tiles. BON10 (shipping VP) is not implemented.
+_BONUS_CARDS: Dict[str, common.BonusCard] = {
+    'bon1': common.BonusCard.SPADE_COIN2,
+    'bon2': common.BonusCard.CULT_COIN4,
+    'bon3': common.BonusCard.COIN6,
+    'bon4': common.BonusCard.POWER3_SHIPPING,
+    'bon5': common.BonusCard.WORKER_3POWER,
+    'bon6': common.BonusCard.STRONGHOLD_WORKER2,
+    'bon7': common.BonusCard.TRADING_POST_WORKER,
+    'bon8': common.BonusCard.PRIEST,
+    'bon9': common.BonusCard.DWELLING_COIN2,
+}
+
+# The resources gained or paid per unit of each convertible resource, other
+# than power ('pw').
+_CONVERSIONS: Dict[str, common.Resources] = {
+    'p': common.Resources(priests=1),
+    'w': common.Resources(workers=1),
+    'c': common.Resources(coins=1),
+}
+
+
+class Command(NamedTuple):
+  """A parsed command. args depend on the verb."""
+  # The faction issuing the command, if given in the log.
+  faction: Optional[str]
+  verb: str
+  args: Tuple[str, ...]
+  # The original text of the command.
+  text: str
+
+
+class ParseError(Exception):
+  pass
+
+
+# Map from verb to the pattern for the full command. Groups are the args.
+_PATTERNS: List[Tuple[str, 're.Pattern[str]']] = [
+    (verb, re.compile(pattern)) for verb, pattern in [
+        ('setup', r'setup (\w+)'),
+        ('build', r'build ([a-i]\d{1,2})'),
+        ('upgrade', r'upgrade ([a-i]\d{1,2}) to (tp|te|sh|sa)'),
+        ('transform', r'transform ([a-i]\d{1,2})(?: to (\w+))?'),
+        ('dig', r'dig (\d+)'),
+        ('send', r'send p to (fire|water|earth|air)(?: for \d+)?'),
+        ('pass', r'pass(?: (bon\d+))?'),
+        ('leech', r'leech (\d+) from (\w+)'),
+        ('decline', r'decline(?: (\d+) from (\w+))?'),
+        ('burn', r'burn (\d+)'),
+        ('convert', r'convert (\d+)(pw|p|w|c) to (\d+)(p|w|c)'),
+        # Recognized, but not modeled by the engine.
+        ('action', r'action (\w+)'),
+        ('advance', r'advance (ship|dig)'),
+        ('favor', r'\+(fav\d+)'),
+        ('town', r'\+(tw\d+)'),
+        ('bridge', r'bridge ([a-i]\d{1,2}):([a-i]\d{1,2})'),
+        ('connect', r'connect (.*)'),
+        ('wait', r'wait'),
+        ('done', r'done'),
+    ]
+]
+
+# Verbs which are parsed but not applied to the engine.
+_UNSUPPORTED = frozenset(
+    ['action', 'advance', 'favor', 'town', 'bridge', 'connect', 'wait'])
+
+# Verbs which end the turn of the player issuing them, outside of setup.
+_ENDS_TURN = frozenset(
+    ['build', 'upgrade', 'send', 'pass', 'action', 'advance'])
+
+# Verbs issued in reaction to other players.
+_REACTIONS = frozenset(['leech', 'decline'])
+
+
+def parse_command(text: str) -> Command:
+  """Parses a single command. Raises ParseError if it's not recognized."""
+  text = text.strip()
+  faction_name: Optional[str] = None
+  if ':' in text and not text.startswith('bridge'):
+    faction_name, text = (part.strip() for part in text.split(':', 1))
+  for verb, pattern in _PATTERNS:
+    match = pattern.fullmatch(text)
+    if match is not None:
+      args = tuple(arg for arg in match.groups() if arg is not None)
+      return Command(faction_name, verb, args, text)
+  raise ParseError("Unrecognized command: %s" % text)
+
+
+def split_commands(log: str) -> Iterator[str]:
+  """Yields the non-empty commands of a log."""
+  for text in log.split('.'):
+    text = text.strip()
+    if text:
+      yield text
+
+
+def read_logs(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[str]:
+  """Lazily yields the logs of a file with logs separated by
+  END_OF_SAMPLE_TOKEN, without reading the whole file into memory."""
+  pending = ''
+  while True:
+    chunk = f.read(chunk_size)
+    if not chunk:
+      break
+    pending += chunk
+    logs = pending.split(END_OF_SAMPLE_TOKEN)
+    pending = logs.pop()
+    for log in logs:
+      if log:
+        yield log
+  if pending:
+    yield pending
+
+
+class Step(NamedTuple):
+  """A command about to be applied to the game.
+
+  The game is mutated as the replay proceeds, so the state must be used (eg,
+  encoded) before advancing the iterator.
+  """
+  game: gameplay.Game
+  player: player_module.Player
+  command: Command
+  # The final score of each faction, if known.
+  outcome: Optional[Dict[str, int]]
+
+
+class ReplayStats:
+  """Counters updated while replaying games."""
+
+  def __init__(self) -> None:
+    self.games = 0
+    # Games which were replayed to the end of their log.
+    self.completed_games = 0
+    self.commands = 0
+    self.steps = 0
+    self.elapsed = 0.0
+    # Counters by the first word of the command or the reason of the failure.
+    self.parse_failures: Counter[str] = collections.Counter()
+    self.unsupported: Counter[str] = collections.Counter()
+    self.failures: Counter[str] = collections.Counter()
+
+  def games_per_second(self) -> float:
+    return self.games / self.elapsed if self.elapsed > 0 else 0.0
+
+  def __str__(self) -> str:
+    return """Games: {games} ({completed} completed, {rate:.1f} games/sec)
+Commands: {commands} ({steps} applied)
+Parse failures: {parse}
+Unsupported commands: {unsupported}
+Failed games: {failures}""".format(
+        games=self.games,
+        completed=self.completed_games,
+        rate=self.games_per_second(),
+        commands=self.commands,
+        steps=self.steps,
+        parse=sum(self.parse_failures.values()),
+        unsupported=dict(self.unsupported.most_common(10)),
+        failures=dict(self.failures.most_common(10)))
+
+
+class _Replay:
+  """Tracks whose turn it is while applying the commands of a single game."""
+
+  def __init__(self, factions: Sequence[str]) -> None:
+    available = {
+        type(f).__name__.lower(): type(f)
+        for f in faction.all_available()
+    }
+    players: List[player_module.Player] = []
+    for name in factions:
+      if name not in available:
+        raise utils.UnimplementedError("faction %s" % name)
+      players.append(player_module.Player(name, available[name]()))
+    if not gameplay.Game.MIN_PLAYERS <= len(players) <= (
+        gameplay.Game.MAX_PLAYERS):
+      raise utils.UnimplementedError("%s players" % len(players))
+    self.game = gameplay.Game(players, [], list(common.BonusCard))
+    self.by_name = {pl.name: pl for pl in players}
+    # The players which still have to act in the current phase, in order.
+    self.pending: List[player_module.Player] = players + list(
+        reversed(players))
+    self.phase = 'dwellings'
+    self.passed: List[player_module.Player] = []
+    # The number of setup commands seen, which are issued in turn order.
+    self.setups = 0
+
+  def current_player(self, command: Command) -> Optional[player_module.Player]:
+    if command.faction is not None:
+      return self.by_name.get(command.faction)
+    if command.verb == 'setup':
+      if self.setups >= len(self.game.players):
+        return None
+      return self.game.players[self.setups]
+    if command.verb in _REACTIONS or not self.pending:
+      return None
+    return self.pending[0]
+
+  def apply(self, pl: player_module.Player, command: Command) -> None:
+    """Applies the command. Raises utils.InternalError if the engine can't
+    apply it."""
+    game = self.game
+    space = game.action_space
+    verb, args = command.verb, command.args
+    if verb == 'build' and self.phase == 'dwellings':
+      game.place_initial_dwelling(pl, _position(args[0]))
+    elif verb == 'build':
+      self._apply_action(
+          pl, space.build(game.board.tile_index(_position(args[0]))))
+    elif verb == 'upgrade':
+      self._apply_action(
+          pl,
+          space.upgrade(game.board.tile_index(_position(args[0])),
+                        _STRUCTURES[args[1]]))
+    elif verb == 'transform':
+      if len(args) > 1 and _COLORS.get(args[1]) != pl.faction.home_terrain():
+        raise utils.UnimplementedError("transforming to other terrains")
+      # Not all transforms need the full cost in workers (eg, the spade
+      # bonus card), which the engine doesn't model, so they are not
+      # checked for legality.
+      pos = _position(args[0])
+      game.board.transform(pos, pl.faction.home_terrain())
+    elif verb == 'send':
+      self._apply_action(pl, space.cult(common.CultTrack[args[0].upper()]))
+    elif verb == 'pass' and self.phase == 'bonus_cards':
+      game.take_bonus_card(pl, _bonus_card(args))
+    elif verb == 'pass':
+      self._apply_action(pl, space.pass_turn(_bonus_card(args)))
+    elif verb == 'leech':
+      pl.gain_power(int(args[0]))
+      pl.victory_points -= int(args[0]) - 1
+    elif verb == 'burn':
+      pl.burn_power(int(args[0]))
+    elif verb == 'convert':
+      self._convert(pl, int(args[0]), args[1], int(args[2]), args[3])
+    # Digging is paid for when building, and declining or setting up needs
+    # no changes.
+    self._advance(pl, verb)
+
+  def _apply_action(self, pl: player_module.Player, action: int) -> None:
+    if not (self.game.legal_actions(pl) >> action) & 1:
+      raise utils.InternalError("Illegal action: %s" %
+                                (self.game.action_space.decode(action), ))
+    self.game.apply_action(pl, action)
+
+  def _convert(self, pl: player_module.Player, amount: int, source: str,
+               converted: int, target: str) -> None:
+    if source == 'pw':
+      # Only power in bowl III can be spent. Burning is a separate command.
+      pl.spend_power(amount)
+    else:
+      cost = common.Resources()
+      for _ in range(amount):
+        cost += _CONVERSIONS[source]
+      pl.pay(cost)
+    for _ in range(converted):
+      pl.resources += _CONVERSIONS[target]
+
+  def _advance(self, pl: player_module.Player, verb: str) -> None:
+    """Moves on to the next player (and phase) after pl issued verb."""
+    if verb == 'setup':
+      self.setups += 1
+      return
+    if self.phase == 'dwellings':
+      if verb != 'build':
+        return
+      self._remove_pending(pl)
+      if not self.pending:
+        self.phase = 'bonus_cards'
+        self.pending = list(reversed(self.game.players))
+    elif self.phase == 'bonus_cards':
+      if verb != 'pass':
+        return
+      self._remove_pending(pl)
+      if not self.pending:
+        self.game.end_bonus_card_selection()
+        self._start_round()
+    elif verb in _ENDS_TURN:
+      self._remove_pending(pl)
+      if verb == 'pass':
+        self.passed.append(pl)
+      else:
+        self.pending.append(pl)
+      if not self.pending:
+        self.game.players = self.passed
+        self.game.end_round()
+        self._start_round()
+
+  def _remove_pending(self, pl: player_module.Player) -> None:
+    if pl in self.pending:
+      self.pending.remove(pl)
+
+  def _start_round(self) -> None:
+    self.phase = 'actions'
+    self.passed = []
+    if self.game.round_index >= gameplay.Game.NUM_ROUNDS:
+      self.pending = []
+      return
+    self.game.income_phase()
+    self.pending = list(self.game.players)
+
+
+def _position(text: str) -> board.Position:
+  pos = board.ParsePosition(text)
+  if pos is None:
+    raise utils.InternalError("Invalid position: %s" % text)
+  return pos
+
+
+def _bonus_card(args: Tuple[str, ...]) -> common.BonusCard:
+  if not args:
+    # Passing in the last round doesn't take a new card.
+    raise utils.UnimplementedError("passing without a bonus card")
+  if args[0] not in _BONUS_CARDS:
+    raise utils.UnimplementedError(args[0])
+  return _BONUS_CARDS[args[0]]
+
+
+def _factions_from_setup(commands: Sequence[str]) -> List[str]:
+  factions: List[str] = []
+  for text in commands:
+    try:
+      command = parse_command(text)
+    except ParseError:
+      continue
+    if command.verb == 'setup':
+      factions.append(command.args[0])
+  return factions
+
+
+def replay_game(log: str,
+                factions: Optional[Sequence[str]] = None,
+                outcome: Optional[Dict[str, int]] = None,
+                stats: Optional[ReplayStats] = None) -> Iterator[Step]:
+  """Lazily replays a single game, yielding a Step before applying each
+  command.
+
+  Args:
+    log: The commands of the game, separated by '.'.
+    factions: The factions in turn order. If not given, they are read from
+      the 'setup' commands of the log.
+    outcome: The final score of each faction, passed along with every step.
+    stats: If given, updated with the results of the replay.
+  """
+  stats = stats if stats is not None else ReplayStats()
+  start = time.perf_counter()
+  stats.games += 1
+  try:
+    commands = list(split_commands(log))
+    replay = _Replay(
+        factions if factions is not None else _factions_from_setup(commands))
+    for text in commands:
+      stats.commands += 1
+      try:
+        command = parse_command(text)
+      except ParseError:
+        stats.parse_failures[text.split()[0]] += 1
+        continue
+      if command.verb in _UNSUPPORTED:
+        stats.unsupported[command.verb] += 1
+      pl = replay.current_player(command)
+      if pl is None:
+        continue
+      stats.elapsed += time.perf_counter() - start
+      yield Step(replay.game, pl, command, outcome)
+      start = time.perf_counter()
+      replay.apply(pl, command)
+      stats.steps += 1
+    stats.completed_games += 1
+  except utils.UnimplementedError as e:
+    stats.failures["unimplemented: %s" % e] += 1
+  except (utils.InternalError, KeyError, ValueError) as e:
+    stats.failures[type(e).__name__] += 1
+  finally:
+    stats.elapsed += time.perf_counter() - start
+
+
+# A log, or a log and the final score of each faction.
+_LogWithOutcome = Union[str, Tuple[str, Optional[Dict[str, int]]]]
+
+
+def replay_games(logs: Iterable['_LogWithOutcome'],
+                 stats: Optional[ReplayStats] = None) -> Iterator[Step]:
+  """Lazily replays each of the logs. See replay_game().
+
+  Args:
+    logs: Logs, or (log, outcome) pairs where outcome is the final score of
+      each faction as recorded by terra.snellman.net, passed along with every
+      step of the game. Steps of logs without an outcome have none: the
+      engine doesn't score games, so it can't be derived from the replay.
+    stats: If given, updated with the results of the replays.
+  """
+  for item in logs:
+    log, outcome = (item, None) if isinstance(item, str) else item
+    yield from replay_game(log, outcome=outcome, stats=stats)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(
+      description="Replays snellman game logs and reports statistics.")
+  parser.add_argument('path',
+                      help="File with logs separated by %r." %
+                      END_OF_SAMPLE_TOKEN)
+  parser.add_argument('--maxGames', type=int, default=None)
+  args = parser.parse_args(argv)
+  stats = ReplayStats()
+  with open(args.path) as f:
+    for _ in replay_games(itertools.islice(read_logs(f), args.maxGames),
+                          stats):
+      pass
+  print(stats)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,129 @@
+import io
+import unittest
+
+from typing import List
+
+from simulation.core import board
+from simulation.core import common
+from simulation.snellman import replay
+
+_LOG = ". ".join([
+    "setup halflings",
+    "setup engineers",
+    "build a1",
+    "build c5",
+    "build f1",
+    "build a7",
+    "pass bon3",
+    "pass bon8",
+    # Round 1.
+    "upgrade a1 to tp",
+    "engineers: decline 1 from halflings",
+    "convert 1w to 1c",
+    "pass bon5",
+    "halflings: leech 1 from engineers",
+    "action act1",
+    "pass bon1",
+    # Round 2.
+    "unknowncommand e7",
+    "engineers: pass bon3",
+])
+
+
+def _position(name: str) -> board.Position:
+  pos = board.ParsePosition(name)
+  assert pos is not None
+  return pos
+
+
+class TestParseCommand(unittest.TestCase):
+  def test_parse(self) -> None:
+    self.assertEqual(
+        replay.parse_command(" upgrade e7 to tp "),
+        replay.Command(None, 'upgrade', ('e7', 'tp'), 'upgrade e7 to tp'))
+    self.assertEqual(
+        replay.parse_command("engineers: send p to fire"),
+        replay.Command('engineers', 'send', ('fire', ), 'send p to fire'))
+    self.assertEqual(replay.parse_command("pass").args, ())
+    self.assertEqual(
+        replay.parse_command("convert 3pw to 1w").args, ('3', 'pw', '1', 'w'))
+    with self.assertRaises(replay.ParseError):
+      replay.parse_command("upgrade e7 to castle")
+
+  def test_read_logs(self) -> None:
+    logs = ["build a1. pass bon3", "", "build c5"]
+    text = replay.END_OF_SAMPLE_TOKEN.join(logs)
+    self.assertEqual(list(replay.read_logs(io.StringIO(text), chunk_size=3)),
+                     logs[:1] + logs[2:])
+
+
+class TestReplay(unittest.TestCase):
+  def test_replay_game(self) -> None:
+    stats = replay.ReplayStats()
+    outcome = {'halflings': 100, 'engineers': 90}
+    steps = []
+    for step in replay.replay_game(_LOG, outcome=outcome, stats=stats):
+      self.assertIs(step.outcome, outcome)
+      steps.append(
+          (step.player.name, step.command.verb, step.game.round_index))
+    self.assertEqual(steps[:4], [('halflings', 'setup', 0),
+                                 ('engineers', 'setup', 0),
+                                 ('halflings', 'build', 0),
+                                 ('engineers', 'build', 0)])
+    self.assertIn(('halflings', 'upgrade', 0), steps)
+    self.assertIn(('engineers', 'decline', 0), steps)
+    self.assertIn(('engineers', 'convert', 0), steps)
+    self.assertEqual(steps[-1], ('engineers', 'pass', 1))
+
+    self.assertEqual(stats.games, 1)
+    self.assertEqual(stats.completed_games, 1)
+    self.assertEqual(stats.parse_failures, {'unknowncommand': 1})
+    self.assertEqual(stats.unsupported, {'action': 1})
+    self.assertEqual(stats.steps, len(steps))
+    self.assertIn("1 completed", str(stats))
+
+  def test_final_state(self) -> None:
+    steps = list(replay.replay_game(_LOG))
+    game = steps[-1].game
+    halflings, engineers = sorted(game.players,
+                                  key=lambda p: p.name != 'halflings')
+    self.assertEqual(game.board.get_structure(_position("a1")),
+                     common.Structure.TRADING_POST)
+    self.assertEqual(game.board.get_structure(_position("f1")),
+                     common.Structure.DWELLING)
+    self.assertEqual(engineers.bonus_card, common.BonusCard.COIN6)
+    self.assertEqual(halflings.bonus_card, common.BonusCard.SPADE_COIN2)
+    # Engineers passed first, so they start round 2.
+    self.assertEqual(game.players, [engineers, halflings])
+    self.assertEqual(game.round_index, 1)
+
+  def test_outcomes(self) -> None:
+    outcome = {'halflings': 100, 'engineers': 90}
+    steps = list(replay.replay_games([(_LOG, outcome)]))
+    self.assertTrue(steps)
+    for step in steps:
+      self.assertIs(step.outcome, outcome)
+
+    # Logs without a recorded outcome have none.
+    for step in replay.replay_games([_LOG]):
+      self.assertIsNone(step.outcome)
+
+  def test_failures(self) -> None:
+    stats = replay.ReplayStats()
+    logs: List[str] = [
+        "setup halflings. setup witches. build a1",
+        "setup halflings. setup engineers. build c5",
+        _LOG,
+    ]
+    steps = list(replay.replay_games(logs, stats))
+    self.assertEqual(stats.games, 3)
+    self.assertEqual(stats.completed_games, 1)
+    self.assertEqual(stats.failures, {
+        'unimplemented: faction witches': 1,
+        'InternalError': 1,
+    })
+    self.assertEqual(len(steps), stats.steps + 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,22 +2,38 @@
 # coding: utf-8
 
 import argparse
+import array
+import collections
 import datetime
+import http.client
+import io
+import itertools
 import json
 import os
 import pickle
 import requests
+import threading
+import time
+import zlib
 
 from concurrent import futures
 from dateutil import relativedelta
 from urllib import request
 from urllib import error
 
-from typing import Callable, Dict, List, Optional, Text, Tuple
+from typing import (IO, AbstractSet, BinaryIO, Callable, Deque, Dict,
+                    Iterable, Iterator, List, Optional, Text, Tuple)
 
 
 _END_OF_SAMPLE_TOKEN = '\n<|endoftext|>\n'
 _WORKER_COUNT = 100
+_SUMMARY_URL = "https://terra.snellman.net/data/events"
+# Retries of a failed summary download, and the delay before the first one
+# (in seconds, doubled on every retry).
+_SUMMARY_RETRIES = 2
+_SUMMARY_BACKOFF = 1.0
+_VIEW_GAME_URL = "https://terra.snellman.net/app/view-game/"
+_LOG_STORE_DIRECTORY = "snellman/logs"
 
 
 class Game:
@@ -39,6 +55,15 @@ class Game:
       self.player_count = json['player_count']
       self.total_vp = json['events']['faction']['all']['vp']['round']['all']
 
+  @classmethod
+  def fromSummary(cls, gameId: Text, playerCount: int,
+                  totalVp: int) -> 'Game':
+    """Creates a Game from its already projected summary fields."""
+    game = cls({'game': gameId})
+    game.player_count = playerCount
+    game.total_vp = totalVp
+    return game
+
   def averageVPPerPlayer(self) -> float:
     """Returns the average VP earned by each player in this game. """
     return self.total_vp / self.player_count
@@ -55,11 +80,190 @@ class Game:
     return self.__str__()
 
 
+def iterJsonArray(stream: IO[Text],
+                  chunkSize: int = 1 << 16) -> Iterator[object]:
+  """Lazily parses a JSON array, yielding its elements one at a time.
+
+  Only the element being parsed (and one chunk of text) is held in memory,
+  so arbitrarily large arrays can be read in constant memory.
+
+  Raises:
+    ValueError: If the stream does not contain a JSON array.
+  """
+  decoder = json.JSONDecoder()
+  buffer = ''
+  position = 0
+  eof = False
+
+  def fill() -> bool:
+    nonlocal buffer, position, eof
+    if eof:
+      return False
+    chunk = stream.read(chunkSize)
+    if not chunk:
+      eof = True
+      return False
+    buffer = buffer[position:] + chunk
+    position = 0
+    return True
+
+  def skip(separators: Text) -> Optional[Text]:
+    """Skips whitespace and the given separators, returning the first other
+    character (which is not consumed), or None at the end of the stream."""
+    nonlocal position
+    while True:
+      while position < len(buffer):
+        c = buffer[position]
+        if not c.isspace() and c not in separators:
+          return c
+        position += 1
+      if not fill():
+        return None
+
+  if skip('') != '[':
+    raise ValueError("Expected a JSON array.")
+  position += 1
+  while True:
+    c = skip(',')
+    if c is None:
+      raise ValueError("Unterminated JSON array.")
+    if c == ']':
+      return
+    while True:
+      try:
+        element, end = decoder.raw_decode(buffer, position)
+      except json.JSONDecodeError:
+        if not fill():
+          raise
+        continue
+      # The element must be followed by a separator. Otherwise it might be a
+      # number which continues in the next chunk.
+      following = end
+      while following < len(buffer) and buffer[following].isspace():
+        following += 1
+      if (following == len(buffer) or
+          buffer[following] not in ',]') and fill():
+        continue
+      break
+    position = end
+    yield element
+
+
+class SummaryColumns:
+  """The projected fields of a month of summary data, stored column-wise.
+
+  This is what gets cached on disk instead of the raw events: a list of game
+  ids and two compact integer arrays. Every game of the month is kept, so the
+  cache can be reused with a different keepPredicate.
+  """
+
+  def __init__(self) -> None:
+    self.game_ids: List[Text] = []
+    self.player_counts = array.array('H')
+    self.total_vps = array.array('L')
+
+  def append(self, game: Game) -> None:
+    self.game_ids.append(game.game_id)
+    self.player_counts.append(game.player_count)
+    self.total_vps.append(game.total_vp)
+
+  def games(self) -> Iterator[Game]:
+    for gameId, playerCount, totalVp in zip(self.game_ids, self.player_counts,
+                                            self.total_vps):
+      yield Game.fromSummary(gameId, playerCount, totalVp)
+
+  def __len__(self) -> int:
+    return len(self.game_ids)
+
+  def save(self, f: BinaryIO) -> None:
+    # Plain containers only, so the cache doesn't depend on this module path.
+    pickle.dump((self.game_ids, self.player_counts, self.total_vps), f)
+
+  @classmethod
+  def load(cls, f: BinaryIO) -> 'SummaryColumns':
+    columns = cls()
+    columns.game_ids, columns.player_counts, columns.total_vps = pickle.load(f)
+    return columns
+
+
+def _summaryCachePath(month: datetime.datetime) -> Text:
+  return "snellman/summary-%s.columns.pkl" % month.strftime("%Y-%m")
+
+
+def fetchMonthSummary(month: datetime.datetime,
+                      keepPredicate: Callable[[Game], bool],
+                      local: bool = False) -> Optional[List[Game]]:
+  """Fetches the games of a single month which satisfy keepPredicate.
+
+  The events are parsed as they stream in, and only the projected fields of
+  each game are kept (and cached in a SummaryColumns). If local, the cache is
+  read instead. Falls back to the legacy raw summary pickle if it exists.
+
+  Downloads which fail midway (dropped connections, truncated or invalid
+  JSON, server errors) are retried _SUMMARY_RETRIES times.
+
+  Returns:
+    The kept games, or None if the data for the month could not be loaded.
+  """
+  label = month.strftime("%Y-%m")
+  cachePath = _summaryCachePath(month)
+  columns: Optional[SummaryColumns] = None
+  if local:
+    try:
+      with open(cachePath, 'rb') as f:
+        columns = SummaryColumns.load(f)
+    except FileNotFoundError:
+      legacyPath = "snellman/summary-%s.pkl" % label
+      try:
+        with open(legacyPath, 'rb') as f:
+          columns = SummaryColumns()
+          for obj in pickle.load(f):
+            columns.append(Game(obj))
+      except FileNotFoundError:
+        print("Could not unpickle from filename %s" % cachePath)
+        return None
+    assert columns is not None
+    return [game for game in columns.games() if keepPredicate(game)]
+
+  address = "{}/{}.json".format(_SUMMARY_URL, label)
+  attempt = 0
+  while True:
+    columns = SummaryColumns()
+    kept: List[Game] = []
+    try:
+      with request.urlopen(address) as site:
+        reader = io.TextIOWrapper(site, encoding='utf-8')
+        for obj in iterJsonArray(reader):
+          game = Game(obj)
+          columns.append(game)
+          if keepPredicate(game):
+            kept.append(game)
+      break
+    except error.HTTPError as e:
+      # Client errors (eg, a month without data) won't go away on retry.
+      if e.code < 500 or attempt >= _SUMMARY_RETRIES:
+        print("Cannot download data for %s: %s" % (label, e))
+        return None
+    except (http.client.HTTPException, OSError, ValueError) as e:
+      # URLError, ConnectionResetError, IncompleteRead or invalid JSON.
+      if attempt >= _SUMMARY_RETRIES:
+        print("Cannot download data for %s: %r" % (label, e))
+        return None
+    time.sleep(_SUMMARY_BACKOFF * 2**attempt)
+    attempt += 1
+  with open(cachePath, 'wb') as f:
+    columns.save(f)
+  print("Collected %s of %s games from %s." % (len(kept), len(columns),
+                                               address))
+  return kept
+
+
 def fetchAllSummaryData(minDate: datetime.datetime,
                         maxDate: datetime.datetime,
                         keepPredicate: Callable[[Game], bool],
                         local: bool = False,
-                        maxGames: Optional[int] = None) -> List[Game]:
+                        maxGames: Optional[int] = None,
+                        concurrency: int = 4) -> List[Game]:
   """Fetches the Games based on summary data.
 
     Args:
@@ -72,44 +276,47 @@ def fetchAllSummaryData(minDate: datetime.datetime,
           the Game is kept. Otherwise it is immediately discared.
         maxGames: The maximum number of games to return. Games are retrieved
           from latest to oldest, date wise.
+        concurrency: The number of months fetched at once.
 
     Returns:
-        A list of Game objects fetched from Terra Snellman.
+        A list of Game objects fetched from Terra Snellman. Months which
+        couldn't be downloaded are skipped, and reported once done.
   """
-  BASE_URL = "https://terra.snellman.net/data/events"
-  results: List[Game] = []
-  while minDate < maxDate and (not maxGames or len(results) < maxGames):
-    filename = "snellman/summary-%s.pkl" % (maxDate.strftime("%Y-%m"))
-    address = "{}/{}.json".format(BASE_URL, maxDate.strftime("%Y-%m"))
-    data = None
-    if not local:
-      try:
-        with request.urlopen(address) as site:
-          data = json.loads(site.read().decode())
-      except error.URLError:
-        print("Cannot download data for data %s" % (maxDate.strftime("%Y-%m")))
-        maxDate -= relativedelta.relativedelta(months=1)
-        continue
-      with open("snellman/summary-%s.pkl" % (maxDate.strftime("%Y-%m")),
-                'wb') as f:
-        pickle.dump(data, f)
-    else:
-      try:
-        with open(filename, 'rb') as f:
-          data = pickle.load(f)
-      except FileNotFoundError:
-        print("Could not unpickle from filename %s" % (filename))
-        maxDate -= relativedelta.relativedelta(months=1)
-        continue
+  def months() -> Iterator[datetime.datetime]:
+    month = maxDate
+    while minDate < month:
+      yield month
+      month -= relativedelta.relativedelta(months=1)
 
-    for obj in data:
-      game = Game(obj)
-      if keepPredicate(game):
-        results.append(game)
-    del data
-    maxDate -= relativedelta.relativedelta(months=1)
-    print("Collected %s games from %s." % (len(results),
-                                           address if not local else filename))
+  results: List[Game] = []
+  failed: List[Text] = []
+  remaining = months()
+  with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+    # Months are fetched ahead of time but consumed in order, so that the
+    # latest games are kept when maxGames is hit.
+    labels: Deque[Text] = collections.deque()
+    pending: Deque[futures.Future] = collections.deque()
+
+    def submit(month: datetime.datetime) -> None:
+      labels.append(month.strftime("%Y-%m"))
+      pending.append(
+          executor.submit(fetchMonthSummary, month, keepPredicate, local))
+
+    for month in itertools.islice(remaining, concurrency):
+      submit(month)
+    while pending and (not maxGames or len(results) < maxGames):
+      games = pending.popleft().result()
+      label = labels.popleft()
+      for month in itertools.islice(remaining, 1):
+        submit(month)
+      if games is None:
+        failed.append(label)
+      else:
+        results.extend(games)
+    for future in pending:
+      future.cancel()
+  if failed:
+    print("Could not fetch the summaries of %s." % ", ".join(failed))
   return results
 
 
@@ -127,9 +334,13 @@ def downloadLogForGame(game: Game) -> Text:
   Returns:
     A string consisting of all commands in the game log (seperated by ".").
   """
-  kBaseUrl = "https://terra.snellman.net/app/view-game/"
-  res = requests.post(kBaseUrl, data={'game': game.game_id})
-  data = json.loads(res.content)
+  res = requests.post(_VIEW_GAME_URL, data={'game': game.game_id})
+  return ledgerToLog(json.loads(res.content))
+
+
+def ledgerToLog(data: Dict) -> Text:
+  """Flattens the ledger of a game (as returned by the view-game endpoint)
+  into a single string of lowercase commands seperated by "."."""
   commands = [
       command.get('commands', '').split(".") or command.get('comment', '')
       for command in data['ledger']
@@ -140,6 +351,148 @@ def downloadLogForGame(game: Game) -> Text:
   return gameLog
 
 
+class RateLimiter:
+  """A thread-safe token bucket allowing `rate` acquisitions per second on
+  average, with bursts of up to `burst`."""
+
+  def __init__(self,
+               rate: float,
+               burst: int = 1,
+               clock: Callable[[], float] = time.monotonic,
+               sleep: Callable[[float], None] = time.sleep) -> None:
+    self._rate = rate
+    self._burst = burst
+    self._clock = clock
+    self._sleep = sleep
+    self._tokens = float(burst)
+    self._last = clock()
+    self._lock = threading.Lock()
+
+  def acquire(self) -> None:
+    """Blocks until a request is allowed."""
+    while True:
+      with self._lock:
+        now = self._clock()
+        self._tokens = min(self._burst,
+                           self._tokens + (now - self._last) * self._rate)
+        self._last = now
+        if self._tokens >= 1:
+          self._tokens -= 1
+          return
+        wait = (1 - self._tokens) / self._rate
+      self._sleep(wait)
+
+
+class GameLogDownloader:
+  """Downloads game logs over persistent (keep-alive) HTTP sessions.
+
+  Up to `concurrency` requests are in flight at any time. As soon as one
+  finishes, the next game starts downloading, so slow games don't hold back
+  the rest. Failed requests are retried with exponential backoff.
+
+  Args:
+    url: The view-game endpoint. Tests point this at a local server.
+    concurrency: The maximum number of requests in flight.
+    maxRetries: How many times a failed request is retried.
+    backoff: The delay before the first retry, in seconds. It doubles on
+      every retry.
+    requestsPerSecond: If set, limits the rate of requests (including
+      retries) across all threads.
+    timeout: The timeout of a single request, in seconds.
+  """
+
+  def __init__(self,
+               url: Text = _VIEW_GAME_URL,
+               concurrency: int = 16,
+               maxRetries: int = 3,
+               backoff: float = 0.5,
+               requestsPerSecond: Optional[float] = None,
+               timeout: float = 30) -> None:
+    self.url = url
+    self.concurrency = concurrency
+    self.maxRetries = maxRetries
+    self.backoff = backoff
+    self.timeout = timeout
+    self._rateLimiter: Optional[RateLimiter] = (RateLimiter(
+        requestsPerSecond, burst=concurrency) if requestsPerSecond else None)
+    # Each worker thread keeps its own session (and connection pool), since
+    # sessions are not guaranteed to be thread-safe.
+    self._local = threading.local()
+    self._sessions: List[requests.Session] = []
+    self._sessionsLock = threading.Lock()
+
+  def _session(self) -> requests.Session:
+    session = getattr(self._local, 'session', None)
+    if session is None:
+      session = requests.Session()
+      with self._sessionsLock:
+        self._sessions.append(session)
+      self._local.session = session
+    return session
+
+  def close(self) -> None:
+    """Closes all open connections."""
+    with self._sessionsLock:
+      for session in self._sessions:
+        session.close()
+      self._sessions = []
+
+  def __enter__(self) -> 'GameLogDownloader':
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.close()
+
+  def download(self, game: Game) -> Text:
+    """Downloads the log of a single game, retrying on failures.
+
+    Raises:
+      requests.RequestException: If the last attempt failed.
+    """
+    for attempt in range(self.maxRetries + 1):
+      if self._rateLimiter is not None:
+        self._rateLimiter.acquire()
+      try:
+        res = self._session().post(
+            self.url, data={'game': game.game_id}, timeout=self.timeout)
+        res.raise_for_status()
+        return ledgerToLog(res.json())
+      except (requests.RequestException, ValueError, KeyError):
+        if attempt == self.maxRetries:
+          raise
+        time.sleep(self.backoff * 2**attempt)
+    raise AssertionError("Unreachable")
+
+  def downloadAll(self, games: Iterable[Game]
+                  ) -> Iterator[Tuple[Game, Optional[Text]]]:
+    """Downloads the logs of all games, yielding (game, log) pairs in the
+    order in which they finish. The log is None if the download failed.
+
+    Games are consumed lazily, so at most `concurrency` of them are pending
+    at any time.
+    """
+    def downloadOrNone(game: Game) -> Optional[Text]:
+      try:
+        return self.download(game)
+      except (requests.RequestException, ValueError, KeyError) as e:
+        print("Failed to download game %s: %s" % (game.game_id, e))
+        return None
+
+    remaining = iter(games)
+    with futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+      pending: Dict[futures.Future, Game] = {}
+      for game in itertools.islice(remaining, self.concurrency):
+        pending[executor.submit(downloadOrNone, game)] = game
+      while pending:
+        done, _ = futures.wait(
+            pending, return_when=futures.FIRST_COMPLETED)
+        for future in done:
+          game = pending.pop(future)
+          for nextGame in itertools.islice(remaining, 1):
+            pending[executor.submit(downloadOrNone, nextGame)] = nextGame
+          yield game, future.result()
+
+
 def parseShardedFilename(filename: Text) -> Tuple[int, int]:
   """Parses a sharded filename
 
@@ -158,7 +511,9 @@ def parseShardedFilename(filename: Text) -> Tuple[int, int]:
 
 
 def loadGameLedgesFromDisk() -> List[Text]:
-  """Loads the game ledges which have already been downloaded from disk.
+  """Loads the game ledges from the legacy sentences-i-of-N.pkl checkpoints.
+
+  Superseded by GameLogStore; only used by migrateSentencePickles.
 
   Returns:
     A list of game ledges read from the given location.
@@ -189,61 +544,224 @@ def loadGameLedgesFromDisk() -> List[Text]:
     return []
 
 
+class GameLogStore:
+  """An append-only, sharded store of game logs keyed by game id.
+
+  Every log is compressed on its own and appended to the current shard
+  (`logs-{shard}.z`). A new shard is started once the current one grows past
+  `shardBytes`. The index file (`index.tsv`) has one line per stored game:
+  "{game_id}\t{shard}\t{offset}\t{length}". Index lines are only written by
+  `sync`, after the shard has been flushed and fsynced, so a crash at worst
+  leaves unindexed records behind, which are ignored (and the games are
+  downloaded again). Index entries pointing past the end of their shard
+  (eg, if the filesystem reordered writes anyway) are dropped on load, along
+  with every later entry.
+
+  Args:
+    directory: Where the shards and the index are kept. Created if needed.
+    shardBytes: The approximate maximum size of a shard, in bytes.
+    syncEvery: How many appends to buffer before syncing to disk. Appends
+      which haven't been synced are lost on a crash.
+  """
+  INDEX_FILENAME = 'index.tsv'
+
+  def __init__(self,
+               directory: Text,
+               shardBytes: int = 64 << 20,
+               syncEvery: int = 1) -> None:
+    self.directory = directory
+    self.shardBytes = shardBytes
+    self.syncEvery = syncEvery
+    # game_id -> (shard, offset, length), in insertion order.
+    self._index: Dict[Text, Tuple[int, int, int]] = {}
+    os.makedirs(directory, exist_ok=True)
+    indexPath = os.path.join(directory, self.INDEX_FILENAME)
+    if os.path.exists(indexPath):
+      validBytes = 0
+      shardSizes: Dict[int, int] = {}
+      with open(indexPath, 'rb') as f:
+        for line in f:
+          # Drop a partially written last line.
+          if not line.endswith(b'\n'):
+            break
+          gameId, shard, offset, length = line[:-1].decode().split('\t')
+          entry = (int(shard), int(offset), int(length))
+          if entry[0] not in shardSizes:
+            path = self._shardPath(entry[0])
+            shardSizes[entry[0]] = (os.path.getsize(path)
+                                    if os.path.exists(path) else 0)
+          # Drop entries whose record didn't make it to disk.
+          if entry[1] + entry[2] > shardSizes[entry[0]]:
+            break
+          self._index[gameId] = entry
+          validBytes += len(line)
+      os.truncate(indexPath, validBytes)
+    self._shard = max((shard for shard, _, _ in self._index.values()),
+                      default=0)
+    self._indexFile = open(indexPath, 'a')
+    self._shardFile = open(self._shardPath(self._shard), 'ab')
+    # Index lines of the appends since the last sync.
+    self._pendingIndexLines: List[Text] = []
+
+  def _shardPath(self, shard: int) -> Text:
+    return os.path.join(self.directory, 'logs-%05d.z' % shard)
+
+  def __contains__(self, gameId: object) -> bool:
+    return gameId in self._index
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  def ids(self) -> AbstractSet[Text]:
+    """Returns the ids of all stored games."""
+    return self._index.keys()
+
+  def append(self, gameId: Text, log: Text) -> None:
+    """Stores the log of the given game. Games already stored are skipped."""
+    if gameId in self._index:
+      return
+    if self._shardFile.tell() >= self.shardBytes:
+      # The index lines of the pending records must not outlive them.
+      self.sync()
+      self._shardFile.close()
+      self._shard += 1
+      self._shardFile = open(self._shardPath(self._shard), 'ab')
+    record = zlib.compress(log.encode())
+    offset = self._shardFile.tell()
+    self._shardFile.write(record)
+    self._index[gameId] = (self._shard, offset, len(record))
+    self._pendingIndexLines.append('%s\t%s\t%s\t%s\n' %
+                                   (gameId, self._shard, offset, len(record)))
+    if len(self._pendingIndexLines) >= self.syncEvery:
+      self.sync()
+
+  def sync(self) -> None:
+    """Makes the appends so far durable: the shard is written and fsynced
+    before their index lines are, so the index never points at records
+    which aren't on disk."""
+    self._shardFile.flush()
+    os.fsync(self._shardFile.fileno())
+    if not self._pendingIndexLines:
+      return
+    self._indexFile.writelines(self._pendingIndexLines)
+    self._indexFile.flush()
+    os.fsync(self._indexFile.fileno())
+    self._pendingIndexLines = []
+
+  def get(self, gameId: Text) -> Text:
+    """Reads the log of a single game.
+
+    Raises:
+      KeyError: If the game is not stored.
+    """
+    shard, offset, length = self._index[gameId]
+    if shard == self._shard:
+      self._shardFile.flush()
+    with open(self._shardPath(shard), 'rb') as f:
+      f.seek(offset)
+      return zlib.decompress(f.read(length)).decode()
+
+  def logs(self) -> Iterator[Tuple[Text, Text]]:
+    """Lazily yields (game_id, log) for all stored games, in the order they
+    were stored. Only one record is in memory at a time."""
+    self._shardFile.flush()
+    currentShard: Optional[int] = None
+    f = None
+    try:
+      for gameId, (shard, offset, length) in list(self._index.items()):
+        if shard != currentShard:
+          if f is not None:
+            f.close()
+          f = open(self._shardPath(shard), 'rb')
+          currentShard = shard
+        assert f is not None
+        f.seek(offset)
+        yield gameId, zlib.decompress(f.read(length)).decode()
+    finally:
+      if f is not None:
+        f.close()
+
+  def close(self) -> None:
+    self.sync()
+    self._shardFile.close()
+    self._indexFile.close()
+
+  def __enter__(self) -> 'GameLogStore':
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.close()
+
+
+def migrateSentencePickles(store: GameLogStore, data: List[Game]) -> int:
+  """Imports the logs from the legacy sentences-i-of-N.pkl checkpoints into
+  the store. Those are only keyed by position, so `data` must be the same
+  list of games they were downloaded for.
+
+  Returns:
+    The number of games imported.
+  """
+  sentences: List[Text] = loadGameLedgesFromDisk()
+  imported = 0
+  for game, log in zip(data, sentences):
+    if log and game.game_id not in store:
+      store.append(game.game_id, log)
+      imported += 1
+  store.sync()
+  return imported
+
+
 def fetchAllGameLogs(detailsLocal: bool = False,
                      summaryLocal: bool = False,
                      saveEvery: int = 1000,
-                     maxGames: int = 20000) -> Text:
+                     maxGames: int = 20000,
+                     concurrency: int = _WORKER_COUNT,
+                     requestsPerSecond: Optional[float] = None,
+                     storeDirectory: Text = _LOG_STORE_DIRECTORY) -> Text:
   """Downloads game data and dumps to disk.
 
+  Logs are kept in a GameLogStore, so only the games which are not stored yet
+  are downloaded.
+
   Args:
-    detailsLocal: If true, game data is loaded only from the disk data.
-    summaryLocal: If true, summary data is loaded only from disk.
-    saveEvery: Specifies approximately how many games to process before storing
-        a checkpoint on disk.
+    detailsLocal: If true, only the logs already stored are returned.
+    summaryLocal: If true, the summary data is read from disk.
+    saveEvery: Specifies approximately how many games to download before
+        flushing them to disk.
     maxGames: The approximate number of maximum games to download.
+    concurrency: The maximum number of game logs downloading at once.
+    requestsPerSecond: If set, limits the rate at which logs are requested.
+    storeDirectory: The directory of the GameLogStore.
 
   Returns:
     A single string containing all loaded game logs.
   """
-  def downloadGameWrapper(info: Tuple[int, Game]) -> Text:
-    i, game = info
-    print("Downloading game %s: %s" % (i, game.game_id))
-    return downloadLogForGame(game)
-
-  OLDEST_DATE = datetime.datetime(year=2013, month=1, day=15)
-  NEWEST_DATE = datetime.datetime.now()
-  data: List[Game] = fetchAllSummaryData(
-      OLDEST_DATE,
-      NEWEST_DATE,
-      keepPredicate=keepHighScoringGames,
-      maxGames=maxGames,
-      local=summaryLocal)
-  sentences: List[Text] = loadGameLedgesFromDisk()
-  if not detailsLocal:
-    try:
-      # Try to continue where we left off. Assume user "did the right thing"
-      # and is using the same "data" to load the games.
-      # Migrate to a set of ids eventually.
-      processedSinceLastSave = 0
-      for i in range(len(sentences), len(data), _WORKER_COUNT):
-        with futures.ThreadPoolExecutor(max_workers=_WORKER_COUNT) as executor:
-          inp = [(k, data[k])
-                 for k in range(i, min(i + _WORKER_COUNT, len(data)))]
-          concurrent_sentences = executor.map(downloadGameWrapper, inp)
-        sentences.extend(concurrent_sentences)
-        processedSinceLastSave += _WORKER_COUNT
-        if processedSinceLastSave >= saveEvery:
-          filename: Text = 'snellman/sentences-%s-of-%s.pkl' % (i, len(data))
-          print("Saving to %s" % filename)
-          with open(filename, 'wb') as f:
-            pickle.dump(sentences, f)
-          processedSinceLastSave = 0
-    finally:
-      filename = "snellman/sentences-%s-of-%s.pkl" % (i, len(data))
-      print("Dumping to %s " % filename)
-      with open(filename, 'wb') as f:
-        pickle.dump(sentences, f)
-  return _END_OF_SAMPLE_TOKEN.join(sentences)
+  with GameLogStore(storeDirectory, syncEvery=saveEvery) as store:
+    if not detailsLocal:
+      OLDEST_DATE = datetime.datetime(year=2013, month=1, day=15)
+      NEWEST_DATE = datetime.datetime.now()
+      data: List[Game] = fetchAllSummaryData(
+          minDate=OLDEST_DATE,
+          maxDate=NEWEST_DATE,
+          keepPredicate=keepHighScoringGames,
+          maxGames=maxGames,
+          local=summaryLocal)
+      if not store:
+        imported = migrateSentencePickles(store, data)
+        if imported:
+          print("Imported %s games from the sentence pickles." % imported)
+      missing = (game for game in data if game.game_id not in store)
+      with GameLogDownloader(
+          concurrency=concurrency,
+          requestsPerSecond=requestsPerSecond) as downloader:
+        # Failed downloads aren't stored, so they're retried on the next run.
+        for game, log in downloader.downloadAll(missing):
+          if log is not None:
+            store.append(game.game_id, log)
+            if len(store) % saveEvery == 0:
+              print("Stored %s games." % len(store))
+    print("Loading %s games from %s" % (len(store), storeDirectory))
+    return _END_OF_SAMPLE_TOKEN.join(log for _, log in store.logs())
 
 
 def setUpParser() -> argparse.ArgumentParser:
@@ -252,8 +770,7 @@ def setUpParser() -> argparse.ArgumentParser:
   parser.add_argument(
       '--saveEvery',
       type=int,
-      help='How often to save the details if downloading, or how often they '
-      'were saved if already downloaded and loading from disk.',
+      help='How many game logs to download before flushing them to disk.',
       default=1000)
   parser.add_argument(
       '--detailsLocal', dest='detailsLocal', action='store_true')
@@ -270,6 +787,16 @@ def setUpParser() -> argparse.ArgumentParser:
       type=int,
       help='Maximum number of games to download',
       default=int(20e3))
+  parser.add_argument(
+      '--concurrency',
+      type=int,
+      help='Maximum number of game logs to download at once',
+      default=_WORKER_COUNT)
+  parser.add_argument(
+      '--requestsPerSecond',
+      type=float,
+      help='If set, limits the rate at which game logs are requested',
+      default=None)
   parser.add_argument(
       '--game', type=str,
       help='If set, downloads and prings the game log for this game',
@@ -286,7 +813,9 @@ if __name__ == '__main__':
         detailsLocal=args.detailsLocal,
         summaryLocal=args.summaryLocal,
         saveEvery=args.saveEvery,
-        maxGames=args.maxGames)
+        maxGames=args.maxGames,
+        concurrency=args.concurrency,
+        requestsPerSecond=args.requestsPerSecond)
     with open("snellman/games.input", "w") as f:
       f.write(text)
   else:
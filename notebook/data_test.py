@@ -0,0 +1,327 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from unittest import mock
+
+from datetime import datetime
+from http import server
+from urllib import parse
+
+from typing import Dict, List
+
+import data
+
+
+class _LedgerHandler(server.BaseHTTPRequestHandler):
+  """Serves view-game requests with a ledger of one command per game.
+
+  Games named 'failN-...' fail their first N requests, and games named
+  'slow-...' take a while to be served.
+  """
+  protocol_version = 'HTTP/1.1'
+
+  def setup(self) -> None:
+    super().setup()
+    with self.server.lock:
+      self.server.connections += 1
+
+  def do_POST(self) -> None:
+    length = int(self.headers['Content-Length'])
+    game = parse.parse_qs(self.rfile.read(length).decode())['game'][0]
+    with self.server.lock:
+      attempts = self.server.attempts.get(game, 0)
+      self.server.attempts[game] = attempts + 1
+    if game.startswith('fail') and attempts < int(game[4]):
+      self.send_response(503)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+    if game.startswith('slow'):
+      time.sleep(0.5)
+    body = json.dumps({
+        'ledger': [{
+            'commands': 'Build %s. Pass' % game
+        }, {
+            'comment': 'ignored'
+        }]
+    }).encode()
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args) -> None:
+    pass
+
+
+class TestGameLogDownloader(unittest.TestCase):
+  def setUp(self) -> None:
+    self.server = server.ThreadingHTTPServer(('127.0.0.1', 0), _LedgerHandler)
+    self.server.lock = threading.Lock()
+    self.server.connections = 0
+    self.server.attempts: Dict[str, int] = {}
+    self.thread = threading.Thread(target=self.server.serve_forever)
+    self.thread.start()
+    self.url = 'http://127.0.0.1:%s/app/view-game/' % (
+        self.server.server_address[1])
+
+  def tearDown(self) -> None:
+    self.server.shutdown()
+    self.server.server_close()
+    self.thread.join()
+
+  def test_download(self) -> None:
+    with data.GameLogDownloader(self.url) as downloader:
+      self.assertEqual(
+          downloader.download(data.Game({'game': 'game1'})),
+          'build game1. pass. ')
+
+  def test_download_all_reuses_connections(self) -> None:
+    games = [data.Game({'game': 'game%s' % i}) for i in range(40)]
+    with data.GameLogDownloader(self.url, concurrency=4) as downloader:
+      results = list(downloader.downloadAll(games))
+    self.assertCountEqual([log for _, log in results],
+                          ['build game%s. pass. ' % i for i in range(40)])
+    # One keep-alive connection per worker.
+    self.assertLessEqual(self.server.connections, 4)
+
+  def test_slow_games_do_not_block(self) -> None:
+    games = [data.Game({'game': 'slow-game'})] + [
+        data.Game({'game': 'game%s' % i}) for i in range(10)
+    ]
+    with data.GameLogDownloader(self.url, concurrency=2) as downloader:
+      order: List[str] = [
+          game.game_id for game, _ in downloader.downloadAll(games)
+      ]
+    self.assertEqual(order[-1], 'slow-game')
+
+  def test_retries(self) -> None:
+    with data.GameLogDownloader(self.url, maxRetries=2,
+                                backoff=0.01) as downloader:
+      self.assertEqual(
+          downloader.download(data.Game({'game': 'fail2-game'})),
+          'build fail2-game. pass. ')
+      results = list(downloader.downloadAll([data.Game({'game': 'fail3-x'})]))
+    self.assertEqual(results[0][1], None)
+    self.assertEqual(self.server.attempts, {'fail2-game': 3, 'fail3-x': 3})
+
+
+class TestRateLimiter(unittest.TestCase):
+  def test_rate(self) -> None:
+    now = [0.0]
+
+    def sleep(seconds: float) -> None:
+      now[0] += seconds
+
+    limiter = data.RateLimiter(rate=2, burst=2, clock=lambda: now[0],
+                               sleep=sleep)
+    for _ in range(6):
+      limiter.acquire()
+    # The first two requests are a burst, the rest happen 0.5s apart.
+    self.assertAlmostEqual(now[0], 2.0)
+
+
+class TestGameLogStore(unittest.TestCase):
+  def setUp(self) -> None:
+    self.tempdir = tempfile.TemporaryDirectory()
+    self.directory = os.path.join(self.tempdir.name, 'logs')
+
+  def tearDown(self) -> None:
+    self.tempdir.cleanup()
+
+  def test_append_and_read(self) -> None:
+    with data.GameLogStore(self.directory) as store:
+      store.append('game1', 'build a1. pass')
+      store.append('game2', 'build c5')
+      store.append('game1', 'ignored')
+      self.assertEqual(len(store), 2)
+      self.assertIn('game1', store)
+      self.assertNotIn('game3', store)
+      self.assertEqual(store.get('game2'), 'build c5')
+      self.assertEqual(
+          list(store.logs()), [('game1', 'build a1. pass'),
+                               ('game2', 'build c5')])
+      with self.assertRaises(KeyError):
+        store.get('game3')
+
+  def test_reopen_and_shards(self) -> None:
+    logs = [('game%s' % i, 'log of game %s. ' % i * 20) for i in range(30)]
+    with data.GameLogStore(self.directory, shardBytes=100) as store:
+      for gameId, log in logs[:20]:
+        store.append(gameId, log)
+    with data.GameLogStore(self.directory, shardBytes=100) as store:
+      self.assertEqual(set(store.ids()), {gameId for gameId, _ in logs[:20]})
+      for gameId, log in logs[20:]:
+        store.append(gameId, log)
+      self.assertEqual(list(store.logs()), logs)
+    shards = [f for f in os.listdir(self.directory) if f.startswith('logs-')]
+    self.assertGreater(len(shards), 1)
+
+  def test_ignores_partial_index_line(self) -> None:
+    with data.GameLogStore(self.directory) as store:
+      store.append('game1', 'build a1')
+    with open(os.path.join(self.directory, 'index.tsv'), 'a') as f:
+      f.write('game2\t0\t')
+    with data.GameLogStore(self.directory) as store:
+      self.assertEqual(list(store.logs()), [('game1', 'build a1')])
+      store.append('game2', 'build c5')
+    with data.GameLogStore(self.directory) as store:
+      self.assertEqual(list(store.logs()), [('game1', 'build a1'),
+                                            ('game2', 'build c5')])
+
+  def test_drops_entries_past_end_of_shard(self) -> None:
+    with data.GameLogStore(self.directory) as store:
+      store.append('game1', 'build a1')
+      store.append('game2', 'build c5')
+      store.append('game3', 'build e7')
+    # As if the index reached the disk but the end of the shard didn't.
+    shardPath = os.path.join(self.directory, 'logs-00000.z')
+    os.truncate(shardPath, os.path.getsize(shardPath) - 1)
+    with data.GameLogStore(self.directory) as store:
+      self.assertEqual(set(store.ids()), {'game1', 'game2'})
+      store.append('game3', 'build e7')
+    with data.GameLogStore(self.directory) as store:
+      self.assertEqual(store.get('game3'), 'build e7')
+
+  def test_index_written_on_sync(self) -> None:
+    indexPath = os.path.join(self.directory, 'index.tsv')
+    with data.GameLogStore(self.directory, syncEvery=2) as store:
+      store.append('game1', 'build a1')
+      self.assertEqual(os.path.getsize(indexPath), 0)
+      self.assertEqual(store.get('game1'), 'build a1')
+      store.append('game2', 'build c5')
+      self.assertGreater(os.path.getsize(indexPath), 0)
+
+
+def _summary(gameId: str, playerCount: int, vp: int) -> Dict:
+  return {
+      'game': gameId,
+      'player_count': playerCount,
+      'events': {
+          'faction': {
+              'all': {
+                  'vp': {
+                      'round': {
+                          'all': vp
+                      }
+                  }
+              }
+          }
+      }
+  }
+
+
+class _SummaryHandler(server.BaseHTTPRequestHandler):
+  """Serves /{YYYY-MM}.json with the month's summary events."""
+
+  def do_GET(self) -> None:
+    month = self.path.rsplit('/', 1)[-1][:-len('.json')]
+    if month not in self.server.months:
+      self.send_error(404)
+      return
+    body = json.dumps(self.server.months[month]).encode()
+    self.send_response(200)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    # Drop the connection halfway through the first `truncate[month]`
+    # responses.
+    truncate = self.server.truncate
+    if truncate.get(month, 0) > 0:
+      truncate[month] -= 1
+      self.wfile.write(body[:len(body) // 2])
+      self.close_connection = True
+      return
+    self.wfile.write(body)
+
+  def log_message(self, *args) -> None:
+    pass
+
+
+class TestIterJsonArray(unittest.TestCase):
+  def test_chunks(self) -> None:
+    values = [
+        _summary('game%s' % i, 4, 500 + i) for i in range(20)
+    ] + [12345, 'a string, with ] and [', [1, [2]], None, 0.5]
+    text = ' [ ' + ' ,\n'.join(json.dumps(value) for value in values) + ' ] '
+    for chunkSize in [1, 2, 7, 4096]:
+      self.assertEqual(
+          list(data.iterJsonArray(io.StringIO(text), chunkSize=chunkSize)),
+          values)
+    self.assertEqual(list(data.iterJsonArray(io.StringIO('[]'))), [])
+
+  def test_invalid(self) -> None:
+    with self.assertRaises(ValueError):
+      list(data.iterJsonArray(io.StringIO('{}')))
+    with self.assertRaises(ValueError):
+      list(data.iterJsonArray(io.StringIO('[1, 2')))
+    with self.assertRaises(ValueError):
+      list(data.iterJsonArray(io.StringIO('[{"a": 1}, {"b"')))
+
+
+class TestFetchAllSummaryData(unittest.TestCase):
+  def setUp(self) -> None:
+    self.server = server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             _SummaryHandler)
+    self.server.months = {
+        '2020-03': [_summary('march1', 4, 600),
+                    _summary('march2', 4, 100)],
+        '2020-01': [_summary('january1', 2, 300)],
+    }
+    self.server.truncate = {}
+    self.thread = threading.Thread(target=self.server.serve_forever)
+    self.thread.start()
+    self.tempdir = tempfile.TemporaryDirectory()
+    os.mkdir(os.path.join(self.tempdir.name, 'snellman'))
+    self.cwd = os.getcwd()
+    os.chdir(self.tempdir.name)
+
+  def tearDown(self) -> None:
+    os.chdir(self.cwd)
+    self.tempdir.cleanup()
+    self.server.shutdown()
+    self.server.server_close()
+    self.thread.join()
+
+  def _fetch(self, local: bool, **kwargs) -> List[str]:
+    url = 'http://127.0.0.1:%s/data/events' % self.server.server_address[1]
+    with mock.patch.object(data, '_SUMMARY_URL', url):
+      games = data.fetchAllSummaryData(
+          minDate=datetime(2019, 12, 15),
+          maxDate=datetime(2020, 3, 15),
+          keepPredicate=data.keepHighScoringGames,
+          local=local,
+          **kwargs)
+    return [game.game_id for game in games]
+
+  def test_retries_interrupted_downloads(self) -> None:
+    self.server.truncate = {'2020-03': 1, '2020-01': 100}
+    with mock.patch.object(data, '_SUMMARY_BACKOFF', 0.0):
+      # January keeps failing, but doesn't stop the other months.
+      self.assertEqual(self._fetch(local=False), ['march1'])
+    self.assertEqual(self.server.truncate,
+                     {'2020-03': 0, '2020-01': 100 - 1 - data._SUMMARY_RETRIES})
+
+  def test_fetch_and_cache(self) -> None:
+    self.assertEqual(self._fetch(local=False), ['march1', 'january1'])
+    # Every game is cached, not only the ones kept.
+    with open('snellman/summary-2020-03.columns.pkl', 'rb') as f:
+      columns = data.SummaryColumns.load(f)
+    self.assertEqual(columns.game_ids, ['march1', 'march2'])
+    self.assertEqual(list(columns.total_vps), [600, 100])
+
+    self.server.months = {}
+    self.assertEqual(self._fetch(local=True), ['march1', 'january1'])
+
+  def test_max_games_keeps_latest(self) -> None:
+    self.assertEqual(self._fetch(local=False, maxGames=1, concurrency=1),
+                     ['march1'])
+
+
+if __name__ == '__main__':
+  unittest.main()